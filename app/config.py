@@ -3,8 +3,8 @@ Configuration and environment setup.
 """
 
 import os
+import tempfile
 from pathlib import Path
-from groq import Groq
 
 # Load environment variables from .env file
 try:
@@ -20,11 +20,132 @@ except ImportError:
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 PORT = int(os.environ.get("PORT", 8000))
 
-# Initialize Groq client
-client = Groq(api_key=GROQ_API_KEY) if GROQ_API_KEY else None
+# Production server (see app/server.py)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 0))  # 0 = one worker per available CPU
+MAX_REQUESTS = int(os.getenv("MAX_REQUESTS", 1000))  # Recycle a worker after this many requests
+MAX_REQUESTS_JITTER = int(os.getenv("MAX_REQUESTS_JITTER", 100))
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+WORKER_TIMEOUT = int(os.getenv("WORKER_TIMEOUT", 120))
+
+# LLM provider (see app/llm/providers): "groq", "openai" for any OpenAI-compatible
+# server such as a local stub at LLM_BASE_URL, or "fake" for an in-process
+# provider that needs no network (benchmarks and load tests)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq").lower()
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://127.0.0.1:9000/v1")
+LLM_API_KEY = os.getenv("LLM_API_KEY")  # For "openai"; local stubs don't need one
+
+# Fake provider behaviour (LLM_PROVIDER=fake and python -m app.llm.stub_server)
+LLM_FAKE_LATENCY = float(os.getenv("LLM_FAKE_LATENCY", 0.3))  # Seconds to the first token
+LLM_FAKE_JITTER = float(os.getenv("LLM_FAKE_JITTER", 0))  # Extra seeded random latency, up to this many seconds
+LLM_FAKE_TOKENS_PER_SECOND = float(os.getenv("LLM_FAKE_TOKENS_PER_SECOND", 200))
+LLM_FAKE_COMPLETION_TOKENS = int(os.getenv("LLM_FAKE_COMPLETION_TOKENS", 120))
+LLM_FAKE_FAILURE_RATE = float(os.getenv("LLM_FAKE_FAILURE_RATE", 0))  # Calls failing like a 503
+LLM_FAKE_RATE_LIMIT_RATE = float(os.getenv("LLM_FAKE_RATE_LIMIT_RATE", 0))  # Calls failing like a 429
+LLM_FAKE_STALL_RATE = float(os.getenv("LLM_FAKE_STALL_RATE", 0))  # Calls that never answer
+LLM_FAKE_SEED = int(os.getenv("LLM_FAKE_SEED", 0))
+
+# LLM client connection pool (the client itself is created at app startup, see app/llm)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 200))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", 50))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", 60))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 30))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", 5))
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "true").lower() == "true"
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+
+# Outbound LLM limiter, per worker process: concurrency cap, starting request
+# rate (adapted to the provider's 429s and rate-limit headers) and queueing
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 32))
+LLM_RATE_LIMIT_RPM = float(os.getenv("LLM_RATE_LIMIT_RPM", 600))
+LLM_RATE_BURST = int(os.getenv("LLM_RATE_BURST", 10))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", 5))  # Max wait for a slot before shedding
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", 200))
+
+# Per-call deadlines in seconds (for streams: until the stream opens)
+LLM_CLASSIFIER_DEADLINE = float(os.getenv("LLM_CLASSIFIER_DEADLINE", 3))
+LLM_ANSWER_DEADLINE = float(os.getenv("LLM_ANSWER_DEADLINE", 15))
+LLM_SUMMARY_DEADLINE = float(os.getenv("LLM_SUMMARY_DEADLINE", 10))
+
+# Hedged requests: calls listed here (e.g. "classifier,answer") send a second
+# attempt once the first is slower than the recent p95 for that call
+LLM_HEDGE_CALLS = {c.strip() for c in os.getenv("LLM_HEDGE_CALLS", "").split(",") if c.strip()}
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", 0.2))
+
+# Circuit breaker: stop calling the provider when too many recent calls fail
+LLM_BREAKER_ERROR_RATE = float(os.getenv("LLM_BREAKER_ERROR_RATE", 0.5))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", 10))
+LLM_BREAKER_WINDOW_SECONDS = float(os.getenv("LLM_BREAKER_WINDOW_SECONDS", 30))
+LLM_BREAKER_OPEN_SECONDS = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", 20))
 
 # Model configuration
 MODEL_NAME = "llama-3.3-70b-versatile"  # Current recommended model
 
+# Token prices (USD per million tokens) used to estimate LLM spend per request
+LLM_PRICE_INPUT_PER_MTOK = float(os.getenv("LLM_PRICE_INPUT_PER_MTOK", 0.59))
+LLM_PRICE_OUTPUT_PER_MTOK = float(os.getenv("LLM_PRICE_OUTPUT_PER_MTOK", 0.79))
+
+# Chat mode: "sequential" (classify, then answer) or "speculative" (both at once,
+# answer discarded if off-topic: lower latency, extra tokens on irrelevant messages)
+CHAT_MODE = os.getenv("CHAT_MODE", "sequential").lower()
+
+# Chat response cache (exact + near-duplicate questions)
+CHAT_CACHE_ENABLED = os.getenv("CHAT_CACHE_ENABLED", "true").lower() == "true"
+CHAT_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", 5000))
+CHAT_CACHE_TTL_SECONDS = float(os.getenv("CHAT_CACHE_TTL_SECONDS", 24 * 3600))
+CHAT_CACHE_SIMILARITY = float(os.getenv("CHAT_CACHE_SIMILARITY", 0.85))  # Min. estimated Jaccard for a near hit
+
+# Server-side chat sessions: prompt context per turn is capped at
+# SESSION_CONTEXT_TOKENS; older turns are folded into a rolling summary
+SESSION_CONTEXT_TOKENS = int(os.getenv("SESSION_CONTEXT_TOKENS", 1500))
+SESSION_SUMMARY_TOKENS = int(os.getenv("SESSION_SUMMARY_TOKENS", 300))
+# Caps on each worker's memory and on the shared directory as a whole
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", 10000))
+SESSION_STORE_MAX_BYTES = int(os.getenv("SESSION_STORE_MAX_BYTES", 64 * 1024 * 1024))
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", 3600))  # Idle time before a session expires
+# Sessions are shared by all workers on the host through this directory, so
+# any worker can continue a conversation; set it to "" to keep sessions in
+# worker memory only (then run one worker or use sticky routing)
+_default_shared_root = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+SESSION_SHARED_DIR = os.getenv("SESSION_SHARED_DIR", os.path.join(_default_shared_root, "codebloom-sessions")) or None
+
+# Local knowledge base of vetted FAQ answers: close matches are answered
+# directly, partial matches pass a reference snippet to the LLM
+KB_ENABLED = os.getenv("KB_ENABLED", "true").lower() == "true"
+KB_DIRECT_THRESHOLD = float(os.getenv("KB_DIRECT_THRESHOLD", 0.8))
+KB_SNIPPET_THRESHOLD = float(os.getenv("KB_SNIPPET_THRESHOLD", 0.5))
+
+# Largest questionnaire batch accepted by the /pcos and /thyroid batch endpoints
+RISK_BATCH_MAX_ITEMS = int(os.getenv("RISK_BATCH_MAX_ITEMS", 10000))
+
+# Largest profile batch accepted by /nutrition/calculate/batch
+NUTRITION_BATCH_MAX_ITEMS = int(os.getenv("NUTRITION_BATCH_MAX_ITEMS", 100000))
+
+# How long clients and CDNs may cache the static nutrition tips (revalidated by ETag)
+NUTRITION_CACHE_MAX_AGE = int(os.getenv("NUTRITION_CACHE_MAX_AGE", 86400))
+
+# Per-user thyroid log histories (rolling analytics); set THYROID_STORE_DIR
+# to persist them and share them across workers
+THYROID_STORE_DIR = os.getenv("THYROID_STORE_DIR")  # e.g. /var/lib/codebloom/thyroid
+THYROID_STORE_MAX_USERS = int(os.getenv("THYROID_STORE_MAX_USERS", 1000))
+
+# Local topic classifier: decides relevance without an LLM call when confident
+TOPIC_CLASSIFIER_ENABLED = os.getenv("TOPIC_CLASSIFIER_ENABLED", "true").lower() == "true"
+TOPIC_CLASSIFIER_PATH = os.getenv("TOPIC_CLASSIFIER_PATH")  # Offline-trained .npz; default trains from seed keywords
+# Above 1 the classifier never accepts a message without the LLM. The keyword-
+# seeded model accepts 12% of held-out off-topic questions at 0.85 ("How does a
+# period work in a sentence?"), so only lower this for a model whose false
+# accept rate was measured with `python -m app.ml.topic_classifier --model ...`
+TOPIC_CLASSIFIER_RELEVANT_THRESHOLD = float(os.getenv("TOPIC_CLASSIFIER_RELEVANT_THRESHOLD", 1.1))
+TOPIC_CLASSIFIER_IRRELEVANT_THRESHOLD = float(os.getenv("TOPIC_CLASSIFIER_IRRELEVANT_THRESHOLD", 0.15))
+
+# Memoized topic decisions from the LLM classifier
+TOPIC_MEMO_MAX_ENTRIES = int(os.getenv("TOPIC_MEMO_MAX_ENTRIES", 10000))
+TOPIC_MEMO_TTL_SECONDS = float(os.getenv("TOPIC_MEMO_TTL_SECONDS", 7 * 24 * 3600))
+TOPIC_MEMO_SHARED_DIR = os.getenv("TOPIC_MEMO_SHARED_DIR")  # e.g. /dev/shm/codebloom-topics to share across workers
+
+# Shared trained-model store (memory-backed when /dev/shm is available)
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", os.path.join(_default_shared_root, "codebloom-models"))
+MODEL_CACHE_MAX_ENTRIES = int(os.getenv("MODEL_CACHE_MAX_ENTRIES", 2048))
+
 # Framework availability flag (set by ML module imports)
 PYTORCH_AVAILABLE = False
@@ -0,0 +1,9 @@
+"""LLM package - Shared provider for the chatbot's language model calls."""
+
+from .client import init_llm_client, close_llm_client, get_llm_client
+
+__all__ = [
+    "init_llm_client",
+    "close_llm_client",
+    "get_llm_client",
+]
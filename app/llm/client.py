@@ -0,0 +1,96 @@
+"""
+Shared LLM provider.
+
+A single provider per worker process, created at app startup and chosen by
+LLM_PROVIDER (see app/llm/providers): Groq, an OpenAI-compatible server or the
+in-process fake. Network providers share one pooled httpx connection pool,
+and every provider response feeds the outbound limiter. Chat handlers await
+completions on the event loop instead of blocking it for the whole LLM
+round trip.
+"""
+
+from typing import Optional
+
+from app.config import (
+    GROQ_API_KEY,
+    LLM_PROVIDER,
+    LLM_BASE_URL,
+    LLM_API_KEY,
+    LLM_FAKE_LATENCY,
+    LLM_FAKE_JITTER,
+    LLM_FAKE_TOKENS_PER_SECOND,
+    LLM_FAKE_COMPLETION_TOKENS,
+    LLM_FAKE_FAILURE_RATE,
+    LLM_FAKE_RATE_LIMIT_RATE,
+    LLM_FAKE_STALL_RATE,
+    LLM_FAKE_SEED,
+)
+from app.llm.providers import LLMProvider, GroqProvider, OpenAICompatibleProvider, FakeProvider
+
+_client: Optional[LLMProvider] = None
+
+
+def create_fake_provider(response_hook=None) -> FakeProvider:
+    """Build a fake provider from the LLM_FAKE_* settings."""
+    return FakeProvider(
+        latency=LLM_FAKE_LATENCY,
+        jitter=LLM_FAKE_JITTER,
+        tokens_per_second=LLM_FAKE_TOKENS_PER_SECOND,
+        completion_tokens=LLM_FAKE_COMPLETION_TOKENS,
+        failure_rate=LLM_FAKE_FAILURE_RATE,
+        rate_limit_rate=LLM_FAKE_RATE_LIMIT_RATE,
+        stall_rate=LLM_FAKE_STALL_RATE,
+        seed=LLM_FAKE_SEED,
+        response_hook=response_hook,
+    )
+
+
+def create_llm_client() -> Optional[LLMProvider]:
+    """
+    Build the configured LLM provider.
+    
+    Returns:
+        Configured provider, or None if LLM_PROVIDER is "groq" and
+        GROQ_API_KEY is not set
+        
+    Raises:
+        ValueError: If LLM_PROVIDER names an unknown provider
+    """
+    # Imported here: the limiter pulls in app.utils, which imports this package
+    from app.llm.limiter import llm_limiter
+    
+    # Every response, including retries inside a provider, updates the limiter
+    hook = llm_limiter.observe_response
+    if LLM_PROVIDER == "groq":
+        return GroqProvider(GROQ_API_KEY, response_hook=hook) if GROQ_API_KEY else None
+    if LLM_PROVIDER == "openai":
+        return OpenAICompatibleProvider(LLM_BASE_URL, LLM_API_KEY, response_hook=hook)
+    if LLM_PROVIDER == "fake":
+        return create_fake_provider(response_hook=hook)
+    raise ValueError(f"Unknown LLM_PROVIDER {LLM_PROVIDER!r}; expected groq, openai or fake")
+
+
+async def init_llm_client() -> Optional[LLMProvider]:
+    """Create the process-wide provider (called from the app lifespan)."""
+    global _client
+    if _client is None:
+        _client = create_llm_client()
+    return _client
+
+
+async def close_llm_client():
+    """Close the process-wide provider and its connection pool."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def get_llm_client() -> Optional[LLMProvider]:
+    """
+    Get the process-wide provider.
+    
+    Returns:
+        LLM provider, or None if not configured or not started
+    """
+    return _client
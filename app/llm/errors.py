@@ -0,0 +1,34 @@
+"""
+Errors raised by the LLM call path.
+
+Providers raise the Provider* errors whatever their backend; the resilience
+layer turns those into LLMUnavailableError or LLMOverloadedError for callers.
+"""
+
+
+class LLMUnavailableError(Exception):
+    """The LLM provider is failing, too slow, or the circuit breaker is open."""
+
+
+class LLMOverloadedError(LLMUnavailableError):
+    """The call was shed: the provider quota or our outbound limit is exhausted."""
+
+
+class ProviderError(Exception):
+    """Base class for failures reported by an LLM provider."""
+
+
+class ProviderUnavailableError(ProviderError):
+    """The provider couldn't be reached or failed on its side (timeouts, 5xx)."""
+
+
+class ProviderRateLimitError(ProviderError):
+    """The provider rejected the call for exceeding its rate limit (429)."""
+
+
+class ProviderRequestError(ProviderError):
+    """The provider rejected the request itself (4xx other than 429)."""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
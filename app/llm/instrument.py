@@ -0,0 +1,111 @@
+"""
+Instrumented LLM calls.
+
+Every chat completion goes through these wrappers, which record per call
+name ("classifier", "answer", "summary") and model:
+- llm_calls_total by outcome (ok, error, cancelled)
+- llm_tokens_total by kind (prompt, completion) and llm_cost_usd_total
+- llm_latency_seconds, and llm_ttft_seconds (time to first token) for streams
+The same numbers go into the request's usage scope for per-request summaries.
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator
+
+from app.llm.usage import record_usage, estimate_cost
+from app.utils.metrics import describe, inc_counter, observe
+
+describe("llm_calls_total", "LLM calls by call name, model and outcome")
+describe("llm_tokens_total", "LLM tokens by call name, model and kind")
+describe("llm_cost_usd_total", "Estimated LLM spend in USD")
+describe("llm_latency_seconds", "LLM call latency until the full response")
+describe("llm_ttft_seconds", "Time to the first streamed token")
+
+
+def _record(call: str, model: str, outcome: str, usage, started: float):
+    duration = time.perf_counter() - started
+    inc_counter("llm_calls_total", call=call, model=model, outcome=outcome)
+    observe("llm_latency_seconds", duration, call=call, model=model)
+
+    prompt = getattr(usage, "prompt_tokens", 0) or 0
+    completion = getattr(usage, "completion_tokens", 0) or 0
+    if prompt or completion:
+        inc_counter("llm_tokens_total", prompt, call=call, model=model, kind="prompt")
+        inc_counter("llm_tokens_total", completion, call=call, model=model, kind="completion")
+        inc_counter("llm_cost_usd_total", estimate_cost(prompt, completion), call=call, model=model)
+
+    record_usage(call, usage, duration * 1000, failed=outcome != "ok")
+
+
+async def create_completion(client, call: str, **kwargs) -> Any:
+    """
+    Create a chat completion and record its metrics.
+
+    Args:
+        client: LLM provider
+        call: Call name the metrics are filed under
+        **kwargs: Completion arguments (messages, model, temperature, max_tokens)
+
+    Returns:
+        The provider's completion
+    """
+    model = kwargs.get("model", "")
+    started = time.perf_counter()
+    try:
+        completion = await client.complete(**kwargs)
+    except asyncio.CancelledError:
+        _record(call, model, "cancelled", None, started)
+        raise
+    except Exception:
+        _record(call, model, "error", None, started)
+        raise
+    _record(call, model, "ok", completion.usage, started)
+    return completion
+
+
+async def stream_completion(client, call: str, **kwargs) -> AsyncIterator[Any]:
+    """
+    Start a streamed chat completion whose chunks are instrumented.
+
+    Errors while opening the stream are raised here; metrics are recorded
+    when the stream ends, fails or is closed early.
+
+    Args:
+        client: LLM provider
+        call: Call name the metrics are filed under
+        **kwargs: Completion arguments (messages, model, temperature, max_tokens)
+
+    Returns:
+        Async iterator over the provider's chunks
+    """
+    model = kwargs.get("model", "")
+    started = time.perf_counter()
+    try:
+        stream = await client.stream(**kwargs)
+    except asyncio.CancelledError:
+        _record(call, model, "cancelled", None, started)
+        raise
+    except Exception:
+        _record(call, model, "error", None, started)
+        raise
+
+    async def chunks():
+        usage = None
+        first_token = True
+        outcome = "cancelled"
+        try:
+            async for chunk in stream:
+                usage = chunk.usage or usage
+                if first_token and chunk.content:
+                    first_token = False
+                    observe("llm_ttft_seconds", time.perf_counter() - started, call=call, model=model)
+                yield chunk
+            outcome = "ok"
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            _record(call, model, outcome, usage, started)
+
+    return chunks()
@@ -0,0 +1,282 @@
+"""
+Adaptive outbound limiter for LLM calls.
+
+One limiter per worker process gates every call to the provider with:
+- a concurrency cap (LLM_MAX_CONCURRENCY in flight)
+- a token bucket refilled at the current request rate, starting at
+  LLM_RATE_LIMIT_RPM and adapting AIMD-style: on a 429 it drops to the
+  throughput the provider actually accepted (at most half the current rate),
+  then grows by a small step per success
+- pauses taken from the provider's retry-after and x-ratelimit-* headers,
+  so calls wait for the quota to reset instead of failing into it
+- a priority queue (answers before classifier calls before summaries) with
+  a bounded length and wait; calls that can't be admitted in time are shed
+  with LLMOverloadedError
+"""
+
+import asyncio
+import heapq
+import itertools
+import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple
+
+from app.config import (
+    LLM_MAX_CONCURRENCY,
+    LLM_RATE_LIMIT_RPM,
+    LLM_RATE_BURST,
+    LLM_QUEUE_TIMEOUT,
+    LLM_MAX_QUEUE,
+)
+from app.llm.errors import LLMOverloadedError
+from app.utils.metrics import describe, inc_counter, observe, set_gauge
+
+# Lower runs first
+PRIORITIES = {"answer": 0, "classifier": 1, "summary": 2}
+
+# Never adapt below this many requests/second
+MIN_RATE = 0.2
+# Additive increase per success in requests/second; at steady state this is
+# roughly 10% growth per second whatever the rate
+RATE_INCREASE_STEP = 0.1
+# Window over which accepted throughput is measured
+THROUGHPUT_WINDOW_SECONDS = 2.0
+# Consecutive 429s within this window count as one congestion event
+DECREASE_COOLDOWN_SECONDS = 1.0
+# Pause when fewer tokens than this remain in the provider's token quota
+MIN_TOKEN_HEADROOM = 1000
+
+describe("llm_limiter_wait_seconds", "Time LLM calls waited for an outbound slot")
+describe("llm_limiter_shed_total", "LLM calls shed by the outbound limiter")
+describe("llm_limiter_rate_rps", "Current adaptive LLM request rate")
+describe("llm_limiter_in_flight", "LLM calls currently in flight")
+
+_DURATION_PART = re.compile(r"([\d.]+)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a rate-limit reset duration into seconds.
+
+    Accepts plain seconds ("7") and Go-style durations ("2m59.56s", "120ms").
+
+    Returns:
+        Seconds, or None if the value is missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+class AdaptiveLimiter:
+    """Priority-queued token bucket plus concurrency cap for outbound calls."""
+
+    def __init__(self, max_concurrency: int, rate_per_minute: float, burst: int, queue_timeout: float, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_rate = max(rate_per_minute, 1) / 60.0
+        self.burst = burst
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+
+        self.rate = self.max_rate
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._successes: deque = deque()
+        self._in_flight = 0
+        # (priority, sequence, future); cancelled futures are skipped lazily
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._stats = {"admitted": 0, "shed_queue_full": 0, "shed_timeout": 0, "rate_limited": 0}
+        set_gauge("llm_limiter_rate_rps", self.rate)
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _dispatch(self):
+        """Admit waiting calls while concurrency, tokens and pauses allow."""
+        now = time.monotonic()
+        self._refill(now)
+        while self._waiters and self._in_flight < self.max_concurrency:
+            if self._waiters[0][2].done():
+                heapq.heappop(self._waiters)
+                continue
+            delay = self._paused_until - now if now < self._paused_until else (1 - self._tokens) / self.rate
+            if delay > 0:
+                self._schedule_wakeup(delay)
+                return
+            _, _, future = heapq.heappop(self._waiters)
+            self._tokens -= 1
+            self._in_flight += 1
+            future.set_result(None)
+
+    def _schedule_wakeup(self, delay: float):
+        if self._wakeup is not None and not self._wakeup.cancelled():
+            self._wakeup.cancel()
+        self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _release(self):
+        self._in_flight -= 1
+        set_gauge("llm_limiter_in_flight", self._in_flight)
+        if self._waiters:
+            self._dispatch()
+
+    async def acquire(self, call: str):
+        """
+        Wait for an outbound slot.
+
+        Raises:
+            LLMOverloadedError: If the queue is full or no slot frees up
+                within the queue timeout
+        """
+        if len(self._waiters) >= self.max_queue:
+            self._stats["shed_queue_full"] += 1
+            inc_counter("llm_limiter_shed_total", call=call, reason="queue_full")
+            raise LLMOverloadedError("LLM request queue is full")
+
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (PRIORITIES.get(call, len(PRIORITIES)), next(self._sequence), future))
+        self._dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            # cancel() fails if the slot was granted at the last moment; keep it then
+            if future.cancel():
+                self._stats["shed_timeout"] += 1
+                inc_counter("llm_limiter_shed_total", call=call, reason="timeout")
+                raise LLMOverloadedError(f"No LLM capacity within {self.queue_timeout:g}s") from None
+        except asyncio.CancelledError:
+            # Admitted just as the caller gave up: hand the slot back
+            if future.done() and not future.cancelled():
+                self._release()
+            future.cancel()
+            raise
+
+        self._stats["admitted"] += 1
+        set_gauge("llm_limiter_in_flight", self._in_flight)
+        observe("llm_limiter_wait_seconds", time.monotonic() - started, call=call)
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free right now, without queueing."""
+        now = time.monotonic()
+        self._refill(now)
+        if (
+            self._waiters
+            or self._in_flight >= self.max_concurrency
+            or now < self._paused_until
+            or self._tokens < 1
+        ):
+            return False
+        self._tokens -= 1
+        self._in_flight += 1
+        set_gauge("llm_limiter_in_flight", self._in_flight)
+        return True
+
+    @asynccontextmanager
+    async def slot(self, call: str):
+        """Hold an outbound slot for the duration of a call."""
+        await self.acquire(call)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def release(self):
+        """Return a slot taken with try_acquire or held across a stream."""
+        self._release()
+
+    def _accepted_rate(self, now: float) -> float:
+        while self._successes and self._successes[0] < now - THROUGHPUT_WINDOW_SECONDS:
+            self._successes.popleft()
+        return len(self._successes) / THROUGHPUT_WINDOW_SECONDS
+
+    def record_success(self):
+        """Probe back toward the configured rate after a successful call."""
+        self._successes.append(time.monotonic())
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + RATE_INCREASE_STEP)
+            set_gauge("llm_limiter_rate_rps", self.rate)
+
+    def record_rate_limited(self, retry_after: Optional[float]):
+        """
+        React to a 429: pause for retry-after and cut the request rate.
+
+        Args:
+            retry_after: Seconds the provider asked us to wait, if given
+        """
+        now = time.monotonic()
+        self._stats["rate_limited"] += 1
+        if retry_after:
+            self._pause(now + retry_after)
+        if now - self._last_decrease >= DECREASE_COOLDOWN_SECONDS:
+            self._last_decrease = now
+            self._refill(now)
+            accepted = self._accepted_rate(now)
+            target = min(self.rate / 2, accepted) if accepted else self.rate / 2
+            self.rate = max(min(MIN_RATE, self.max_rate), target)
+            self._tokens = min(self._tokens, 1.0)
+            set_gauge("llm_limiter_rate_rps", self.rate)
+
+    def observe_response(self, status_code: int, headers):
+        """
+        Adapt to the rate-limit information on a provider response.
+
+        Args:
+            status_code: HTTP status of the response
+            headers: Response headers (case-insensitive mapping)
+        """
+        if status_code == 429:
+            self.record_rate_limited(parse_duration(headers.get("retry-after")))
+            return
+
+        now = time.monotonic()
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        if remaining_requests is not None and remaining_requests.strip() == "0":
+            reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+            if reset:
+                self._pause(now + reset)
+
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        if remaining_tokens is not None and remaining_tokens.strip().isdigit():
+            if int(remaining_tokens) < MIN_TOKEN_HEADROOM:
+                reset = parse_duration(headers.get("x-ratelimit-reset-tokens"))
+                if reset:
+                    self._pause(now + reset)
+
+    def _pause(self, until: float):
+        self._paused_until = max(self._paused_until, until)
+
+    def stats(self) -> dict:
+        """Return the limiter's current state and counters."""
+        now = time.monotonic()
+        return {
+            **self._stats,
+            "in_flight": self._in_flight,
+            "queued": sum(1 for _, _, future in self._waiters if not future.done()),
+            "rate_per_minute": round(self.rate * 60, 1),
+            "max_rate_per_minute": round(self.max_rate * 60, 1),
+            "paused_seconds": round(max(0.0, self._paused_until - now), 2),
+        }
+
+
+llm_limiter = AdaptiveLimiter(
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    rate_per_minute=LLM_RATE_LIMIT_RPM,
+    burst=LLM_RATE_BURST,
+    queue_timeout=LLM_QUEUE_TIMEOUT,
+    max_queue=LLM_MAX_QUEUE,
+)
@@ -0,0 +1,16 @@
+"""LLM providers - Interchangeable chat completion backends."""
+
+from .base import LLMProvider, Completion, CompletionChunk, Usage
+from .groq_provider import GroqProvider
+from .openai_compat import OpenAICompatibleProvider
+from .fake import FakeProvider
+
+__all__ = [
+    "LLMProvider",
+    "Completion",
+    "CompletionChunk",
+    "Usage",
+    "GroqProvider",
+    "OpenAICompatibleProvider",
+    "FakeProvider",
+]
@@ -0,0 +1,92 @@
+"""
+LLM provider interface.
+
+A provider serves chat completions from one backend. Every provider takes the
+same keyword arguments (messages, model, temperature, max_tokens) and returns
+provider-neutral results:
+- complete / complete_sync return a Completion
+- stream / stream_sync yield CompletionChunk objects; usage arrives on the
+  last chunk when the backend reports it
+Failures are raised as the Provider* errors in app.llm.errors, so the
+resilience layer treats every backend alike.
+"""
+
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Iterator, Mapping, Optional
+
+# Called with the status code and headers of every provider response
+ResponseHook = Callable[[int, Mapping[str, str]], None]
+
+
+@dataclass
+class Usage:
+    """Token usage reported for one call."""
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+@dataclass
+class Completion:
+    """A finished chat completion."""
+
+    content: str
+    usage: Optional[Usage] = None
+    model: str = ""
+
+
+@dataclass
+class CompletionChunk:
+    """One piece of a streamed chat completion."""
+
+    content: str = ""
+    usage: Optional[Usage] = None
+
+
+class LLMProvider:
+    """Base class for chat completion backends."""
+
+    name = "base"
+
+    def __init__(self, response_hook: Optional[ResponseHook] = None):
+        """
+        Args:
+            response_hook: Called with the status and headers of every
+                response, e.g. to let the outbound limiter adapt
+        """
+        self.response_hook = response_hook
+
+    def _observe(self, status_code: int, headers: Mapping[str, str]):
+        if self.response_hook is not None:
+            self.response_hook(status_code, headers)
+
+    async def complete(self, **kwargs) -> Completion:
+        """Create a chat completion."""
+        raise NotImplementedError
+
+    async def stream(self, **kwargs) -> AsyncIterator[CompletionChunk]:
+        """
+        Open a streamed chat completion.
+
+        Errors while opening the stream are raised here, later ones while
+        iterating.
+
+        Returns:
+            Async iterator over the completion's chunks
+        """
+        raise NotImplementedError
+
+    def complete_sync(self, **kwargs) -> Completion:
+        """Blocking variant of complete, for scripts and benchmarks."""
+        raise NotImplementedError
+
+    def stream_sync(self, **kwargs) -> Iterator[CompletionChunk]:
+        """Blocking variant of stream, for scripts and benchmarks."""
+        raise NotImplementedError
+
+    async def close(self):
+        """Release connections held by the provider."""
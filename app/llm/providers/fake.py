@@ -0,0 +1,175 @@
+"""
+In-process fake provider for benchmarks and load tests.
+
+Answers without any network: each call waits `latency` (plus up to `jitter`
+drawn from a seeded RNG) for its first token, then produces tokens at
+`tokens_per_second`; streams emit each token as it is produced. Failures are
+injected per call from the same RNG, so a given seed and call order replays
+identically:
+- failure_rate: fails like a 503 (ProviderUnavailableError)
+- rate_limit_rate: fails like a 429 (ProviderRateLimitError) with retry-after
+- stall_rate: never answers until cancelled, to exercise deadlines
+Topic classification prompts get "RELEVANT"; everything else gets filler text
+of `completion_tokens` words (capped by max_tokens), one token per word.
+"""
+
+import asyncio
+import random
+import time
+from typing import AsyncIterator, Iterator, List, Optional
+
+from app.llm.errors import ProviderUnavailableError, ProviderRateLimitError
+from app.llm.providers.base import Completion, CompletionChunk, LLMProvider, ResponseHook, Usage
+
+# Long enough to outlast any deadline
+STALL_SECONDS = 3600.0
+RATE_LIMIT_RETRY_AFTER = "1"
+
+FILLER = (
+    "The menstrual cycle is regulated by hormones that rise and fall in a regular pattern. "
+    "Cycle length varies from person to person and a healthcare provider can help with any concerns."
+).split()
+
+
+def _reply(messages: List[dict], max_tokens: int, completion_tokens: int) -> List[str]:
+    """Words of the fake answer."""
+    prompt = messages[-1]["content"] if messages else ""
+    # Topic validation prompts ask for a one-word RELEVANT/IRRELEVANT verdict
+    if "IRRELEVANT" in prompt:
+        return ["RELEVANT"]
+    count = min(completion_tokens, max_tokens)
+    return [FILLER[i % len(FILLER)] for i in range(count)]
+
+
+def _prompt_tokens(messages: List[dict]) -> int:
+    return sum(len(message.get("content") or "") // 4 + 1 for message in messages)
+
+
+class FakeProvider(LLMProvider):
+    """Deterministic in-process provider with latency and failure knobs."""
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency: float = 0.3,
+        jitter: float = 0.0,
+        tokens_per_second: float = 200.0,
+        completion_tokens: int = 120,
+        failure_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        stall_rate: float = 0.0,
+        seed: int = 0,
+        response_hook: Optional[ResponseHook] = None,
+    ):
+        super().__init__(response_hook)
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.failure_rate = failure_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.stall_rate = stall_rate
+        self._rng = random.Random(seed)
+        self.calls = 0
+
+    def _plan(self, kwargs: dict):
+        """
+        Decide a call's outcome and timing up front, in call order.
+
+        Returns:
+            Tuple of (outcome, first-token delay, words, usage) where outcome
+            is "ok", "failure", "rate_limited" or "stall"
+        """
+        self.calls += 1
+        roll = self._rng.random()
+        delay = self.latency + self._rng.random() * self.jitter
+        if roll < self.failure_rate:
+            outcome = "failure"
+        elif roll < self.failure_rate + self.rate_limit_rate:
+            outcome = "rate_limited"
+        elif roll < self.failure_rate + self.rate_limit_rate + self.stall_rate:
+            outcome = "stall"
+        else:
+            outcome = "ok"
+
+        messages = kwargs.get("messages", [])
+        words = _reply(messages, kwargs.get("max_tokens") or self.completion_tokens, self.completion_tokens)
+        usage = Usage(prompt_tokens=_prompt_tokens(messages), completion_tokens=len(words))
+        return outcome, delay, words, usage
+
+    def _fail(self, outcome: str):
+        """Report and raise an injected failure."""
+        if outcome == "rate_limited":
+            self._observe(429, {"retry-after": RATE_LIMIT_RETRY_AFTER})
+            raise ProviderRateLimitError("Injected rate limit (429)")
+        self._observe(503, {})
+        raise ProviderUnavailableError("Injected provider failure (503)")
+
+    def _token_time(self, index: int) -> float:
+        """Seconds after the first token at which token `index` is produced."""
+        return index / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    async def complete(self, **kwargs) -> Completion:
+        outcome, delay, words, usage = self._plan(kwargs)
+        if outcome == "stall":
+            await asyncio.sleep(STALL_SECONDS)
+        await asyncio.sleep(delay)
+        if outcome != "ok":
+            self._fail(outcome)
+        await asyncio.sleep(self._token_time(len(words)))
+        self._observe(200, {})
+        return Completion(content=" ".join(words), usage=usage, model=kwargs.get("model", ""))
+
+    async def stream(self, **kwargs) -> AsyncIterator[CompletionChunk]:
+        outcome, delay, words, usage = self._plan(kwargs)
+        if outcome == "stall":
+            await asyncio.sleep(STALL_SECONDS)
+        await asyncio.sleep(delay)
+        if outcome != "ok":
+            self._fail(outcome)
+        self._observe(200, {})
+
+        async def chunks():
+            loop = asyncio.get_running_loop()
+            # Paced against absolute times so sleep overhead doesn't accumulate
+            started = loop.time()
+            for index, word in enumerate(words):
+                wait = started + self._token_time(index) - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                yield CompletionChunk(content=word if index == 0 else " " + word)
+            yield CompletionChunk(usage=usage)
+
+        return chunks()
+
+    def complete_sync(self, **kwargs) -> Completion:
+        outcome, delay, words, usage = self._plan(kwargs)
+        if outcome == "stall":
+            time.sleep(STALL_SECONDS)
+        time.sleep(delay)
+        if outcome != "ok":
+            self._fail(outcome)
+        time.sleep(self._token_time(len(words)))
+        self._observe(200, {})
+        return Completion(content=" ".join(words), usage=usage, model=kwargs.get("model", ""))
+
+    def stream_sync(self, **kwargs) -> Iterator[CompletionChunk]:
+        outcome, delay, words, usage = self._plan(kwargs)
+        if outcome == "stall":
+            time.sleep(STALL_SECONDS)
+        time.sleep(delay)
+        if outcome != "ok":
+            self._fail(outcome)
+        self._observe(200, {})
+
+        def chunks():
+            started = time.monotonic()
+            for index, word in enumerate(words):
+                wait = started + self._token_time(index) - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                yield CompletionChunk(content=word if index == 0 else " " + word)
+            yield CompletionChunk(usage=usage)
+
+        return chunks()
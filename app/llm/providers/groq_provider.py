@@ -0,0 +1,169 @@
+"""
+Groq provider.
+
+Wraps the Groq SDK clients (async for the app, sync created on first use)
+over pooled httpx connections: keep-alive, HTTP/2 when the h2 package is
+installed, and the SDK's own retries.
+"""
+
+import importlib.util
+from typing import AsyncIterator, Iterator, Optional
+
+import groq
+import httpx
+
+from app.config import (
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE_CONNECTIONS,
+    LLM_KEEPALIVE_EXPIRY,
+    LLM_TIMEOUT,
+    LLM_CONNECT_TIMEOUT,
+    LLM_HTTP2,
+    LLM_MAX_RETRIES,
+)
+from app.llm.errors import (
+    ProviderError,
+    ProviderUnavailableError,
+    ProviderRateLimitError,
+    ProviderRequestError,
+)
+from app.llm.providers.base import Completion, CompletionChunk, LLMProvider, ResponseHook, Usage
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def _convert_error(error: groq.APIError) -> ProviderError:
+    """Map a Groq SDK error to the provider-neutral errors."""
+    if isinstance(error, groq.RateLimitError):
+        return ProviderRateLimitError(str(error))
+    if isinstance(error, (groq.APIConnectionError, groq.InternalServerError)):
+        return ProviderUnavailableError(str(error))
+    if isinstance(error, groq.APIStatusError):
+        return ProviderRequestError(str(error), error.status_code)
+    return ProviderUnavailableError(str(error))
+
+
+def _usage(usage) -> Optional[Usage]:
+    if usage is None:
+        return None
+    return Usage(prompt_tokens=usage.prompt_tokens or 0, completion_tokens=usage.completion_tokens or 0)
+
+
+def _completion(completion) -> Completion:
+    return Completion(
+        content=completion.choices[0].message.content or "",
+        usage=_usage(completion.usage),
+        model=completion.model,
+    )
+
+
+def _chunk(chunk) -> CompletionChunk:
+    # Groq reports usage on the last chunk, under x_groq
+    x_groq = getattr(chunk, "x_groq", None)
+    usage = getattr(chunk, "usage", None) or (x_groq.usage if x_groq else None)
+    content = chunk.choices[0].delta.content if chunk.choices else None
+    return CompletionChunk(content=content or "", usage=_usage(usage))
+
+
+class GroqProvider(LLMProvider):
+    """Chat completions from the Groq API."""
+
+    name = "groq"
+
+    def __init__(self, api_key: str, response_hook: Optional[ResponseHook] = None):
+        super().__init__(response_hook)
+        self.api_key = api_key
+        self.timeout = httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+        self.limits = httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+        )
+
+        async def observe(response: httpx.Response):
+            self._observe(response.status_code, response.headers)
+
+        self._client = groq.AsyncGroq(
+            api_key=api_key,
+            http_client=httpx.AsyncClient(
+                http2=LLM_HTTP2 and HTTP2_AVAILABLE,
+                limits=self.limits,
+                timeout=self.timeout,
+                # Every response, including the SDK's own retries, reaches the hook
+                event_hooks={"response": [observe]},
+            ),
+            timeout=self.timeout,
+            max_retries=LLM_MAX_RETRIES,
+        )
+        self._sync_client: Optional[groq.Groq] = None
+
+    def _get_sync_client(self) -> groq.Groq:
+        if self._sync_client is None:
+            def observe(response: httpx.Response):
+                self._observe(response.status_code, response.headers)
+
+            self._sync_client = groq.Groq(
+                api_key=self.api_key,
+                http_client=httpx.Client(
+                    limits=self.limits,
+                    timeout=self.timeout,
+                    event_hooks={"response": [observe]},
+                ),
+                timeout=self.timeout,
+                max_retries=LLM_MAX_RETRIES,
+            )
+        return self._sync_client
+
+    async def complete(self, **kwargs) -> Completion:
+        try:
+            completion = await self._client.chat.completions.create(**kwargs)
+        except groq.APIError as e:
+            raise _convert_error(e) from e
+        return _completion(completion)
+
+    async def stream(self, **kwargs) -> AsyncIterator[CompletionChunk]:
+        try:
+            stream = await self._client.chat.completions.create(stream=True, **kwargs)
+        except groq.APIError as e:
+            raise _convert_error(e) from e
+
+        async def chunks():
+            try:
+                async for chunk in stream:
+                    yield _chunk(chunk)
+            except groq.APIError as e:
+                raise _convert_error(e) from e
+            finally:
+                await stream.close()
+
+        return chunks()
+
+    def complete_sync(self, **kwargs) -> Completion:
+        try:
+            completion = self._get_sync_client().chat.completions.create(**kwargs)
+        except groq.APIError as e:
+            raise _convert_error(e) from e
+        return _completion(completion)
+
+    def stream_sync(self, **kwargs) -> Iterator[CompletionChunk]:
+        try:
+            stream = self._get_sync_client().chat.completions.create(stream=True, **kwargs)
+        except groq.APIError as e:
+            raise _convert_error(e) from e
+
+        def chunks():
+            try:
+                for chunk in stream:
+                    yield _chunk(chunk)
+            except groq.APIError as e:
+                raise _convert_error(e) from e
+            finally:
+                stream.close()
+
+        return chunks()
+
+    async def close(self):
+        await self._client.close()
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
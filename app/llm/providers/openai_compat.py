@@ -0,0 +1,178 @@
+"""
+Provider for OpenAI-compatible chat completion servers.
+
+Talks to `{base_url}/chat/completions` over plain httpx, so it works with
+local stub servers (see app.llm.stub_server) and self-hosted inference
+servers alike. There are no client-side retries; the outbound limiter and
+circuit breaker deal with failures.
+"""
+
+import json
+from typing import AsyncIterator, Iterator, Optional
+
+import httpx
+
+from app.config import (
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE_CONNECTIONS,
+    LLM_KEEPALIVE_EXPIRY,
+    LLM_TIMEOUT,
+    LLM_CONNECT_TIMEOUT,
+)
+from app.llm.errors import (
+    ProviderError,
+    ProviderUnavailableError,
+    ProviderRateLimitError,
+    ProviderRequestError,
+)
+from app.llm.providers.base import Completion, CompletionChunk, LLMProvider, ResponseHook, Usage
+
+
+def _status_error(status_code: int, body: str) -> ProviderError:
+    """Map an HTTP error status to the provider-neutral errors."""
+    message = f"HTTP {status_code}: {body[:200]}"
+    if status_code == 429:
+        return ProviderRateLimitError(message)
+    if status_code >= 500:
+        return ProviderUnavailableError(message)
+    return ProviderRequestError(message, status_code)
+
+
+def _usage(data: dict) -> Optional[Usage]:
+    usage = data.get("usage") or (data.get("x_groq") or {}).get("usage")
+    if not usage:
+        return None
+    return Usage(
+        prompt_tokens=usage.get("prompt_tokens") or 0,
+        completion_tokens=usage.get("completion_tokens") or 0,
+    )
+
+
+def _parse_event(line: str) -> Optional[CompletionChunk]:
+    """Parse one Server-Sent Events line; None for anything but a data chunk."""
+    if not line.startswith("data:"):
+        return None
+    payload = line[len("data:"):].strip()
+    if not payload or payload == "[DONE]":
+        return None
+    data = json.loads(payload)
+    choices = data.get("choices") or []
+    content = (choices[0].get("delta") or {}).get("content") if choices else None
+    return CompletionChunk(content=content or "", usage=_usage(data))
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """Chat completions from any server speaking the OpenAI chat API."""
+
+    name = "openai"
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, response_hook: Optional[ResponseHook] = None):
+        super().__init__(response_hook)
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.timeout = httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+        self.limits = httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+        )
+        self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, headers=self.headers)
+        self._sync_client: Optional[httpx.Client] = None
+
+    def _get_sync_client(self) -> httpx.Client:
+        if self._sync_client is None:
+            self._sync_client = httpx.Client(limits=self.limits, timeout=self.timeout, headers=self.headers)
+        return self._sync_client
+
+    @staticmethod
+    def _body(kwargs: dict, stream: bool) -> dict:
+        body = dict(kwargs)
+        if stream:
+            body["stream"] = True
+            body["stream_options"] = {"include_usage": True}
+        return body
+
+    def _completion(self, response: httpx.Response) -> Completion:
+        data = response.json()
+        return Completion(
+            content=data["choices"][0]["message"].get("content") or "",
+            usage=_usage(data),
+            model=data.get("model", ""),
+        )
+
+    async def complete(self, **kwargs) -> Completion:
+        try:
+            response = await self._client.post(self.url, json=self._body(kwargs, stream=False))
+        except httpx.HTTPError as e:
+            raise ProviderUnavailableError(str(e) or type(e).__name__) from e
+        self._observe(response.status_code, response.headers)
+        if response.status_code >= 400:
+            raise _status_error(response.status_code, response.text)
+        return self._completion(response)
+
+    async def stream(self, **kwargs) -> AsyncIterator[CompletionChunk]:
+        request = self._client.build_request("POST", self.url, json=self._body(kwargs, stream=True))
+        try:
+            response = await self._client.send(request, stream=True)
+        except httpx.HTTPError as e:
+            raise ProviderUnavailableError(str(e) or type(e).__name__) from e
+        self._observe(response.status_code, response.headers)
+        if response.status_code >= 400:
+            body = (await response.aread()).decode(errors="replace")
+            await response.aclose()
+            raise _status_error(response.status_code, body)
+
+        async def chunks():
+            try:
+                async for line in response.aiter_lines():
+                    chunk = _parse_event(line)
+                    if chunk is not None:
+                        yield chunk
+            except httpx.HTTPError as e:
+                raise ProviderUnavailableError(str(e) or type(e).__name__) from e
+            finally:
+                await response.aclose()
+
+        return chunks()
+
+    def complete_sync(self, **kwargs) -> Completion:
+        try:
+            response = self._get_sync_client().post(self.url, json=self._body(kwargs, stream=False))
+        except httpx.HTTPError as e:
+            raise ProviderUnavailableError(str(e) or type(e).__name__) from e
+        self._observe(response.status_code, response.headers)
+        if response.status_code >= 400:
+            raise _status_error(response.status_code, response.text)
+        return self._completion(response)
+
+    def stream_sync(self, **kwargs) -> Iterator[CompletionChunk]:
+        client = self._get_sync_client()
+        request = client.build_request("POST", self.url, json=self._body(kwargs, stream=True))
+        try:
+            response = client.send(request, stream=True)
+        except httpx.HTTPError as e:
+            raise ProviderUnavailableError(str(e) or type(e).__name__) from e
+        self._observe(response.status_code, response.headers)
+        if response.status_code >= 400:
+            body = response.read().decode(errors="replace")
+            response.close()
+            raise _status_error(response.status_code, body)
+
+        def chunks():
+            try:
+                for line in response.iter_lines():
+                    chunk = _parse_event(line)
+                    if chunk is not None:
+                        yield chunk
+            except httpx.HTTPError as e:
+                raise ProviderUnavailableError(str(e) or type(e).__name__) from e
+            finally:
+                response.close()
+
+        return chunks()
+
+    async def close(self):
+        await self._client.aclose()
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
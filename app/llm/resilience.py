@@ -0,0 +1,310 @@
+"""
+Deadlines, hedged requests and a circuit breaker for LLM calls.
+
+- Every call has a deadline (LLM_*_DEADLINE), so a degraded provider can't
+  hold a request for the client's full timeout and retries.
+- Calls listed in LLM_HEDGE_CALLS send a second attempt once the first is
+  slower than that call's recent p95; the first success wins.
+- Each attempt holds a slot of the outbound limiter (see app/llm/limiter);
+  hedges are only sent when a slot is free right away.
+- A process-wide circuit breaker opens when the recent error rate crosses
+  LLM_BREAKER_ERROR_RATE. While open, calls fail immediately with
+  LLMUnavailableError so callers can serve a fallback; after
+  LLM_BREAKER_OPEN_SECONDS a single probe call is let through.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Optional
+
+from app.config import (
+    LLM_CLASSIFIER_DEADLINE,
+    LLM_ANSWER_DEADLINE,
+    LLM_SUMMARY_DEADLINE,
+    LLM_HEDGE_CALLS,
+    LLM_HEDGE_MIN_DELAY,
+    LLM_BREAKER_ERROR_RATE,
+    LLM_BREAKER_MIN_CALLS,
+    LLM_BREAKER_WINDOW_SECONDS,
+    LLM_BREAKER_OPEN_SECONDS,
+)
+from app.llm import instrument, limiter
+from app.llm.errors import (
+    LLMUnavailableError,
+    LLMOverloadedError,
+    ProviderUnavailableError,
+    ProviderRateLimitError,
+    ProviderRequestError,
+)
+from app.utils.metrics import describe, inc_counter, set_gauge
+
+DEADLINES = {
+    "classifier": LLM_CLASSIFIER_DEADLINE,
+    "answer": LLM_ANSWER_DEADLINE,
+    "summary": LLM_SUMMARY_DEADLINE,
+}
+
+# Errors that mean the provider is unhealthy, as opposed to a bad request.
+# Rate limiting is handled by the limiter and doesn't count against the breaker.
+PROVIDER_FAILURES = (asyncio.TimeoutError, ProviderUnavailableError)
+
+describe("llm_deadline_exceeded_total", "LLM calls abandoned at their deadline")
+describe("llm_hedges_total", "Second attempts sent for slow LLM calls")
+describe("llm_breaker_rejections_total", "LLM calls refused while the circuit breaker was open")
+describe("llm_breaker_open", "1 while the LLM circuit breaker is open")
+
+
+class LatencyWindow:
+    """Latencies of the most recent successful calls."""
+
+    MIN_SAMPLES = 20
+
+    def __init__(self, size: int = 200):
+        self._samples: deque = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency at quantile q, or None until there are enough samples."""
+        if len(self._samples) < self.MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker over a sliding time window."""
+
+    def __init__(self, error_rate: float, min_calls: int, window_seconds: float, open_seconds: float):
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self._events: deque = deque()  # (timestamp, succeeded)
+        self._opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+        self._stats = {"opened": 0, "rejected": 0}
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.open_seconds:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider now."""
+        state = self.state
+        if state == "closed":
+            return True
+        now = time.monotonic()
+        # Half open: one probe at a time; a probe that never reported back
+        # (e.g. cancelled) is replaced after another open period
+        if state == "half_open" and (
+            self._probe_started is None or now - self._probe_started > self.open_seconds
+        ):
+            self._probe_started = now
+            return True
+        self._stats["rejected"] += 1
+        return False
+
+    def record(self, succeeded: bool):
+        """Report the outcome of a call that was allowed through."""
+        now = time.monotonic()
+        if self._opened_at is not None:
+            if succeeded:
+                self._close()
+            else:
+                self._open(now)
+            return
+
+        self._events.append((now, succeeded))
+        while self._events and self._events[0][0] < now - self.window_seconds:
+            self._events.popleft()
+        failures = sum(1 for _, ok in self._events if not ok)
+        if len(self._events) >= self.min_calls and failures / len(self._events) >= self.error_rate:
+            self._open(now)
+
+    def _open(self, now: float):
+        if self._opened_at is None:
+            self._stats["opened"] += 1
+        self._opened_at = now
+        self._probe_started = None
+        self._events.clear()
+        set_gauge("llm_breaker_open", 1)
+
+    def _close(self):
+        self._opened_at = None
+        self._probe_started = None
+        set_gauge("llm_breaker_open", 0)
+
+    def stats(self) -> dict:
+        """Return the breaker state and counters."""
+        failures = sum(1 for _, ok in self._events if not ok)
+        return {
+            **self._stats,
+            "state": self.state,
+            "window_calls": len(self._events),
+            "window_failures": failures,
+        }
+
+
+llm_breaker = CircuitBreaker(
+    error_rate=LLM_BREAKER_ERROR_RATE,
+    min_calls=LLM_BREAKER_MIN_CALLS,
+    window_seconds=LLM_BREAKER_WINDOW_SECONDS,
+    open_seconds=LLM_BREAKER_OPEN_SECONDS,
+)
+
+_latencies: Dict[str, LatencyWindow] = {}
+
+
+def _check_breaker(call: str):
+    if not llm_breaker.allow():
+        inc_counter("llm_breaker_rejections_total", call=call)
+        raise LLMUnavailableError("LLM circuit breaker is open")
+
+
+def _failed(call: str, error: BaseException, deadline: float) -> LLMUnavailableError:
+    """Record a provider failure and convert it for the caller."""
+    llm_breaker.record(False)
+    if isinstance(error, asyncio.TimeoutError):
+        inc_counter("llm_deadline_exceeded_total", call=call)
+        return LLMUnavailableError(f"{call} call exceeded its {deadline:g}s deadline")
+    return LLMUnavailableError(f"{call} call failed: {error}")
+
+
+def _rate_limited(call: str, error: ProviderRateLimitError) -> LLMOverloadedError:
+    """
+    Shed a call whose 429 survived the provider's retries. The limiter already
+    adapted to every 429 through the provider's response hook.
+    """
+    inc_counter("llm_limiter_shed_total", call=call, reason="rate_limited")
+    return LLMOverloadedError(f"{call} call was rate limited by the provider")
+
+
+async def _release_after(coro) -> Any:
+    try:
+        return await coro
+    finally:
+        limiter.llm_limiter.release()
+
+
+async def _release_when_done(stream: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        limiter.llm_limiter.release()
+
+
+async def _hedged(client, call: str, kwargs: dict) -> Any:
+    """Run a call, adding a second attempt if the first is slower than p95."""
+    window = _latencies.setdefault(call, LatencyWindow())
+    p95 = window.percentile(0.95) if call in LLM_HEDGE_CALLS else None
+    attempts = {asyncio.ensure_future(instrument.create_completion(client, call, **kwargs))}
+    try:
+        if p95 is not None:
+            done, _ = await asyncio.wait(attempts, timeout=max(p95, LLM_HEDGE_MIN_DELAY))
+            if not done and limiter.llm_limiter.try_acquire():
+                inc_counter("llm_hedges_total", call=call)
+                hedge = instrument.create_completion(client, call, **kwargs)
+                attempts.add(asyncio.ensure_future(_release_after(hedge)))
+
+        error = None
+        while attempts:
+            done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    return attempt.result()
+                error = attempt.exception()
+        raise error
+    finally:
+        for attempt in attempts:
+            attempt.cancel()
+
+
+async def create_completion(client, call: str, **kwargs) -> Any:
+    """
+    Create a chat completion under the call's deadline, hedging and breaker.
+
+    Args:
+        client: LLM provider
+        call: Call name ("classifier", "answer", "summary")
+        **kwargs: Completion arguments (messages, model, temperature, max_tokens)
+
+    Returns:
+        The provider's completion
+
+    Raises:
+        LLMUnavailableError: If the breaker is open, the deadline passed or
+            the provider failed
+        LLMOverloadedError: If the call was shed by the outbound limiter
+    """
+    _check_breaker(call)
+    deadline = DEADLINES.get(call, LLM_ANSWER_DEADLINE)
+    async with limiter.llm_limiter.slot(call):
+        started = time.perf_counter()
+        try:
+            completion = await asyncio.wait_for(_hedged(client, call, kwargs), deadline)
+        except ProviderRateLimitError as e:
+            raise _rate_limited(call, e) from e
+        except PROVIDER_FAILURES as e:
+            raise _failed(call, e, deadline) from e
+        except ProviderRequestError:
+            # The provider answered; the request itself was rejected
+            llm_breaker.record(True)
+            raise
+    llm_breaker.record(True)
+    limiter.llm_limiter.record_success()
+    _latencies.setdefault(call, LatencyWindow()).add(time.perf_counter() - started)
+    return completion
+
+
+async def stream_completion(client, call: str, **kwargs) -> AsyncIterator[Any]:
+    """
+    Open a streamed chat completion under the call's deadline and breaker.
+
+    The deadline covers opening the stream; streams are never hedged since
+    both attempts would produce output. The limiter slot is held until the
+    stream is consumed or closed.
+
+    Raises:
+        LLMUnavailableError: If the breaker is open, the deadline passed or
+            the provider failed
+        LLMOverloadedError: If the call was shed by the outbound limiter
+    """
+    _check_breaker(call)
+    deadline = DEADLINES.get(call, LLM_ANSWER_DEADLINE)
+    await limiter.llm_limiter.acquire(call)
+    try:
+        stream = await asyncio.wait_for(instrument.stream_completion(client, call, **kwargs), deadline)
+    except BaseException as e:
+        limiter.llm_limiter.release()
+        if isinstance(e, ProviderRateLimitError):
+            raise _rate_limited(call, e) from e
+        if isinstance(e, PROVIDER_FAILURES):
+            raise _failed(call, e, deadline) from e
+        if isinstance(e, ProviderRequestError):
+            llm_breaker.record(True)
+        raise
+    llm_breaker.record(True)
+    limiter.llm_limiter.record_success()
+    return _release_when_done(stream)
+
+
+def get_resilience_stats() -> dict:
+    """Breaker and limiter state plus recent p95 latency per call."""
+    return {
+        "breaker": llm_breaker.stats(),
+        "limiter": limiter.llm_limiter.stats(),
+        "p95_seconds": {
+            call: round(p95, 3)
+            for call, window in _latencies.items()
+            if (p95 := window.percentile(0.95)) is not None
+        },
+        "hedged_calls": sorted(LLM_HEDGE_CALLS),
+    }
@@ -0,0 +1,102 @@
+"""
+Local OpenAI-compatible stub server.
+
+Serves POST /v1/chat/completions (plain and streamed) from the fake provider,
+so load tests can exercise the full network path without a real LLM. The
+LLM_FAKE_* settings control latency, token rate and injected failures;
+injected failures are returned as 503 and 429 (with retry-after) responses.
+
+Usage:
+    python -m app.llm.stub_server --port 9000
+    LLM_PROVIDER=openai LLM_BASE_URL=http://127.0.0.1:9000/v1 python -m app.main
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.llm.client import create_fake_provider
+from app.llm.errors import ProviderRateLimitError, ProviderUnavailableError
+from app.llm.providers.fake import RATE_LIMIT_RETRY_AFTER
+
+COMPLETION_ARGS = ("messages", "model", "temperature", "max_tokens")
+
+app = FastAPI(title="LLM stub server")
+provider = create_fake_provider()
+
+
+def _usage(usage) -> dict:
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "total_tokens": usage.total_tokens,
+    }
+
+
+def _error(status_code: int, message: str, headers: dict = None) -> JSONResponse:
+    return JSONResponse(status_code=status_code, content={"error": {"message": message}}, headers=headers)
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    """OpenAI-style chat completion backed by the fake provider."""
+    body = await request.json()
+    kwargs = {key: body[key] for key in COMPLETION_ARGS if key in body}
+    model = body.get("model", "")
+    created = int(time.time())
+    try:
+        if body.get("stream"):
+            chunks = await provider.stream(**kwargs)
+        else:
+            completion = await provider.complete(**kwargs)
+    except ProviderRateLimitError as e:
+        return _error(429, str(e), {"retry-after": RATE_LIMIT_RETRY_AFTER})
+    except ProviderUnavailableError as e:
+        return _error(503, str(e))
+
+    completion_id = f"stub-{provider.calls}"
+    if not body.get("stream"):
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": completion.content},
+                "finish_reason": "stop",
+            }],
+            "usage": _usage(completion.usage),
+        }
+
+    async def events():
+        async for chunk in chunks:
+            data = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model}
+            if chunk.usage is not None:
+                data["choices"] = []
+                data["usage"] = _usage(chunk.usage)
+            else:
+                data["choices"] = [{"index": 0, "delta": {"content": chunk.content}, "finish_reason": None}]
+            yield f"data: {json.dumps(data)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible LLM stub server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
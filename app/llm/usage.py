@@ -0,0 +1,154 @@
+"""
+Token usage accounting for chat LLM calls.
+
+Each /chat request opens a usage scope; instrumented LLM calls record the
+provider's reported token usage and their latency into it under a call name
+("classifier", "answer", "summary").
+Tasks spawned from the request inherit the scope, so speculative calls are
+attributed to the request that started them. Per-mode totals let us compare
+the token cost of chat modes against their latency.
+"""
+
+import threading
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from app.config import LLM_PRICE_INPUT_PER_MTOK, LLM_PRICE_OUTPUT_PER_MTOK
+
+_request_usage: ContextVar[Optional[Dict[str, Dict[str, int]]]] = ContextVar(
+    "llm_request_usage", default=None
+)
+
+_mode_stats: Dict[str, Dict[str, float]] = {}
+_mode_lock = threading.Lock()
+
+
+def start_usage_scope() -> Dict[str, Dict[str, int]]:
+    """
+    Start recording LLM usage for the current request.
+
+    Returns:
+        Mapping of call name -> {calls, errors, prompt_tokens,
+        completion_tokens, duration_ms} that fills in as calls complete
+    """
+    usage: Dict[str, Dict[str, int]] = {}
+    _request_usage.set(usage)
+    return usage
+
+
+def record_usage(call: str, usage, duration_ms: float = 0.0, failed: bool = False) -> None:
+    """
+    Add one finished LLM call to the current request's usage.
+
+    Args:
+        call: Call name, e.g. "classifier" or "answer"
+        usage: Provider usage object with prompt_tokens/completion_tokens
+        duration_ms: Call latency
+        failed: Whether the call errored or was cancelled
+    """
+    scope = _request_usage.get()
+    if scope is None:
+        return
+
+    entry = scope.setdefault(call, {
+        "calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0, "duration_ms": 0.0
+    })
+    entry["calls"] += 1
+    entry["errors"] += int(failed)
+    entry["duration_ms"] += duration_ms
+    if usage is not None:
+        entry["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+        entry["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+
+
+def total_tokens(usage: Dict[str, Dict[str, int]], call: Optional[str] = None) -> int:
+    """Sum prompt and completion tokens for one call name, or all of them."""
+    entries = [usage.get(call)] if call else usage.values()
+    return sum(e["prompt_tokens"] + e["completion_tokens"] for e in entries if e)
+
+
+def estimate_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated spend in USD for a number of tokens."""
+    return (prompt_tokens * LLM_PRICE_INPUT_PER_MTOK + completion_tokens * LLM_PRICE_OUTPUT_PER_MTOK) / 1_000_000
+
+
+def summarize_usage(usage: Dict[str, Dict[str, int]]) -> Dict[str, float]:
+    """
+    Condense a request's usage scope into one summary.
+
+    Returns:
+        Totals of calls, errors, tokens, LLM time and estimated cost, plus
+        "<call>_ms" latency per call name
+    """
+    prompt = sum(e["prompt_tokens"] for e in usage.values())
+    completion = sum(e["completion_tokens"] for e in usage.values())
+    return {
+        "llm_calls": sum(e["calls"] for e in usage.values()),
+        "llm_errors": sum(e["errors"] for e in usage.values()),
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "cost_usd": round(estimate_cost(prompt, completion), 6),
+        **{f"{call}_ms": round(e["duration_ms"], 1) for call, e in usage.items()},
+    }
+
+
+def record_chat_mode(
+    mode: str,
+    usage: Dict[str, Dict[str, int]],
+    duration_ms: float,
+    wasted_tokens: int = 0,
+    cancelled_calls: int = 0,
+) -> None:
+    """
+    Aggregate a finished chat request into its mode's totals.
+
+    Args:
+        mode: Chat mode that served the request
+        usage: The request's usage scope
+        duration_ms: Request latency
+        wasted_tokens: Tokens spent on answers that were discarded
+        cancelled_calls: Answer calls cancelled before they completed
+    """
+    with _mode_lock:
+        stats = _mode_stats.setdefault(mode, {
+            "requests": 0,
+            "llm_calls": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "wasted_tokens": 0,
+            "cancelled_calls": 0,
+            "cost_usd": 0.0,
+            "total_duration_ms": 0.0,
+        })
+        stats["requests"] += 1
+        stats["llm_calls"] += sum(e["calls"] for e in usage.values())
+        prompt = sum(e["prompt_tokens"] for e in usage.values())
+        completion = sum(e["completion_tokens"] for e in usage.values())
+        stats["prompt_tokens"] += prompt
+        stats["completion_tokens"] += completion
+        stats["cost_usd"] += estimate_cost(prompt, completion)
+        stats["wasted_tokens"] += wasted_tokens
+        stats["cancelled_calls"] += cancelled_calls
+        stats["total_duration_ms"] += duration_ms
+
+
+def get_chat_mode_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Get per-mode token and latency totals for this process.
+
+    Returns:
+        Mapping of mode -> totals plus average tokens and latency per request
+    """
+    with _mode_lock:
+        result = {}
+        for mode, stats in _mode_stats.items():
+            requests = stats["requests"] or 1
+            result[mode] = {
+                **stats,
+                "avg_tokens_per_request": round(
+                    (stats["prompt_tokens"] + stats["completion_tokens"]) / requests, 1
+                ),
+                "avg_duration_ms": round(stats["total_duration_ms"] / requests, 1),
+                "avg_cost_usd": round(stats["cost_usd"] / requests, 6),
+            }
+        return result
@@ -3,21 +3,43 @@ Main FastAPI application entry point.
 """
 
 import os
+from contextlib import asynccontextmanager
 from datetime import datetime
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.routers import chatbot_router, prediction_router, pcos_router, thyroid_router, nutrition_router
-from app.config import GROQ_API_KEY, MODEL_NAME
+from app.config import GROQ_API_KEY, MODEL_NAME, LLM_PROVIDER
 from app.ml.model_factory import get_framework_availability
+from app.ml.model_store import get_store_stats
+from app.llm import init_llm_client, close_llm_client, get_llm_client
+from app.ml.topic_classifier import get_topic_classifier
+from app.services.pcos_service import PCOS_RESPONSES
+from app.services.thyroid_service import THYROID_RESPONSES
+from app.services.nutrition import NUTRITION_TIPS
 from app.utils.logging import logger, log_info
+from app.utils.metrics import render_metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create per-worker resources at startup and release them on shutdown."""
+    await init_llm_client()
+    get_topic_classifier()
+    PCOS_RESPONSES.build()
+    THYROID_RESPONSES.build()
+    NUTRITION_TIPS.build()
+    yield
+    await close_llm_client()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Reproductive Health Combined API",
     description="AI-powered chatbot and menstrual cycle prediction in one API",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # Configure allowed origins for CORS
@@ -35,8 +57,9 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOWED_ORIGINS,
     allow_credentials=False,  # Set to True only if using authentication
-    allow_methods=["GET", "POST"],  # Only allow needed methods
-    allow_headers=["Content-Type", "Accept"],
+    allow_methods=["GET", "POST", "DELETE"],  # Only allow needed methods
+    allow_headers=["Content-Type", "Accept", "If-None-Match"],
+    expose_headers=["ETag"],  # Lets clients revalidate cached nutrition tips
 )
 
 # Include routers
@@ -75,24 +98,33 @@ async def health_check():
     available_frameworks = [k for k, v in frameworks.items() if v]
     
     groq_configured = bool(GROQ_API_KEY)
+    llm_configured = get_llm_client() is not None
     
-    log_info(f"Health check - Groq: {groq_configured}, Frameworks: {available_frameworks}")
+    log_info(f"Health check - LLM ({LLM_PROVIDER}): {llm_configured}, Frameworks: {available_frameworks}")
     
     return {
         "status": "healthy",
         "chatbot": {
-            "status": "operational" if groq_configured else "not configured",
+            "status": "operational" if llm_configured else "not configured",
+            "provider": LLM_PROVIDER,
             "groq_configured": groq_configured,
             "model": MODEL_NAME
         },
         "cycle_predictor": {
             "status": "operational" if available_frameworks else "no ML frameworks available",
-            "available_frameworks": available_frameworks
+            "available_frameworks": available_frameworks,
+            "model_cache": get_store_stats()
         },
         "timestamp": datetime.now().isoformat()
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics for this worker process."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/favicon.ico")
 async def favicon():
     """Favicon handler to prevent 404 errors."""
@@ -118,6 +150,7 @@ if __name__ == "__main__":
     print("=" * 70)
     print("CHATBOT STATUS:")
     print(f"  🤖 Model: {MODEL_NAME}")
+    print(f"  🔌 LLM Provider: {LLM_PROVIDER}")
     print(f"  🔑 Groq API Key: {'✅ Set' if GROQ_API_KEY else '❌ Missing'}")
     print("=" * 70)
     print("CYCLE PREDICTOR STATUS:")
@@ -0,0 +1,307 @@
+"""
+Offline backtesting of cycle prediction engines.
+
+Replays rolling-origin forecasts over a cohort of cycle histories through every
+engine registered in the model factory and reports accuracy and cost.
+
+Usage:
+    python -m app.ml.backtest --synthetic 10000
+    python -m app.ml.backtest --input cohort.csv --workers 8
+    python -m app.ml.backtest --input cohort.parquet --max-origins 2 --json
+
+Input files hold one history per row with a ``cycles`` column containing the
+cycle lengths in chronological order (``28;30;27;29`` in CSV, a list or the
+same string format in Parquet). Histories are streamed, so memory stays flat
+regardless of cohort size.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+from multiprocessing import Pool
+
+import numpy as np
+
+from app.ml.model_factory import get_framework_availability, forecast_cycle_length
+from app.ml.preprocessing import calculate_uncertainty
+
+# Cycle length bounds accepted by the prediction API
+MIN_CYCLE_LENGTH = 20
+MAX_CYCLE_LENGTH = 45
+
+# Histories shorter than this cannot be used as a forecast origin
+MIN_HISTORY = 4
+
+
+# ============================================================================
+# Cohort sources
+# ============================================================================
+
+def generate_synthetic_cohort(size, seed=0):
+    """
+    Generate synthetic cycle histories.
+
+    Each history is seeded from (seed, index) so the cohort is identical no
+    matter how it is consumed or split across workers.
+
+    Args:
+        size: Number of histories to generate
+        seed: Base random seed
+
+    Yields:
+        List of cycle lengths
+    """
+    for index in range(size):
+        rng = np.random.default_rng([seed, index])
+        mean_length = np.clip(rng.normal(28.5, 2.0), 22, 38)
+        variability = rng.uniform(0.5, 4.0)
+        n_cycles = int(rng.integers(MIN_HISTORY + 2, 19))
+
+        cycles = np.rint(rng.normal(mean_length, variability, n_cycles))
+        cycles = np.clip(cycles, MIN_CYCLE_LENGTH, MAX_CYCLE_LENGTH)
+        yield cycles.astype(int).tolist()
+
+
+def _parse_cycles(value):
+    """Parse a cycles cell that is either a sequence or a delimited string."""
+    if isinstance(value, str):
+        return [int(v) for v in value.replace(",", ";").replace(" ", ";").split(";") if v]
+    return [int(v) for v in value]
+
+
+def read_csv_cohort(path):
+    """
+    Stream cycle histories from a CSV file.
+
+    Args:
+        path: Path to a CSV file with a 'cycles' column
+
+    Yields:
+        List of cycle lengths
+    """
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            yield _parse_cycles(row["cycles"])
+
+
+def read_parquet_cohort(path, batch_size=10000):
+    """
+    Stream cycle histories from a Parquet file, one record batch at a time.
+
+    Args:
+        path: Path to a Parquet file with a 'cycles' column
+        batch_size: Number of rows read per batch
+
+    Yields:
+        List of cycle lengths
+
+    Raises:
+        ValueError: If pyarrow is not installed
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Reading Parquet requires pyarrow. Please install: pip install pyarrow")
+
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=["cycles"]):
+        for value in batch.column(0).to_pylist():
+            yield _parse_cycles(value)
+
+
+def load_cohort(input_path=None, synthetic=None, seed=0):
+    """
+    Select a cohort source from CLI options.
+
+    Args:
+        input_path: Path to a CSV or Parquet file
+        synthetic: Number of synthetic histories to generate
+        seed: Random seed for synthetic histories
+
+    Returns:
+        Iterator over cycle histories
+    """
+    if input_path:
+        if input_path.endswith((".parquet", ".pq")):
+            return read_parquet_cohort(input_path)
+        return read_csv_cohort(input_path)
+    return generate_synthetic_cohort(synthetic, seed)
+
+
+# ============================================================================
+# Evaluation
+# ============================================================================
+
+def _init_worker():
+    """Pin each worker to one intra-op thread so workers don't oversubscribe cores."""
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+
+def evaluate_history(task):
+    """
+    Run rolling-origin forecasts over one history for every engine.
+
+    For each origin t, the engine is trained on cycles[:t] and scored against
+    cycles[t], using the same interval as the /predict endpoint. The shared
+    model store is bypassed so every prediction pays its full training cost.
+
+    Args:
+        task: Tuple of (engines, cycles, max_origins)
+
+    Returns:
+        Dictionary of engine -> [predictions, abs_error_sum, covered, cpu_seconds]
+    """
+    engines, cycles, max_origins = task
+    results = {engine: [0, 0.0, 0, 0.0] for engine in engines}
+
+    origins = range(MIN_HISTORY, len(cycles))
+    if max_origins:
+        origins = origins[-max_origins:]
+
+    for origin in origins:
+        history = cycles[:origin]
+        actual = cycles[origin]
+        margin = int(calculate_uncertainty(history))
+
+        for engine in engines:
+            cpu_start = time.process_time()
+            predicted = forecast_cycle_length(engine, history, use_cache=False)
+            cpu_seconds = time.process_time() - cpu_start
+
+            error = abs(predicted - actual)
+            stats = results[engine]
+            stats[0] += 1
+            stats[1] += error
+            stats[2] += int(error <= margin)
+            stats[3] += cpu_seconds
+
+    return results
+
+
+def _batched(iterable, size):
+    """Yield lists of at most `size` items from an iterable."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def run_backtest(cohort, engines, workers=None, max_origins=3, chunksize=16):
+    """
+    Backtest engines over a cohort using all cores.
+
+    The cohort is consumed in bounded windows so a Pool never buffers more
+    than a few chunks per worker, keeping memory flat for large inputs.
+
+    Args:
+        cohort: Iterable of cycle histories
+        engines: List of engine names registered in the model factory
+        workers: Number of worker processes (defaults to all cores)
+        max_origins: Forecast origins per history, most recent first (0 = all)
+        chunksize: Histories dispatched to a worker at a time
+
+    Returns:
+        Dictionary with per-engine metrics
+    """
+    workers = workers or os.cpu_count() or 1
+    totals = {engine: [0, 0.0, 0, 0.0] for engine in engines}
+    histories = 0
+    skipped = 0
+
+    def tasks(batch):
+        for cycles in batch:
+            yield (engines, cycles, max_origins)
+
+    wall_start = time.perf_counter()
+    with Pool(processes=workers, initializer=_init_worker) as pool:
+        for batch in _batched(cohort, workers * chunksize * 4):
+            usable = [c for c in batch if len(c) > MIN_HISTORY]
+            skipped += len(batch) - len(usable)
+            histories += len(usable)
+
+            for result in pool.imap_unordered(evaluate_history, tasks(usable), chunksize=chunksize):
+                for engine, stats in result.items():
+                    total = totals[engine]
+                    for i, value in enumerate(stats):
+                        total[i] += value
+    wall_seconds = time.perf_counter() - wall_start
+
+    report = {
+        "histories": histories,
+        "skipped_histories": skipped,
+        "workers": workers,
+        "wall_seconds": round(wall_seconds, 2),
+        "engines": {},
+    }
+    for engine, (predictions, abs_error, covered, cpu_seconds) in totals.items():
+        report["engines"][engine] = {
+            "predictions": predictions,
+            "mae_days": round(abs_error / predictions, 3) if predictions else None,
+            "interval_coverage": round(covered / predictions, 4) if predictions else None,
+            "cpu_seconds_per_prediction": round(cpu_seconds / predictions, 5) if predictions else None,
+        }
+    return report
+
+
+def format_report(report):
+    """Render a backtest report as a plain-text table."""
+    lines = [
+        f"Histories: {report['histories']} (skipped {report['skipped_histories']}) | "
+        f"Workers: {report['workers']} | Wall time: {report['wall_seconds']}s",
+        f"{'Engine':<12}{'Predictions':>12}{'MAE (days)':>12}{'Coverage':>10}{'CPU s/pred':>12}",
+    ]
+    for engine, metrics in report["engines"].items():
+        if not metrics["predictions"]:
+            lines.append(f"{engine:<12}{0:>12}{'-':>12}{'-':>10}{'-':>12}")
+            continue
+        lines.append(
+            f"{engine:<12}{metrics['predictions']:>12}{metrics['mae_days']:>12.3f}"
+            f"{metrics['interval_coverage']:>10.1%}{metrics['cpu_seconds_per_prediction']:>12.5f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest cycle prediction engines on a cohort.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="CSV or Parquet file with a 'cycles' column")
+    source.add_argument("--synthetic", type=int, help="Number of synthetic histories to generate")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for synthetic histories")
+    parser.add_argument("--engines", nargs="+", help="Engines to evaluate (default: all available)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--max-origins", type=int, default=3, help="Forecast origins per history (0 = all)")
+    parser.add_argument("--chunksize", type=int, default=16, help="Histories per worker task")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    available = [name for name, ok in get_framework_availability().items() if ok]
+    engines = args.engines or available
+    missing = [engine for engine in engines if engine not in available]
+    if not engines or missing:
+        parser.error(f"Unavailable engines: {missing or 'none installed'}")
+
+    cohort = load_cohort(args.input, args.synthetic, args.seed)
+    report = run_backtest(
+        cohort,
+        engines,
+        workers=args.workers,
+        max_origins=args.max_origins,
+        chunksize=args.chunksize,
+    )
+
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,17 +2,24 @@
 Model factory for PyTorch LSTM models.
 """
 
+import numpy as np
+
 from app.ml.pytorch_model import (
     PYTORCH_AVAILABLE,
     train_pytorch_model,
     predict_pytorch,
 )
+from app.ml.preprocessing import preprocess_data, denormalize
+from app.ml import model_store
 
 # Update config with framework availability
 import app.config as config
 config.PYTORCH_AVAILABLE = PYTORCH_AVAILABLE
 config.TENSORFLOW_AVAILABLE = False
 
+# Number of past cycles fed to the LSTM for each prediction
+SEQUENCE_LENGTH = 6
+
 
 def get_framework_availability():
     """
@@ -82,3 +89,41 @@ def predict(framework, model, last_sequence):
         raise ValueError("PyTorch is not available. Please install: pip install torch")
     
     return predict_pytorch(model, last_sequence)
+
+
+def forecast_cycle_length(framework, past_cycles, seq_length=SEQUENCE_LENGTH, use_cache=True):
+    """
+    Train a model on a cycle history and forecast the next cycle length.
+    
+    Models trained on an identical history are reused from the shared model
+    store instead of being retrained.
+    
+    Args:
+        framework: Must be 'pytorch'
+        past_cycles: List of past cycle lengths in days
+        seq_length: Desired sequence length
+        use_cache: Whether to read and write the shared model store
+        
+    Returns:
+        Predicted next cycle length in days (rounded)
+    """
+    X, y, min_val, max_val, seq_len = preprocess_data(past_cycles, seq_length)
+    
+    key = model_store.make_key(framework, past_cycles, seq_length) if use_cache else None
+    model = model_store.get_model(key) if use_cache else None
+    if model is None:
+        model = train_model(framework, X, y)
+        if use_cache:
+            model_store.put_model(key, model)
+    
+    # Normalize the most recent window with the training range
+    last_sequence = np.array(past_cycles[-seq_len:], dtype=np.float32)
+    last_sequence_normalized = (
+        (last_sequence - min_val) / (max_val - min_val)
+        if max_val != min_val
+        else np.ones_like(last_sequence) * 0.5
+    )
+    
+    predicted_normalized = predict(framework, model, last_sequence_normalized)
+    
+    return int(round(denormalize(predicted_normalized, min_val, max_val)))
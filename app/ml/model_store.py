@@ -0,0 +1,293 @@
+"""
+Shared-memory store for trained cycle prediction models.
+
+Trained weights are written once to a memory-backed directory (``/dev/shm`` by
+default) and memory-mapped by every worker process. Mappings are
+copy-on-write and inference never writes to the weights, so all workers on a
+box share the same physical pages and see each other's cache entries.
+
+Writes are serialized through an exclusive file lock so there is only ever a
+single writer; entries are published with an atomic rename, so readers never
+observe a partially written file.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.config import MODEL_CACHE_DIR, MODEL_CACHE_MAX_ENTRIES
+from app.utils.logging import log_warning
+
+try:
+    import fcntl
+    SHARED_STORE_AVAILABLE = True
+except ImportError:
+    # No POSIX file locks (e.g. Windows): fall back to a per-process cache
+    fcntl = None
+    SHARED_STORE_AVAILABLE = False
+
+try:
+    import torch
+    from app.ml.pytorch_model import CycleLSTM
+except ImportError:
+    torch = None
+    CycleLSTM = None
+
+ENTRY_SUFFIX = ".weights"
+LOCK_FILE = ".writer.lock"
+HEADER_ALIGNMENT = 64
+
+# Per-process LRU of attached models (key -> model)
+_attached = OrderedDict()
+_attached_lock = threading.Lock()
+
+_stats = {
+    "local_hits": 0,
+    "shared_hits": 0,
+    "misses": 0,
+    "writes": 0,
+    "write_skips": 0,
+}
+
+
+def _store_dir():
+    """Return the store directory, creating it on first use."""
+    os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+    return MODEL_CACHE_DIR
+
+
+def make_key(framework, past_cycles, seq_length):
+    """
+    Build a cache key for a trained model.
+
+    Args:
+        framework: ML framework name
+        past_cycles: Cycle history the model is trained on
+        seq_length: Requested sequence length
+
+    Returns:
+        Hex digest identifying the model
+    """
+    payload = f"{framework}|{seq_length}|{','.join(str(int(c)) for c in past_cycles)}"
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(_store_dir(), key + ENTRY_SUFFIX)
+
+
+def _remember(key, model):
+    """Insert a model into the per-process LRU, evicting the oldest entry."""
+    with _attached_lock:
+        _attached[key] = model
+        _attached.move_to_end(key)
+        while len(_attached) > MODEL_CACHE_MAX_ENTRIES:
+            _attached.popitem(last=False)
+
+
+def _serialize(model):
+    """
+    Encode a CycleLSTM as a single buffer: header length, JSON header, weights.
+
+    Returns:
+        Bytes ready to be written to the store
+    """
+    header = {
+        "arch": {
+            "input_size": model.lstm.input_size,
+            "hidden_size": model.hidden_size,
+            "num_layers": model.num_layers,
+        },
+        "tensors": [],
+    }
+    arrays = []
+    offset = 0
+    for name, tensor in model.state_dict().items():
+        array = np.ascontiguousarray(tensor.detach().cpu().numpy(), dtype=np.float32)
+        header["tensors"].append([name, list(array.shape), offset])
+        arrays.append(array)
+        offset += array.size
+
+    header_bytes = json.dumps(header).encode()
+    data_offset = -(-(8 + len(header_bytes)) // HEADER_ALIGNMENT) * HEADER_ALIGNMENT
+    padding = b"\0" * (data_offset - 8 - len(header_bytes))
+
+    return b"".join(
+        [struct.pack("<Q", len(header_bytes)), header_bytes, padding]
+        + [array.tobytes() for array in arrays]
+    )
+
+
+def _attach(path):
+    """
+    Map a stored entry and build a model whose weights live in the mapping.
+
+    Returns:
+        Model in eval mode, or None if the entry cannot be read
+    """
+    with open(path, "rb") as f:
+        (header_length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_length))
+    data_offset = -(-(8 + header_length) // HEADER_ALIGNMENT) * HEADER_ALIGNMENT
+
+    # Copy-on-write mapping: pages stay shared as long as nobody writes to them
+    data = np.memmap(path, dtype=np.float32, mode="c", offset=data_offset)
+    state = {}
+    for name, shape, offset in header["tensors"]:
+        size = int(np.prod(shape)) if shape else 1
+        state[name] = torch.from_numpy(data[offset:offset + size].reshape(shape))
+
+    model = CycleLSTM(**header["arch"])
+    model.load_state_dict(state, assign=True)
+    model.eval()
+    return model
+
+
+def get_model(key):
+    """
+    Look up a trained model by key.
+
+    Checks the per-process LRU first, then attaches a shared entry written by
+    any worker.
+
+    Args:
+        key: Cache key from make_key
+
+    Returns:
+        Trained model, or None on a miss
+    """
+    with _attached_lock:
+        model = _attached.get(key)
+        if model is not None:
+            _attached.move_to_end(key)
+            _stats["local_hits"] += 1
+            return model
+
+    if SHARED_STORE_AVAILABLE and torch is not None:
+        path = _entry_path(key)
+        if os.path.exists(path):
+            try:
+                model = _attach(path)
+            except (OSError, ValueError, KeyError, RuntimeError) as e:
+                log_warning(f"Model store: failed to attach {key[:12]}: {e}")
+            else:
+                _remember(key, model)
+                _stats["shared_hits"] += 1
+                return model
+
+    _stats["misses"] += 1
+    return None
+
+
+def put_model(key, model):
+    """
+    Publish a trained model to the store.
+
+    The model is always cached in-process. It is written to the shared store
+    only if this process can take the writer lock without waiting; otherwise
+    another worker is writing and the entry is left to a later request.
+
+    Args:
+        key: Cache key from make_key
+        model: Trained CycleLSTM model
+    """
+    _remember(key, model)
+
+    if not SHARED_STORE_AVAILABLE or torch is None:
+        return
+
+    try:
+        directory = _store_dir()
+        with open(os.path.join(directory, LOCK_FILE), "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                _stats["write_skips"] += 1
+                return
+
+            try:
+                path = _entry_path(key)
+                if not os.path.exists(path):
+                    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+                    with os.fdopen(fd, "wb") as f:
+                        f.write(_serialize(model))
+                    os.replace(tmp_path, path)
+                    _stats["writes"] += 1
+                    _evict(directory)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    except OSError as e:
+        log_warning(f"Model store: failed to write {key[:12]}: {e}")
+
+
+def _evict(directory):
+    """Remove the oldest shared entries beyond the size cap (writer only)."""
+    entries = [
+        entry for entry in os.scandir(directory)
+        if entry.name.endswith(ENTRY_SUFFIX)
+    ]
+    excess = len(entries) - MODEL_CACHE_MAX_ENTRIES
+    if excess <= 0:
+        return
+
+    # Workers that already mapped an evicted file keep a valid mapping
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in entries[:excess]:
+        try:
+            os.unlink(entry.path)
+        except OSError:
+            pass
+
+
+def preload(limit=None):
+    """
+    Attach the most recent shared entries into this process.
+
+    Called before forking workers so the mappings are inherited rather than
+    re-created in every worker.
+
+    Args:
+        limit: Maximum number of entries to attach (defaults to the cache size)
+
+    Returns:
+        Number of entries attached
+    """
+    if not SHARED_STORE_AVAILABLE or torch is None or not os.path.isdir(MODEL_CACHE_DIR):
+        return 0
+
+    entries = [
+        entry for entry in os.scandir(MODEL_CACHE_DIR)
+        if entry.name.endswith(ENTRY_SUFFIX)
+    ]
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+
+    attached = 0
+    for entry in reversed(entries[:limit or MODEL_CACHE_MAX_ENTRIES]):
+        if get_model(entry.name[:-len(ENTRY_SUFFIX)]) is not None:
+            attached += 1
+    return attached
+
+
+def get_store_stats():
+    """
+    Get model store statistics for this process.
+
+    Returns:
+        Dictionary with hit/miss counters and store configuration
+    """
+    lookups = _stats["local_hits"] + _stats["shared_hits"] + _stats["misses"]
+    hits = _stats["local_hits"] + _stats["shared_hits"]
+    return {
+        **_stats,
+        "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        "attached_models": len(_attached),
+        "shared": SHARED_STORE_AVAILABLE,
+        "directory": MODEL_CACHE_DIR,
+        "max_entries": MODEL_CACHE_MAX_ENTRIES,
+    }
@@ -0,0 +1,317 @@
+"""
+Local topic classifier for chatbot relevance checks.
+
+A logistic regression over hashed word and character n-grams that decides
+whether a message is about reproductive health. It runs in microseconds on
+the CPU, so /chat only needs the LLM classifier for messages it is unsure
+about.
+
+The default model is trained from examples seeded by HEALTH_RELATED_KEYWORDS
+and OFF_TOPIC_KEYWORDS. A model trained offline on additional labeled data
+can be saved with the CLI and loaded through TOPIC_CLASSIFIER_PATH:
+
+    python -m app.ml.topic_classifier --train labeled.jsonl --output topic.npz
+
+Labeled files are JSON lines: {"text": "...", "relevant": true}. Every run
+reports how a model does on real questions it was not trained on
+(HOLDOUT_PATH by default) at the configured thresholds; measure the false
+accept rate this way before lowering TOPIC_CLASSIFIER_RELEVANT_THRESHOLD:
+
+    python -m app.ml.topic_classifier --model topic.npz
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import zlib
+
+import numpy as np
+
+from app.config import (
+    TOPIC_CLASSIFIER_PATH,
+    TOPIC_CLASSIFIER_RELEVANT_THRESHOLD,
+    TOPIC_CLASSIFIER_IRRELEVANT_THRESHOLD,
+)
+from app.models.constants import HEALTH_RELATED_KEYWORDS, OFF_TOPIC_KEYWORDS
+
+N_FEATURES = 2 ** 18
+# Hand-written questions (including template look-alikes such as "what causes
+# inflation") that are never used for training
+HOLDOUT_PATH = os.path.join(os.path.dirname(__file__), "topic_holdout.jsonl")
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Every template is used with both labels, so the question wording carries
+# no signal and only the topic words do. Templates that only ever framed
+# health terms ("what causes {}") taught the model to accept any question
+# phrased that way ("what causes inflation").
+TEMPLATES = [
+    "what is {}",
+    "tell me about {}",
+    "can you explain {}",
+    "i have a question about {}",
+    "how does {} work",
+    "is {} normal",
+    "what causes {}",
+    "how do i manage {}",
+    "why do i have {}",
+    "is {} a sign of something serious",
+    "how long does {} last",
+    "what is the best {}",
+    "recommend a good {}",
+    "how do i get better at {}",
+    "latest news about {}",
+    "{}",
+]
+
+EXTRA_HEALTH_TERMS = [
+    "menopause", "perimenopause", "puberty", "ovary", "ovaries", "uterus", "cervix",
+    "vagina", "vaginal", "hpv", "pap smear", "breast", "libido", "hot flashes",
+    "fertile window", "egg", "sperm", "ivf", "implant", "gynecologist", "luteal phase",
+    "follicular phase", "basal body temperature", "missed period", "late period",
+    "heavy periods", "irregular periods", "thyroid", "hormonal acne", "morning sickness",
+]
+
+EXTRA_OFF_TOPIC_TERMS = [
+    "history", "capital city", "math", "physics", "car", "travel", "fashion",
+    "video game", "bitcoin", "chess", "homework", "translation", "poem", "joke",
+    "news", "president", "geography", "holiday", "phone", "smartphone", "job interview",
+    "marketing", "investing", "painting", "guitar", "netflix", "dinosaurs", "planets",
+]
+
+
+def _tokens(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def extract_features(text):
+    """
+    Hash word unigrams, bigrams and character 4-grams into feature indices.
+
+    Args:
+        text: Message text
+
+    Returns:
+        Array of unique feature indices
+    """
+    words = _tokens(text)
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f" {w} "
+        grams += [f"c:{padded[i:i + 4]}" for i in range(len(padded) - 3)]
+
+    return np.unique(np.fromiter(
+        (zlib.crc32(g.encode()) % N_FEATURES for g in grams),
+        dtype=np.int64,
+        count=len(grams),
+    ))
+
+
+def build_seed_examples():
+    """
+    Generate labeled examples from the chatbot keyword lists.
+
+    Returns:
+        Tuple of (texts, labels) where label 1 means relevant
+    """
+    texts, labels = [], []
+    for terms, label in (
+        (HEALTH_RELATED_KEYWORDS + EXTRA_HEALTH_TERMS, 1),
+        (OFF_TOPIC_KEYWORDS + EXTRA_OFF_TOPIC_TERMS, 0),
+    ):
+        for term in terms:
+            for template in TEMPLATES:
+                texts.append(template.format(term))
+                labels.append(label)
+    return texts, labels
+
+
+class HashedTopicClassifier:
+    """Logistic regression over hashed n-gram features."""
+
+    def __init__(self, weights=None, bias=0.0):
+        self.weights = weights if weights is not None else np.zeros(N_FEATURES, dtype=np.float32)
+        self.bias = float(bias)
+
+    def fit(self, texts, labels, epochs=300, learning_rate=50.0, l2=1e-4):
+        """
+        Train with full-batch gradient descent, balancing the two classes.
+
+        Args:
+            texts: Training messages
+            labels: 1 for relevant, 0 for irrelevant
+            epochs: Gradient descent iterations
+            learning_rate: Step size
+            l2: L2 regularization strength
+
+        Returns:
+            self
+        """
+        features = [extract_features(t) for t in texts]
+        lengths = np.array([len(f) for f in features])
+        indices = np.concatenate(features)
+        scales = np.repeat(1.0 / np.sqrt(np.maximum(lengths, 1)), lengths)
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        y = np.asarray(labels, dtype=np.float64)
+
+        # Weight each class to half of the total loss
+        positives = max(y.sum(), 1)
+        negatives = max(len(y) - y.sum(), 1)
+        sample_weights = np.where(y == 1, 0.5 / positives, 0.5 / negatives)
+
+        weights = np.zeros(N_FEATURES, dtype=np.float64)
+        bias = 0.0
+        for _ in range(epochs):
+            logits = np.add.reduceat(weights[indices] * scales, starts) + bias
+            residual = (1.0 / (1.0 + np.exp(-logits)) - y) * sample_weights
+
+            gradient = np.zeros(N_FEATURES)
+            np.add.at(gradient, indices, np.repeat(residual, lengths) * scales)
+            weights -= learning_rate * (gradient + l2 * weights)
+            bias -= learning_rate * residual.sum()
+
+        self.weights = weights.astype(np.float32)
+        self.bias = bias
+        return self
+
+    def predict_proba(self, text):
+        """
+        Probability that a message is about reproductive health.
+
+        Args:
+            text: Message text
+
+        Returns:
+            Probability in [0, 1]
+        """
+        indices = extract_features(text)
+        if len(indices) == 0:
+            return 0.5
+        logit = float(self.weights[indices].sum()) / np.sqrt(len(indices)) + self.bias
+        return 1.0 / (1.0 + np.exp(-logit))
+
+    def save(self, path):
+        """Save weights to a compressed .npz file."""
+        np.savez_compressed(path, weights=self.weights, bias=np.array([self.bias]))
+
+    @classmethod
+    def load(cls, path):
+        """Load weights saved with save()."""
+        data = np.load(path)
+        return cls(weights=data["weights"].astype(np.float32), bias=float(data["bias"][0]))
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_topic_classifier():
+    """
+    Get the process-wide classifier, loading or training it on first use.
+
+    Returns:
+        HashedTopicClassifier
+    """
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                if TOPIC_CLASSIFIER_PATH:
+                    _classifier = HashedTopicClassifier.load(TOPIC_CLASSIFIER_PATH)
+                else:
+                    _classifier = HashedTopicClassifier().fit(*build_seed_examples())
+    return _classifier
+
+
+def _read_labeled(path):
+    """Read a JSON lines file of {"text", "relevant"} records."""
+    texts, labels = [], []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                texts.append(record["text"])
+                labels.append(int(bool(record["relevant"])))
+    return texts, labels
+
+
+def evaluate(classifier, texts, labels, relevant_threshold, irrelevant_threshold):
+    """
+    Measure the decisions the classifier would make without the LLM.
+
+    Args:
+        classifier: Classifier to evaluate
+        texts: Held-out messages
+        labels: 1 for relevant, 0 for irrelevant
+        relevant_threshold: Probability at or above which a message is accepted
+        irrelevant_threshold: Probability at or below which a message is rejected
+
+    Returns:
+        Dict of rates: false_accept (irrelevant messages accepted),
+        false_reject (relevant messages rejected), and the share of each
+        class decided locally
+    """
+    probabilities = np.array([classifier.predict_proba(t) for t in texts])
+    relevant = np.asarray(labels, dtype=bool)
+    accepted = probabilities >= relevant_threshold
+    rejected = probabilities <= irrelevant_threshold
+
+    def rate(mask, among):
+        return float(mask[among].mean()) if among.any() else 0.0
+
+    return {
+        "false_accept": rate(accepted, ~relevant),
+        "false_reject": rate(rejected, relevant),
+        "relevant_decided": rate(accepted | rejected, relevant),
+        "irrelevant_decided": rate(accepted | rejected, ~relevant),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train or evaluate the local topic classifier.")
+    parser.add_argument("--train", nargs="*", default=[], help="Labeled JSON lines files")
+    parser.add_argument("--no-seed", action="store_true", help="Don't include keyword-seeded examples")
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--output", help="Where to write the trained .npz model")
+    parser.add_argument("--model", help="Evaluate this .npz model instead of training one")
+    parser.add_argument("--holdout", default=HOLDOUT_PATH, help="Labeled JSON lines file to evaluate on")
+    parser.add_argument("--relevant-threshold", type=float, default=TOPIC_CLASSIFIER_RELEVANT_THRESHOLD)
+    parser.add_argument("--irrelevant-threshold", type=float, default=TOPIC_CLASSIFIER_IRRELEVANT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.model:
+        classifier = HashedTopicClassifier.load(args.model)
+    else:
+        texts, labels = ([], []) if args.no_seed else build_seed_examples()
+        for path in args.train:
+            more_texts, more_labels = _read_labeled(path)
+            texts += more_texts
+            labels += more_labels
+
+        classifier = HashedTopicClassifier().fit(texts, labels, epochs=args.epochs)
+        predictions = np.array([classifier.predict_proba(t) >= 0.5 for t in texts])
+        accuracy = float((predictions == np.array(labels, dtype=bool)).mean())
+        print(f"Trained on {len(texts)} examples (training accuracy {accuracy:.1%})")
+        if args.output:
+            classifier.save(args.output)
+            print(f"Saved model to {args.output}")
+
+    holdout_texts, holdout_labels = _read_labeled(args.holdout)
+    rates = evaluate(
+        classifier, holdout_texts, holdout_labels, args.relevant_threshold, args.irrelevant_threshold
+    )
+    print(
+        f"Held-out ({len(holdout_texts)} messages) at accept >= {args.relevant_threshold}, "
+        f"reject <= {args.irrelevant_threshold}: "
+        f"false accepts {rates['false_accept']:.1%}, false rejects {rates['false_reject']:.1%}, "
+        f"decided locally {rates['relevant_decided']:.1%} of relevant and "
+        f"{rates['irrelevant_decided']:.1%} of irrelevant messages"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
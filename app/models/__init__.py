@@ -4,10 +4,13 @@ from .schemas import ChatRequest, ChatResponse, PredictionRequest, PredictionRes
 from .constants import (
     EMERGENCY_KEYWORDS,
     UNSAFE_KEYWORDS,
+    DIAGNOSIS_PHRASES,
     HEALTH_RELATED_KEYWORDS,
     OFF_TOPIC_KEYWORDS,
     SYSTEM_PROMPT,
     TOPIC_VALIDATION_PROMPT,
+    SESSION_SUMMARY_PROMPT,
+    KB_REFERENCE_PROMPT,
 )
 
 __all__ = [
@@ -17,8 +20,11 @@ __all__ = [
     "PredictionResponse",
     "EMERGENCY_KEYWORDS",
     "UNSAFE_KEYWORDS",
+    "DIAGNOSIS_PHRASES",
     "HEALTH_RELATED_KEYWORDS",
     "OFF_TOPIC_KEYWORDS",
     "SYSTEM_PROMPT",
     "TOPIC_VALIDATION_PROMPT",
+    "SESSION_SUMMARY_PROMPT",
+    "KB_REFERENCE_PROMPT",
 ]
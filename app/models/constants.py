@@ -19,6 +19,11 @@ UNSAFE_KEYWORDS = [
     "terminate pregnancy myself", "dangerous pills"
 ]
 
+# Phrases in AI responses that sound like a diagnosis or prescription
+DIAGNOSIS_PHRASES = [
+    "i diagnose", "you have", "you need to take"
+]
+
 # Health-related keywords for topic validation
 HEALTH_RELATED_KEYWORDS = [
     # Menstrual cycle
@@ -105,3 +110,19 @@ Respond with ONLY one word:
 Question: {message}
 
 Classification:"""
+
+SESSION_SUMMARY_PROMPT = """You maintain the running summary of a reproductive health education chat. Merge the new turns into the current summary.
+
+Keep the user's questions, stated circumstances (cycle details, symptoms, goals) and the key points already explained. Drop greetings and repetition. Write at most {max_words} words of plain text.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}
+
+Updated summary:"""
+
+KB_REFERENCE_PROMPT = """Vetted reference notes that may help with the user's next question. Base your answer on them where they are relevant and ignore them where they are not.
+
+{reference}"""
@@ -0,0 +1,165 @@
+"""
+Food composition data for meal planning.
+
+Approximate nutrient values per listed serving, rounded from standard food
+composition tables (USDA FoodData Central, Indian Food Composition Tables).
+Each food lists:
+- group: food group
+- meals: meal slots it suits (breakfast, lunch, dinner, snack)
+- tags: dietary tags; "vegetarian" means no meat, fish or eggs
+- phases: cycle phases it is recommended for (see PHASE_TIPS)
+- nutrients: values in the order of FOOD_NUTRIENTS
+"""
+
+# Order of each food's nutrient values
+FOOD_NUTRIENTS = ["calories", "protein", "carbs", "fats", "fiber", "iron", "calcium", "magnesium"]
+NUTRIENT_UNITS = {
+    "calories": "kcal", "protein": "g", "carbs": "g", "fats": "g",
+    "fiber": "g", "iron": "mg", "calcium": "mg", "magnesium": "mg",
+}
+
+# Daily intake goals for adult women, beyond the calorie and macro targets
+MICRONUTRIENT_TARGETS = {"fiber": 25, "iron": 18, "calcium": 1000, "magnesium": 310}
+
+MEAL_SLOTS = ["breakfast", "lunch", "dinner", "snack"]
+
+FOODS = [
+    # Grains
+    {"id": "oats", "name": "Rolled oats porridge", "group": "grain", "serving": "1 cup cooked (40 g dry)",
+     "meals": ["breakfast"], "tags": ["vegan", "vegetarian"], "phases": ["follicular"],
+     "nutrients": [150, 5, 27, 3, 4, 1.7, 20, 56]},
+    {"id": "ragi-porridge", "name": "Ragi (finger millet) porridge", "group": "grain", "serving": "1 cup cooked (30 g flour)",
+     "meals": ["breakfast"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": [],
+     "nutrients": [110, 2.2, 22, 0.4, 3.4, 1.2, 100, 40]},
+    {"id": "poha", "name": "Vegetable poha", "group": "grain", "serving": "1 plate (180 g)",
+     "meals": ["breakfast"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": [],
+     "nutrients": [250, 5, 44, 6, 3, 2.7, 20, 30]},
+    {"id": "idli", "name": "Idli", "group": "grain", "serving": "2 pieces",
+     "meals": ["breakfast"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": [],
+     "nutrients": [130, 4, 27, 0.4, 1.5, 0.6, 10, 15]},
+    {"id": "wholewheat-toast", "name": "Whole wheat toast", "group": "grain", "serving": "2 slices",
+     "meals": ["breakfast"], "tags": ["vegan", "vegetarian"], "phases": [],
+     "nutrients": [160, 8, 28, 2, 4, 1.8, 60, 46]},
+    {"id": "brown-rice", "name": "Brown rice", "group": "grain", "serving": "1 cup cooked",
+     "meals": ["lunch", "dinner"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": [],
+     "nutrients": [218, 4.5, 46, 1.6, 3.5, 0.8, 20, 86]},
+    {"id": "quinoa", "name": "Quinoa", "group": "grain", "serving": "1 cup cooked",
+     "meals": ["lunch", "dinner"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": ["follicular"],
+     "nutrients": [222, 8, 39, 3.6, 5.2, 2.8, 31, 118]},
+    {"id": "roti", "name": "Whole wheat roti", "group": "grain", "serving": "2 rotis (80 g)",
+     "meals": ["lunch", "dinner"], "tags": ["vegan", "vegetarian"], "phases": [],
+     "nutrients": [240, 8, 46, 3.4, 7.8, 2.4, 30, 74]},
+
+    # Legumes and soy
+    {"id": "lentil-dal", "name": "Lentil dal", "group": "legume", "serving": "1 cup cooked",
+     "meals": ["lunch", "dinner"], "tags": ["vegan", "vegetarian", "gluten_free", "iron_rich"], "phases": ["menstrual", "ovulation"],
+     "nutrients": [230, 18, 40, 0.8, 15.6, 6.6, 38, 71]},
+    {"id": "chana", "name": "Chickpea curry (chana)", "group": "legume", "serving": "1 cup",
+     "meals": ["lunch", "dinner"], "tags": ["vegan", "vegetarian", "gluten_free", "iron_rich"], "phases": ["menstrual"],
+     "nutrients": [270, 14.5, 45, 4.2, 12.5, 4.7, 80, 79]},
+    {"id": "rajma", "name": "Kidney bean curry (rajma)", "group": "legume", "serving": "1 cup",
+     "meals": ["lunch", "dinner"], "tags": ["vegan", "vegetarian", "gluten_free", "iron_rich"], "phases": ["menstrual"],
+     "nutrients": [225, 15, 40, 0.9, 13, 5.2, 50, 74]},
+    {"id": "tofu", "name": "Tofu", "group": "legume", "serving": "100 g (firm)",
+     "meals": ["lunch", "dinner"], "tags": ["vegan", "vegetarian", "gluten_free", "calcium_rich"], "phases": ["ovulation"],
+     "nutrients": [144, 17, 3, 8.7, 2.3, 2.7, 350, 58]},
+
+    # Dairy
+    {"id": "paneer", "name": "Paneer", "group": "dairy", "serving": "100 g",
+     "meals": ["lunch", "dinner"], "tags": ["vegetarian", "gluten_free", "calcium_rich"], "phases": ["ovulation"],
+     "nutrients": [265, 18, 1.2, 21, 0, 0.2, 208, 8]},
+    {"id": "yogurt", "name": "Plain yogurt (curd)", "group": "dairy", "serving": "1 cup (245 g)",
+     "meals": ["breakfast", "lunch", "snack"], "tags": ["vegetarian", "gluten_free", "calcium_rich"], "phases": ["follicular"],
+     "nutrients": [150, 8.5, 11.4, 8, 0, 0.1, 296, 29]},
+    {"id": "milk", "name": "Milk (toned)", "group": "dairy", "serving": "1 cup (240 ml)",
+     "meals": ["breakfast", "snack"], "tags": ["vegetarian", "gluten_free", "calcium_rich"], "phases": [],
+     "nutrients": [120, 8, 12, 4.8, 0, 0.1, 300, 27]},
+
+    # Eggs, meat and fish
+    {"id": "boiled-eggs", "name": "Boiled eggs", "group": "protein", "serving": "2 large eggs",
+     "meals": ["breakfast", "lunch", "dinner"], "tags": ["eggs", "gluten_free"], "phases": ["menstrual"],
+     "nutrients": [155, 13, 1.1, 11, 0, 1.2, 50, 10]},
+    {"id": "chicken-breast", "name": "Grilled chicken breast", "group": "protein", "serving": "100 g",
+     "meals": ["lunch", "dinner"], "tags": ["meat", "gluten_free"], "phases": ["ovulation"],
+     "nutrients": [165, 31, 0, 3.6, 0, 1, 15, 29]},
+    {"id": "salmon", "name": "Baked salmon", "group": "protein", "serving": "100 g",
+     "meals": ["lunch", "dinner"], "tags": ["fish", "gluten_free", "omega3_rich"], "phases": ["ovulation"],
+     "nutrients": [206, 22, 0, 12, 0, 0.3, 15, 30]},
+    {"id": "lean-red-meat", "name": "Lean mutton or beef", "group": "protein", "serving": "100 g",
+     "meals": ["lunch", "dinner"], "tags": ["meat", "gluten_free", "iron_rich"], "phases": ["menstrual"],
+     "nutrients": [250, 26, 0, 15, 0, 2.6, 18, 21]},
+
+    # Vegetables
+    {"id": "spinach", "name": "Sauteed spinach", "group": "vegetable", "serving": "1 cup cooked (180 g)",
+     "meals": ["lunch", "dinner"], "tags": ["vegan", "vegetarian", "gluten_free", "iron_rich"], "phases": ["menstrual", "ovulation"],
+     "nutrients": [41, 5.3, 6.8, 0.5, 4.3, 6.4, 245, 157]},
+    {"id": "beetroot", "name": "Beetroot", "group": "vegetable", "serving": "1 cup cooked (170 g)",
+     "meals": ["lunch", "dinner"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": ["menstrual"],
+     "nutrients": [75, 2.9, 17, 0.3, 3.4, 1.3, 27, 39]},
+    {"id": "leafy-salad", "name": "Mixed leafy greens salad", "group": "vegetable", "serving": "2 cups (85 g)",
+     "meals": ["lunch", "dinner"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": ["ovulation"],
+     "nutrients": [20, 1.8, 3.4, 0.3, 2, 1.2, 60, 25]},
+    {"id": "broccoli", "name": "Steamed broccoli", "group": "vegetable", "serving": "1 cup cooked",
+     "meals": ["lunch", "dinner"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": ["ovulation"],
+     "nutrients": [55, 3.7, 11, 0.6, 5.1, 1, 62, 33]},
+    {"id": "sweet-potato", "name": "Baked sweet potato", "group": "vegetable", "serving": "1 medium (150 g)",
+     "meals": ["lunch", "dinner"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": ["luteal"],
+     "nutrients": [135, 3, 31, 0.2, 5, 1, 57, 40]},
+    {"id": "vegetable-soup", "name": "Warm vegetable soup", "group": "vegetable", "serving": "1 bowl (250 ml)",
+     "meals": ["lunch", "dinner"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": ["menstrual"],
+     "nutrients": [100, 4, 16, 2, 4, 1.5, 40, 25]},
+    {"id": "mixed-sabzi", "name": "Mixed vegetable sabzi", "group": "vegetable", "serving": "1 cup",
+     "meals": ["lunch", "dinner"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": [],
+     "nutrients": [150, 4, 16, 8, 5, 1.5, 50, 35]},
+
+    # Fruit
+    {"id": "berries", "name": "Mixed berries", "group": "fruit", "serving": "1 cup (150 g)",
+     "meals": ["breakfast", "snack"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": ["follicular", "ovulation"],
+     "nutrients": [85, 1, 20, 0.5, 5, 0.6, 20, 20]},
+    {"id": "banana", "name": "Banana", "group": "fruit", "serving": "1 medium (118 g)",
+     "meals": ["breakfast", "snack"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": ["luteal"],
+     "nutrients": [105, 1.3, 27, 0.4, 3.1, 0.3, 6, 32]},
+    {"id": "dates", "name": "Dates", "group": "fruit", "serving": "4 dates (30 g)",
+     "meals": ["snack"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": ["menstrual"],
+     "nutrients": [85, 0.7, 22.5, 0.1, 2.4, 0.3, 19, 13]},
+    {"id": "orange", "name": "Orange", "group": "fruit", "serving": "1 medium",
+     "meals": ["breakfast", "snack"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": ["menstrual"],
+     "nutrients": [62, 1.2, 15.4, 0.2, 3.1, 0.1, 52, 13]},
+    {"id": "apple", "name": "Apple", "group": "fruit", "serving": "1 medium",
+     "meals": ["snack"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": [],
+     "nutrients": [95, 0.5, 25, 0.3, 4.4, 0.2, 11, 9]},
+    {"id": "avocado", "name": "Avocado", "group": "fruit", "serving": "1/2 fruit (100 g)",
+     "meals": ["breakfast", "lunch", "snack"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": ["follicular"],
+     "nutrients": [160, 2, 8.5, 14.7, 6.7, 0.6, 12, 29]},
+
+    # Nuts and seeds
+    {"id": "almonds", "name": "Almonds", "group": "nuts_seeds", "serving": "1 oz (28 g)",
+     "meals": ["snack"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": ["follicular", "luteal"],
+     "nutrients": [164, 6, 6, 14, 3.5, 1, 76, 77]},
+    {"id": "walnuts", "name": "Walnuts", "group": "nuts_seeds", "serving": "1 oz (28 g)",
+     "meals": ["snack"], "tags": ["vegan", "vegetarian", "gluten_free", "omega3_rich"], "phases": ["follicular"],
+     "nutrients": [185, 4.3, 3.9, 18.5, 1.9, 0.8, 28, 45]},
+    {"id": "pumpkin-seeds", "name": "Pumpkin seeds", "group": "nuts_seeds", "serving": "1 oz (28 g)",
+     "meals": ["snack"], "tags": ["vegan", "vegetarian", "gluten_free", "iron_rich"], "phases": ["menstrual", "luteal"],
+     "nutrients": [158, 8.5, 3, 14, 1.7, 2.5, 13, 156]},
+    {"id": "chia-seeds", "name": "Chia seeds", "group": "nuts_seeds", "serving": "1 tbsp (12 g)",
+     "meals": ["breakfast", "snack"], "tags": ["vegan", "vegetarian", "gluten_free", "omega3_rich"], "phases": ["follicular"],
+     "nutrients": [58, 2, 5, 3.7, 4.1, 0.9, 76, 40]},
+    {"id": "flax-seeds", "name": "Ground flax seeds", "group": "nuts_seeds", "serving": "1 tbsp (7 g)",
+     "meals": ["breakfast", "snack"], "tags": ["vegan", "vegetarian", "gluten_free", "omega3_rich"], "phases": ["follicular"],
+     "nutrients": [37, 1.3, 2, 3, 1.9, 0.4, 18, 27]},
+
+    # Sweets and drinks
+    {"id": "jaggery", "name": "Jaggery", "group": "sweet", "serving": "1 tbsp (20 g)",
+     "meals": ["snack"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": ["menstrual"],
+     "nutrients": [76, 0.1, 19.5, 0, 0, 2.2, 16, 14]},
+    {"id": "dark-chocolate", "name": "Dark chocolate (70-85%)", "group": "sweet", "serving": "1 oz (28 g)",
+     "meals": ["snack"], "tags": ["vegetarian", "gluten_free"], "phases": ["luteal"],
+     "nutrients": [170, 2.2, 13, 12, 3.1, 3.4, 20, 64]},
+    {"id": "green-tea", "name": "Green tea", "group": "beverage", "serving": "1 cup",
+     "meals": ["snack"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": ["luteal"],
+     "nutrients": [2, 0.5, 0, 0, 0, 0, 0, 2]},
+    {"id": "ginger-tea", "name": "Ginger tea", "group": "beverage", "serving": "1 cup",
+     "meals": ["snack"], "tags": ["vegan", "vegetarian", "gluten_free"], "phases": ["luteal"],
+     "nutrients": [5, 0.1, 1.2, 0, 0.1, 0.1, 3, 2]},
+]
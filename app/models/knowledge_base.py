@@ -0,0 +1,310 @@
+"""
+Curated answers to frequently asked reproductive health questions.
+
+Each entry lists the phrasings it should match and a vetted educational
+answer. Entries are served directly when a question matches them closely,
+and used as reference snippets for the LLM otherwise.
+"""
+
+KB_DISCLAIMER = "This is general educational information. For personalized medical advice, please consult a qualified healthcare provider."
+
+KNOWLEDGE_BASE = [
+    {
+        "id": "cycle-phases",
+        "questions": [
+            "What are the phases of the menstrual cycle?",
+            "What are the four phases of the cycle?",
+            "Explain the menstrual cycle phases",
+            "What happens during each phase of my cycle?",
+        ],
+        "answer": """The menstrual cycle is usually described in four phases:
+
+• **Menstrual phase (about days 1–5):** The uterine lining sheds, which is your period. Estrogen and progesterone are at their lowest.
+• **Follicular phase (day 1 to ovulation):** Follicle-stimulating hormone (FSH) helps follicles in the ovaries mature, and rising estrogen rebuilds the uterine lining.
+• **Ovulation (around day 14 of a 28-day cycle):** A surge of luteinizing hormone (LH) releases a mature egg from the ovary.
+• **Luteal phase (after ovulation until the next period):** The empty follicle becomes the corpus luteum and produces progesterone to prepare the lining for a possible pregnancy. If no pregnancy occurs, hormone levels fall and the next period starts.
+
+Phase lengths vary from person to person; the luteal phase is usually the most consistent at around 12–14 days.""",
+    },
+    {
+        "id": "ovulation",
+        "questions": [
+            "What is ovulation?",
+            "When does ovulation happen?",
+            "How do I know when I am ovulating?",
+            "Signs of ovulation",
+        ],
+        "answer": """Ovulation is when an ovary releases a mature egg, triggered by a surge of luteinizing hormone (LH). It usually happens about 12–16 days before the next period, so around day 14 in a 28-day cycle but later in longer cycles.
+
+Common signs include:
+• Clear, stretchy, "egg white" cervical mucus
+• A small rise in basal body temperature after ovulation
+• Mild one-sided pelvic pain (sometimes called mittelschmerz)
+• A positive result on an LH ovulation test
+
+The egg survives about 12–24 hours after release.""",
+    },
+    {
+        "id": "fertile-window",
+        "questions": [
+            "What is the fertile window?",
+            "When am I most fertile?",
+            "Which days can I get pregnant?",
+            "What days of my cycle am I fertile?",
+        ],
+        "answer": """The fertile window is the roughly six days of the cycle when intercourse can lead to pregnancy: the five days before ovulation and the day of ovulation itself. Sperm can survive up to about five days in the reproductive tract, while the egg lives about 12–24 hours.
+
+The most fertile days are the two or three days leading up to and including ovulation. Because ovulation timing shifts from cycle to cycle, tracking cervical mucus, basal body temperature or LH tests gives a better estimate than counting days alone.""",
+    },
+    {
+        "id": "normal-cycle-length",
+        "questions": [
+            "What is a normal cycle length?",
+            "How long is a normal menstrual cycle?",
+            "Is a 35 day cycle normal?",
+            "How many days should my cycle be?",
+        ],
+        "answer": """In adults, a cycle is counted from the first day of one period to the first day of the next, and anything from about 21 to 35 days is considered typical. Teens often have cycles from 21 to 45 days while their hormones settle.
+
+It is also normal for cycle length to vary by a few days from month to month. A period itself usually lasts 2–7 days.
+
+Consider talking to a healthcare provider if your cycles are regularly shorter than 21 or longer than 35 days, suddenly change, or vary by more than about a week from one cycle to the next.""",
+    },
+    {
+        "id": "irregular-periods",
+        "questions": [
+            "Why are my periods irregular?",
+            "What causes irregular periods?",
+            "Why is my period late?",
+            "Why did I miss my period?",
+        ],
+        "answer": """Periods can become irregular or late for many reasons, including:
+
+• Pregnancy
+• Stress, illness or changes in sleep
+• Significant weight change, intense exercise or under-eating
+• Polycystic ovary syndrome (PCOS)
+• Thyroid conditions or high prolactin
+• Starting or stopping hormonal contraception
+• Breastfeeding
+• Perimenopause
+
+An occasional late period is common. If you could be pregnant, a pregnancy test is a good first step. See a healthcare provider if you miss three periods in a row, your cycles are consistently irregular, or irregular cycles come with other symptoms like excess hair growth, acne or pelvic pain.""",
+    },
+    {
+        "id": "pcos",
+        "questions": [
+            "What is PCOS?",
+            "What is polycystic ovary syndrome?",
+            "What are the symptoms of PCOS?",
+            "Explain PCOS",
+        ],
+        "answer": """Polycystic ovary syndrome (PCOS) is a common hormonal condition affecting roughly 1 in 10 people with ovaries. It is usually diagnosed when at least two of these are present:
+
+• Irregular or absent ovulation, often seen as irregular periods
+• Signs of higher androgens, such as excess facial or body hair, acne or scalp hair thinning
+• Many small follicles on the ovaries on an ultrasound
+
+PCOS is often linked with insulin resistance and can affect fertility, weight and long-term metabolic health. It is manageable: lifestyle changes, and treatments a doctor can discuss, help regulate cycles and symptoms.
+
+Only a healthcare provider can diagnose PCOS, typically with a history, exam, blood tests and sometimes an ultrasound.""",
+    },
+    {
+        "id": "endometriosis",
+        "questions": [
+            "What is endometriosis?",
+            "What are the symptoms of endometriosis?",
+            "Explain endometriosis",
+        ],
+        "answer": """Endometriosis is a condition where tissue similar to the uterine lining grows outside the uterus, for example on the ovaries, fallopian tubes or pelvic lining. It affects roughly 1 in 10 people with a uterus of reproductive age.
+
+Common symptoms include:
+• Painful periods that get in the way of daily life
+• Pelvic pain outside of periods
+• Pain during or after sex
+• Painful bowel movements or urination during periods
+• Difficulty getting pregnant
+
+Symptoms vary widely and diagnosis often takes time. If period pain regularly stops you from doing normal activities, it is worth discussing with a healthcare provider.""",
+    },
+    {
+        "id": "period-cramps",
+        "questions": [
+            "Why do I get period cramps?",
+            "How can I relieve period cramps?",
+            "What helps with menstrual cramps?",
+            "Is it normal to have painful periods?",
+        ],
+        "answer": """Period cramps are caused by prostaglandins, chemicals that make the uterus contract to shed its lining. Mild to moderate cramping in the first days of a period is common.
+
+General ways people ease cramps:
+• Heat on the lower abdomen or back, or a warm bath
+• Gentle movement such as walking, stretching or yoga
+• Rest, hydration and regular meals
+• Over-the-counter pain relief, used as directed on the label and if it is safe for you
+
+Pain that is severe, keeps you from usual activities, is getting worse, or happens outside your period can be a sign of conditions like endometriosis or fibroids and should be checked by a healthcare provider.""",
+    },
+    {
+        "id": "pms",
+        "questions": [
+            "What is PMS?",
+            "What are the symptoms of premenstrual syndrome?",
+            "Why do I feel moody before my period?",
+            "What is PMDD?",
+        ],
+        "answer": """Premenstrual syndrome (PMS) is a group of physical and emotional symptoms in the luteal phase, the one to two weeks before a period, that ease once bleeding starts. It is linked to the rise and fall of estrogen and progesterone.
+
+Common symptoms include mood changes, irritability, bloating, breast tenderness, fatigue, food cravings and headaches.
+
+Premenstrual dysphoric disorder (PMDD) is a more severe form where mood symptoms such as depression, anxiety or anger seriously affect daily life and relationships.
+
+Regular exercise, sleep and balanced meals help many people. If symptoms disrupt your life, a healthcare provider can discuss further options.""",
+    },
+    {
+        "id": "tampon-vs-cup",
+        "questions": [
+            "Tampon vs menstrual cup",
+            "Should I use a tampon or a menstrual cup?",
+            "What is the difference between tampons and menstrual cups?",
+            "Are menstrual cups better than tampons?",
+        ],
+        "answer": """Both tampons and menstrual cups are worn inside the vagina; the right choice depends on comfort, budget and lifestyle.
+
+**Tampons**
+• Absorb blood; single use and widely available
+• Should be changed every 4–8 hours and used at the lowest absorbency you need
+• Carry a small risk of toxic shock syndrome (TSS) if left in too long
+
+**Menstrual cups**
+• Collect rather than absorb blood; made of medical-grade silicone or rubber
+• Can be worn up to about 12 hours depending on flow, then emptied, rinsed and reinserted
+• Reusable for years, so cheaper and less waste over time
+• Take some practice to insert and remove, and need to be sterilized between cycles
+
+With either product, remove it promptly and seek care urgently if you develop a sudden high fever, rash, vomiting or dizziness.""",
+    },
+    {
+        "id": "period-products",
+        "questions": [
+            "What period products are there?",
+            "What are the options for menstrual products?",
+            "Pads vs period underwear",
+        ],
+        "answer": """Common period products include:
+
+• **Pads:** Stick to underwear and absorb blood; easy to use and good for overnight. Change every 4–8 hours.
+• **Tampons:** Worn inside the vagina; change every 4–8 hours and use the lowest absorbency needed.
+• **Menstrual cups and discs:** Reusable or disposable collectors worn inside the vagina for up to about 12 hours.
+• **Period underwear:** Washable underwear with absorbent layers, used alone on light days or as backup.
+• **Reusable cloth pads:** Washable alternative to disposable pads.
+
+Many people combine products depending on flow, activity and time of day.""",
+    },
+    {
+        "id": "heavy-bleeding",
+        "questions": [
+            "How much bleeding is too much during a period?",
+            "What counts as a heavy period?",
+            "Is my period too heavy?",
+        ],
+        "answer": """A period is generally considered heavy if you:
+
+• Soak through a pad or tampon every hour for several hours in a row
+• Need to double up products or change them during the night
+• Pass blood clots larger than about a coin
+• Bleed for more than 7 days
+• Feel tired, short of breath or dizzy, which can be signs of anemia
+
+Heavy bleeding can have causes such as fibroids, polyps, hormonal imbalances, thyroid conditions or bleeding disorders, so it is worth checking with a healthcare provider. If you are soaking through products every hour and feel faint, seek medical care promptly.""",
+    },
+    {
+        "id": "spotting",
+        "questions": [
+            "What is spotting between periods?",
+            "Why am I spotting?",
+            "Is spotting normal?",
+        ],
+        "answer": """Spotting is light bleeding outside of a regular period, often just a few drops of pink or brown blood. Common, usually harmless causes include ovulation, starting or missing doses of hormonal contraception, early pregnancy (implantation bleeding) and the hormonal shifts of perimenopause.
+
+Spotting can also come from infections, polyps, fibroids or other conditions. See a healthcare provider if spotting is frequent, happens after sex, occurs after menopause, or comes with pain or unusual discharge.""",
+    },
+    {
+        "id": "early-pregnancy-signs",
+        "questions": [
+            "What are the early signs of pregnancy?",
+            "How do I know if I am pregnant?",
+            "When should I take a pregnancy test?",
+        ],
+        "answer": """Early signs of pregnancy can include:
+
+• A missed period
+• Breast tenderness or swelling
+• Nausea, with or without vomiting
+• Fatigue
+• Needing to urinate more often
+• Light spotting around the time of implantation
+
+These can also be caused by other things, so a pregnancy test is the reliable way to know. Home tests detect the hormone hCG and are most accurate from the first day of a missed period; testing earlier can give a false negative. If a test is positive, contact a healthcare provider to start prenatal care.""",
+    },
+    {
+        "id": "menopause",
+        "questions": [
+            "What is menopause?",
+            "What is perimenopause?",
+            "What are the symptoms of menopause?",
+            "At what age does menopause start?",
+        ],
+        "answer": """Menopause is the point when periods have stopped for 12 months in a row because the ovaries have stopped releasing eggs. It most often happens between ages 45 and 55, with an average around 51.
+
+Perimenopause is the transition leading up to it, often lasting several years. Hormone levels fluctuate, and common experiences include:
+• Irregular periods
+• Hot flashes and night sweats
+• Sleep problems
+• Mood changes
+• Vaginal dryness
+
+Pregnancy is still possible during perimenopause. A healthcare provider can talk through ways to manage symptoms if they affect your quality of life.""",
+    },
+    {
+        "id": "thyroid-and-cycle",
+        "questions": [
+            "How does the thyroid affect periods?",
+            "Can thyroid problems affect my menstrual cycle?",
+            "Hypothyroidism and periods",
+        ],
+        "answer": """Thyroid hormones influence the hormones that control ovulation, so thyroid conditions can change your cycle:
+
+• **Hypothyroidism (underactive thyroid)** is often linked with heavier or more frequent periods, and can sometimes cause irregular or missed periods.
+• **Hyperthyroidism (overactive thyroid)** is often linked with lighter or less frequent periods.
+
+Both can affect fertility. Other thyroid symptoms include changes in weight, energy, temperature tolerance and hair or skin. A simple blood test can check thyroid function, so mention cycle changes to your healthcare provider.""",
+    },
+    {
+        "id": "discharge",
+        "questions": [
+            "Is vaginal discharge normal?",
+            "What does normal discharge look like?",
+            "Why does my discharge change during my cycle?",
+        ],
+        "answer": """Vaginal discharge is normal and helps keep the vagina clean and healthy. Its amount and texture change through the cycle:
+
+• After a period it is often dry or sticky
+• Approaching ovulation it becomes wetter, clear and stretchy like raw egg white
+• After ovulation it turns thicker and cloudier
+
+Discharge that has a strong or fishy smell, is green, gray or cottage-cheese-like, or comes with itching, burning or pain may be a sign of an infection and should be checked by a healthcare provider.""",
+    },
+]
+
+# Messages with the kind of match they must get ("direct", "snippet" or None)
+# and the expected entry. Run `python -m app.services.knowledge_base` after
+# editing entries or thresholds.
+KB_PROBES = [
+    ("What are the phases of the menstrual cycle?", "direct", "cycle-phases"),
+    ("What is PCOS?", "direct", "pcos"),
+    ("What causes irregular periods?", "direct", "irregular-periods"),
+    # Close overlap with a known question, but asks about something the
+    # vetted answer doesn't cover
+    ("What are the phases of the menstrual cycle during menopause?", "snippet", "cycle-phases"),
+]
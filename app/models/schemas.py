@@ -3,19 +3,29 @@ Pydantic models for request and response validation.
 """
 
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
 class ChatRequest(BaseModel):
     """Request model for chatbot interaction."""
     message: str
+    bypass_cache: Optional[bool] = Field(
+        default=False,
+        description="Skip the response cache and always generate a fresh answer"
+    )
+    session_id: Optional[str] = Field(
+        default=None,
+        description="Session from POST /chat/sessions; earlier turns are used as context"
+    )
 
 
 class ChatResponse(BaseModel):
     """Response model for chatbot interaction."""
     response: str
     safety_triggered: Optional[bool] = False
+    cached: Optional[bool] = False
+    session_id: Optional[str] = None
 
 
 class PredictionRequest(BaseModel):
@@ -357,3 +367,101 @@ class NutritionAlert(BaseModel):
     recommendation: str = Field(..., description="What to do")
 
 
+
+class DietType(str, Enum):
+    ANY = "any"
+    PESCATARIAN = "pescatarian"
+    EGGETARIAN = "eggetarian"
+    VEGETARIAN = "vegetarian"
+    VEGAN = "vegan"
+
+class FoodItem(BaseModel):
+    """A food in the local composition database."""
+    id: str = Field(..., description="Food id")
+    name: str = Field(..., description="Food name")
+    group: str = Field(..., description="Food group (e.g., legume, dairy)")
+    serving: str = Field(..., description="Serving the nutrient values refer to")
+    meals: List[str] = Field(..., description="Meal slots the food suits")
+    tags: List[str] = Field(..., description="Dietary tags (e.g., vegan, iron_rich)")
+    phases: List[CyclePhase] = Field(..., description="Cycle phases the food is recommended for")
+    nutrients: Dict[str, float] = Field(..., description="Nutrients per serving (kcal, g or mg)")
+
+class MealPlanRequest(BaseModel):
+    """Request model for generating a daily meal plan."""
+    profile: NutritionProfileRequest = Field(..., description="Profile the calorie and macro targets are calculated for")
+    cycle_day: Optional[int] = Field(None, ge=1, description="Current day of the cycle; favors foods for its phase")
+    cycle_length: int = Field(28, ge=20, le=45, description="Average cycle length")
+    diet: DietType = Field(DietType.ANY, description="Dietary pattern")
+    gluten_free: bool = Field(False, description="Only gluten-free foods")
+    exclude_foods: List[str] = Field(default_factory=list, description="Food ids to leave out")
+
+class MealPlanItem(BaseModel):
+    """One food in a meal."""
+    food_id: str = Field(..., description="Food id")
+    name: str = Field(..., description="Food name")
+    servings: float = Field(..., description="Number of servings (in half servings)")
+    serving_size: str = Field(..., description="Size of one serving")
+    nutrients: Dict[str, float] = Field(..., description="Nutrients for the given servings")
+
+class Meal(BaseModel):
+    """A meal of the daily plan."""
+    name: str = Field(..., description="breakfast, lunch, dinner or snack")
+    items: List[MealPlanItem] = Field(..., description="Foods in the meal")
+    calories: float = Field(..., description="Calories of the meal")
+
+class MealPlanResponse(BaseModel):
+    """Response model for a generated daily meal plan."""
+    phase: Optional[CyclePhase] = Field(None, description="Cycle phase the plan was made for")
+    targets: Dict[str, float] = Field(..., description="Daily nutrient targets")
+    totals: Dict[str, float] = Field(..., description="Daily nutrient totals of the plan")
+    meals: List[Meal] = Field(..., description="Meals of the day")
+    phase_foods: List[str] = Field(..., description="Included foods recommended for the phase")
+
+class PhaseCalendarRequest(BaseModel):
+    """Request model for a multi-day cycle phase calendar."""
+    period_start: str = Field(..., description="First day of the current or last period (YYYY-MM-DD)", example="2025-01-15")
+    from_date: Optional[str] = Field(None, description="First calendar date (YYYY-MM-DD); defaults to period_start")
+    days: int = Field(30, ge=1, le=180, description="Number of calendar days")
+    cycle_length: Optional[int] = Field(None, ge=20, le=45, description="Average cycle length; defaults to 28")
+    past_cycles: Optional[List[int]] = Field(
+        None,
+        description="Past cycle lengths; when given without cycle_length, the predicted next cycle length is used"
+    )
+
+    @field_validator('past_cycles')
+    @classmethod
+    def validate_cycles(cls, v):
+        """Validate cycle lengths are reasonable."""
+        if v is None:
+            return v
+        if len(v) < 4:
+            raise ValueError('Need at least 4 past cycles for prediction')
+        if any(c < 20 or c > 45 for c in v):
+            raise ValueError('Cycle lengths must be between 20 and 45 days')
+        return v
+
+    @field_validator('period_start', 'from_date')
+    @classmethod
+    def validate_date(cls, v):
+        """Validate date format."""
+        if v is None:
+            return v
+        try:
+            datetime.strptime(v, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError('Date must be in YYYY-MM-DD format')
+        return v
+
+class CalendarDay(BaseModel):
+    """One day of the phase calendar."""
+    date: str = Field(..., description="Date (YYYY-MM-DD)")
+    cycle_day: int = Field(..., description="Day of the cycle (1 = period start)")
+    phase: CyclePhase = Field(..., description="Menstrual phase on that day")
+    tip: int = Field(..., description="Index of the day's nutrition tip in `tips`")
+
+class PhaseCalendarResponse(BaseModel):
+    """Response model for a multi-day cycle phase calendar."""
+    cycle_length: int = Field(..., description="Cycle length the calendar was computed with")
+    predicted: bool = Field(..., description="Whether cycle_length was predicted from past cycles")
+    days: List[CalendarDay] = Field(..., description="Calendar days in date order")
+    tips: List[DailyNutritionTip] = Field(..., description="Distinct nutrition tips referenced by the days")
@@ -2,23 +2,248 @@
 Chatbot API endpoints.
 """
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+from typing import Dict, List, Optional, Tuple
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
+from app.config import CHAT_MODE, CHAT_CACHE_ENABLED, KB_ENABLED
 from app.models.schemas import ChatRequest, ChatResponse
-from app.services.chatbot import get_ai_response, get_safety_response
-from app.utils.safety import is_obviously_off_topic, validate_topic_with_ai
-from app.utils.logging import log_request, log_response, log_error
+from app.services.chatbot import get_ai_response, get_safety_response, stream_ai_response
+from app.services.chat_cache import chat_response_cache
+from app.services.chat_sessions import ChatSession, chat_sessions
+from app.services.knowledge_base import knowledge_base
+from app.utils.safety import is_obviously_off_topic, validate_topic_with_ai, topic_decision_stats, topic_memo
+from app.llm.resilience import LLMUnavailableError, get_resilience_stats
+from app.llm.usage import start_usage_scope, total_tokens, record_chat_mode, get_chat_mode_stats, summarize_usage
+from app.utils.logging import log_request, log_response, log_error, log_info
+from app.utils.metrics import describe, get_counter, inc_counter, observe
 import time
 
 router = APIRouter(prefix="/chat", tags=["Chatbot"])
 
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000)
+COST_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005)
+
+describe("chat_request_llm_tokens", "LLM tokens (prompt + completion) spent per chat request")
+describe("chat_request_llm_cost_usd", "Estimated LLM spend per chat request")
+describe("chat_llm_fallbacks_total", "Chat answers served by a fallback while the LLM was unavailable")
+describe("kb_lookups_total", "Knowledge-base lookups by result (direct answer, reference snippet or miss)")
+
+OFF_TOPIC_RESPONSE = """I'm a specialized reproductive health education assistant. I can only answer questions related to:
+
+• Menstrual cycles and periods
+• Pregnancy and fertility
+• Reproductive health and anatomy
+• Hormones and women's health
+• Gynecological conditions (PCOS, endometriosis, etc.)
+
+Your question appears to be about a different topic. Please ask me about reproductive health, and I'll be happy to help! 😊"""
+
+OFF_TOPIC_AI_RESPONSE = """I'm a specialized reproductive health education assistant. I can only answer questions related to:
+
+• Menstrual cycles and periods
+• Pregnancy and fertility
+• Reproductive health and anatomy
+• Hormones and women's health
+• Gynecological conditions (PCOS, endometriosis, etc.)
+
+Your question doesn't seem to be related to reproductive health. If you have questions about periods, pregnancy, fertility, or women's health, I'm here to help! 😊"""
+
+LLM_UNAVAILABLE_RESPONSE = """I'm having trouble reaching my knowledge service right now, so I can't answer this question at the moment. Please try again in a minute.
+
+If this is urgent or you're worried about your health, please contact a healthcare provider."""
+
+
+def _screen_message(message: str) -> Optional[Tuple[str, ChatResponse]]:
+    """
+    Validate a message and run the checks that don't need the LLM.
+    
+    Returns:
+        Tuple of (log status, response) when the message is answered by a
+        safety or off-topic response, None when it should go to the LLM
+        
+    Raises:
+        HTTPException: If the message is empty or too long
+    """
+    if not message or len(message.strip()) == 0:
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+    
+    if len(message) > 1000:
+        raise HTTPException(status_code=400, detail="Message too long (max 1000 characters)")
+    
+    # Check for safety triggers first
+    safety_response = get_safety_response(message)
+    if safety_response:
+        return "safety_triggered", ChatResponse(
+            response=safety_response,
+            safety_triggered=True
+        )
+    
+    # Validate topic relevance - Two-layer approach
+    # Layer 1: Quick keyword-based check
+    if is_obviously_off_topic(message):
+        return "off_topic", ChatResponse(
+            response=OFF_TOPIC_RESPONSE,
+            safety_triggered=False
+        )
+    
+    return None
+
+
+def _record_llm_summary(endpoint: str, mode: str, usage: dict, duration_ms: float, **extra):
+    """Aggregate a finished request's LLM usage and log its per-request summary."""
+    record_chat_mode(mode, usage, duration_ms, **extra)
+    summary = summarize_usage(usage)
+    observe("chat_request_llm_tokens", summary["prompt_tokens"] + summary["completion_tokens"], TOKEN_BUCKETS, mode=mode)
+    observe("chat_request_llm_cost_usd", summary["cost_usd"], COST_BUCKETS, mode=mode)
+    log_info(f"{endpoint} LLM usage - " + ", ".join(f"{k}: {v}" for k, v in summary.items()))
+
+
+def _llm_fallback(
+    endpoint: str,
+    message: str,
+    error: LLMUnavailableError,
+    start_time: float,
+    in_session: bool = False,
+) -> ChatResponse:
+    """
+    Answer without the LLM: a cached answer to the same or a similar
+    question if there is one, otherwise a canned "try later" message.
+
+    Cached answers ignore the conversation, so session messages always get
+    the canned message. Neither is recorded in the session.
+    """
+    cached = chat_response_cache.get(message) if CHAT_CACHE_ENABLED and not in_session else None
+    kind = "cache" if cached else "canned"
+    inc_counter("chat_llm_fallbacks_total", kind=kind)
+    log_response(endpoint, f"llm_unavailable_{kind}: {error}", (time.time() - start_time) * 1000)
+    if cached:
+        return ChatResponse(response=cached[0], safety_triggered=False, cached=True)
+    return ChatResponse(response=LLM_UNAVAILABLE_RESPONSE, safety_triggered=False)
+
+
+def _get_session(session_id: Optional[str]) -> Optional[ChatSession]:
+    """
+    Resolve the session a request belongs to.
+    
+    Raises:
+        HTTPException: If the session doesn't exist or has expired
+    """
+    if session_id is None:
+        return None
+    session = chat_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired. Start a new one at POST /chat/sessions")
+    return session
+
+
+def _kb_lookup(message: str, session: Optional[ChatSession]) -> Optional[dict]:
+    """
+    Match a message against the local knowledge base.
+    
+    Direct answers ignore the conversation, so after a session's first turn
+    a direct match is only passed to the LLM as reference notes.
+    
+    Returns:
+        The knowledge-base match (see KnowledgeBase.search), or None
+    """
+    if not KB_ENABLED:
+        return None
+    match = knowledge_base.search(message)
+    if match and match["kind"] == "direct" and session and session.turn_count:
+        match = {**match, "kind": "snippet", "snippet": match["answer"]}
+    inc_counter("kb_lookups_total", result=match["kind"] if match else "miss")
+    return match
+
+
+def _session_history(session: Optional[ChatSession]) -> Optional[List[Dict[str, str]]]:
+    """Prior conversation to send with the next message, if any."""
+    return session.context_messages() if session else None
+
+
+async def _answer_sequential(message: str, history: Optional[List[Dict[str, str]]] = None):
+    """
+    Classify the message, then generate an answer only if it is relevant.
+    
+    Returns:
+        Tuple of (answer or None if off-topic, wasted_tokens, cancelled_calls)
+    """
+    if not await validate_topic_with_ai(message):
+        return None, 0, 0
+    return await get_ai_response(message, history), 0, 0
+
+
+async def _answer_speculative(message: str, usage: dict, history: Optional[List[Dict[str, str]]] = None):
+    """
+    Run topic classification and answer generation concurrently.
+    
+    If the classifier rejects the message, the answer is cancelled when still
+    running, or discarded (and its tokens counted as wasted) when done.
+    
+    Returns:
+        Tuple of (answer or None if off-topic, wasted_tokens, cancelled_calls)
+    """
+    answer_task = asyncio.create_task(get_ai_response(message, history))
+    
+    try:
+        relevant = await validate_topic_with_ai(message)
+    except BaseException:
+        answer_task.cancel()
+        raise
+    
+    if relevant:
+        return await answer_task, 0, 0
+    
+    if not answer_task.done():
+        answer_task.cancel()
+        try:
+            await answer_task
+        except (asyncio.CancelledError, Exception):
+            pass
+        return None, 0, 1
+    
+    # The answer finished first; retrieve any error so it isn't reported as unhandled
+    if not answer_task.cancelled():
+        answer_task.exception()
+    return None, total_tokens(usage, "answer"), 0
+
+
+@router.post("/sessions")
+async def create_session():
+    """
+    Start a multi-turn chat session.
+    
+    Pass the returned `session_id` with /chat or /chat/stream requests to have
+    earlier turns used as context. Sessions expire after a period of inactivity.
+    """
+    session = chat_sessions.create()
+    return {"session_id": session.session_id}
+
+
+@router.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """
+    End a multi-turn chat session and discard its history.
+
+    Raises:
+        HTTPException: If the session doesn't exist or has expired
+    """
+    if not chat_sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return {"deleted": True}
+
 
 @router.post("", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, background_tasks: BackgroundTasks):
     """
     Chat with the reproductive health education assistant.
     
     - **message**: Your question or message to the chatbot
+    - **bypass_cache**: Skip cached answers and generate a fresh one
+    - **session_id**: Continue a conversation started at POST /chat/sessions
     
     Returns educational information about reproductive health topics.
     """
@@ -27,71 +252,233 @@ async def chat(request: ChatRequest):
     try:
         log_request("/chat", "POST", request.message)
         
-        if not request.message or len(request.message.strip()) == 0:
-            raise HTTPException(status_code=400, detail="Message cannot be empty")
-        
-        if len(request.message) > 1000:
-            raise HTTPException(status_code=400, detail="Message too long (max 1000 characters)")
+        session = _get_session(request.session_id)
         
-        # Check for safety triggers first
-        safety_response = get_safety_response(request.message)
-        
-        if safety_response:
+        screened = _screen_message(request.message)
+        if screened:
+            status, screened_response = screened
             duration = (time.time() - start_time) * 1000
-            log_response("/chat", "safety_triggered", duration)
-            return ChatResponse(
-                response=safety_response,
-                safety_triggered=True
-            )
+            log_response("/chat", status, duration)
+            screened_response.session_id = request.session_id
+            return screened_response
         
-        # Validate topic relevance - Two-layer approach
-        # Layer 1: Quick keyword-based check
-        if is_obviously_off_topic(request.message):
+        # Vetted answers to known questions need no LLM call at all
+        kb_match = _kb_lookup(request.message, session)
+        if kb_match and kb_match["kind"] == "direct":
             duration = (time.time() - start_time) * 1000
-            log_response("/chat", "off_topic", duration)
+            log_response("/chat", f"kb_direct_{kb_match['entry_id']}", duration)
+            if session:
+                chat_sessions.add_turn(session, request.message, kb_match["answer"])
             return ChatResponse(
-                response="""I'm a specialized reproductive health education assistant. I can only answer questions related to:
-
-• Menstrual cycles and periods
-• Pregnancy and fertility
-• Reproductive health and anatomy
-• Hormones and women's health
-• Gynecological conditions (PCOS, endometriosis, etc.)
-
-Your question appears to be about a different topic. Please ask me about reproductive health, and I'll be happy to help! 😊""",
-                safety_triggered=False
+                response=kb_match["answer"],
+                safety_triggered=False,
+                session_id=request.session_id
             )
         
-        # Layer 2: AI-powered validation for ambiguous cases
-        if not validate_topic_with_ai(request.message):
-            duration = (time.time() - start_time) * 1000
+        # Reuse answers to equal or near-duplicate questions. Only answers that
+        # passed every check above are ever stored, so safety responses never are.
+        # Follow-ups in a session depend on context, so only its first turn is cached.
+        cacheable = CHAT_CACHE_ENABLED and not (session and session.turn_count)
+        if cacheable and not request.bypass_cache:
+            cached = chat_response_cache.get(request.message)
+            if cached:
+                cached_response, match = cached
+                duration = (time.time() - start_time) * 1000
+                log_response("/chat", f"cache_{match}", duration)
+                if session:
+                    chat_sessions.add_turn(session, request.message, cached_response)
+                return ChatResponse(
+                    response=cached_response,
+                    safety_triggered=False,
+                    cached=True,
+                    session_id=request.session_id
+                )
+        
+        # Layer 2: AI-powered validation for ambiguous cases, then the answer
+        usage = start_usage_scope()
+        history = _session_history(session)
+        if kb_match:
+            # A knowledge-base match already shows the message is on topic
+            mode = "kb_snippet"
+            ai_response = await get_ai_response(request.message, history, kb_match["snippet"])
+            wasted_tokens, cancelled = 0, 0
+        elif CHAT_MODE == "speculative":
+            mode = "speculative"
+            ai_response, wasted_tokens, cancelled = await _answer_speculative(request.message, usage, history)
+        else:
+            mode = "sequential"
+            ai_response, wasted_tokens, cancelled = await _answer_sequential(request.message, history)
+        
+        duration = (time.time() - start_time) * 1000
+        _record_llm_summary("/chat", mode, usage, duration, wasted_tokens=wasted_tokens, cancelled_calls=cancelled)
+        
+        if ai_response is None:
             log_response("/chat", "off_topic_ai", duration)
             return ChatResponse(
-                response="""I'm a specialized reproductive health education assistant. I can only answer questions related to:
-
-• Menstrual cycles and periods
-• Pregnancy and fertility
-• Reproductive health and anatomy
-• Hormones and women's health
-• Gynecological conditions (PCOS, endometriosis, etc.)
-
-Your question doesn't seem to be related to reproductive health. If you have questions about periods, pregnancy, fertility, or women's health, I'm here to help! 😊""",
-                safety_triggered=False
+                response=OFF_TOPIC_AI_RESPONSE,
+                safety_triggered=False,
+                session_id=request.session_id
             )
         
-        # Get AI response for valid health-related questions
-        ai_response = get_ai_response(request.message)
-        
-        duration = (time.time() - start_time) * 1000
         log_response("/chat", "success", duration)
         
+        if cacheable:
+            chat_response_cache.put(request.message, ai_response)
+        
+        if session:
+            chat_sessions.add_turn(session, request.message, ai_response)
+            # Summarize old turns after the response is sent
+            background_tasks.add_task(chat_sessions.compact, session)
+        
         return ChatResponse(
             response=ai_response,
-            safety_triggered=False
+            safety_triggered=False,
+            session_id=request.session_id
         )
     
+    except LLMUnavailableError as e:
+        fallback = _llm_fallback("/chat", request.message, e, start_time, in_session=request.session_id is not None)
+        fallback.session_id = request.session_id
+        return fallback
     except HTTPException:
         raise
     except Exception as e:
         log_error("/chat", e)
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    """Format one Server-Sent Event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def _event_stream(events, background: Optional[BackgroundTask] = None) -> StreamingResponse:
+    """Wrap an async generator of SSE strings in an unbuffered response."""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background
+    )
+
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Chat with the assistant and receive the answer as Server-Sent Events.
+    
+    - **message**: Your question or message to the chatbot
+    - **bypass_cache**: Skip cached answers and generate a fresh one
+    - **session_id**: Continue a conversation started at POST /chat/sessions
+    
+    Emits `data: {"delta": "..."}` events as text arrives, then a final
+    `event: done` with `safety_triggered`, `cached` and `session_id`. Safety, off-topic,
+    knowledge-base and cached answers arrive as a single delta.
+    """
+    start_time = time.time()
+    log_request("/chat/stream", "POST", request.message)
+    
+    def single(response: ChatResponse) -> StreamingResponse:
+        async def events():
+            yield _sse({"delta": response.response})
+            yield _sse({
+                "safety_triggered": response.safety_triggered,
+                "cached": response.cached,
+                "session_id": request.session_id
+            }, "done")
+        return _event_stream(events())
+    
+    try:
+        session = _get_session(request.session_id)
+        
+        screened = _screen_message(request.message)
+        if screened:
+            status, screened_response = screened
+            log_response("/chat/stream", status, (time.time() - start_time) * 1000)
+            return single(screened_response)
+        
+        kb_match = _kb_lookup(request.message, session)
+        if kb_match and kb_match["kind"] == "direct":
+            log_response("/chat/stream", f"kb_direct_{kb_match['entry_id']}", (time.time() - start_time) * 1000)
+            if session:
+                chat_sessions.add_turn(session, request.message, kb_match["answer"])
+            return single(ChatResponse(response=kb_match["answer"], safety_triggered=False))
+        
+        cacheable = CHAT_CACHE_ENABLED and not (session and session.turn_count)
+        cached = chat_response_cache.get(request.message) if cacheable and not request.bypass_cache else None
+        if cached:
+            log_response("/chat/stream", f"cache_{cached[1]}", (time.time() - start_time) * 1000)
+            if session:
+                chat_sessions.add_turn(session, request.message, cached[0])
+            return single(ChatResponse(response=cached[0], safety_triggered=False, cached=True))
+        
+        usage = start_usage_scope()
+        if not kb_match and not await validate_topic_with_ai(request.message):
+            log_response("/chat/stream", "off_topic_ai", (time.time() - start_time) * 1000)
+            return single(ChatResponse(response=OFF_TOPIC_AI_RESPONSE, safety_triggered=False))
+        
+        # Open the LLM stream before responding so setup errors become HTTP errors
+        reference = kb_match["snippet"] if kb_match else None
+        chunks = stream_ai_response(request.message, _session_history(session), reference)
+        first_chunk = await chunks.__anext__()
+    except LLMUnavailableError as e:
+        return single(_llm_fallback(
+            "/chat/stream", request.message, e, start_time, in_session=request.session_id is not None
+        ))
+    except HTTPException:
+        raise
+    except StopAsyncIteration:
+        first_chunk = ""
+        chunks = None
+    except Exception as e:
+        log_error("/chat/stream", e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+    
+    async def answer_events():
+        parts = [first_chunk]
+        yield _sse({"delta": first_chunk})
+        try:
+            if chunks is not None:
+                async for chunk in chunks:
+                    parts.append(chunk)
+                    yield _sse({"delta": chunk})
+        except Exception as e:
+            log_error("/chat/stream", e)
+            yield _sse({"detail": "AI service error"}, "error")
+            return
+        
+        duration = (time.time() - start_time) * 1000
+        _record_llm_summary("/chat/stream", "kb_snippet_stream" if reference else "stream", usage, duration)
+        log_response("/chat/stream", "success", duration)
+        answer = "".join(parts)
+        if cacheable:
+            chat_response_cache.put(request.message, answer)
+        if session:
+            chat_sessions.add_turn(session, request.message, answer)
+        yield _sse({"safety_triggered": False, "cached": False, "session_id": request.session_id}, "done")
+    
+    # Summarize old session turns once the stream has been sent
+    compaction = BackgroundTask(chat_sessions.compact, session) if session else None
+    return _event_stream(answer_events(), compaction)
+
+
+@router.get("/stats")
+async def chat_stats():
+    """Token and latency totals per chat mode, for weighing cost against latency."""
+    return {
+        "mode": CHAT_MODE,
+        "modes": get_chat_mode_stats(),
+        "topic_decisions": topic_decision_stats,
+        "topic_memo": topic_memo.stats(),
+        "response_cache": chat_response_cache.stats(),
+        "sessions": chat_sessions.stats(),
+        "knowledge_base": {
+            "enabled": KB_ENABLED,
+            "lookups": {
+                result: get_counter("kb_lookups_total", result=result)
+                for result in ("direct", "snippet", "miss")
+            }
+        },
+        "llm": get_resilience_stats()
+    }
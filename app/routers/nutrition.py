@@ -1,16 +1,35 @@
-from fastapi import APIRouter, HTTPException, Query, Body
+import json
+from fastapi import APIRouter, HTTPException, Query, Body, Header, Request, Response
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
+from app.config import NUTRITION_BATCH_MAX_ITEMS, NUTRITION_CACHE_MAX_AGE
 from app.models.schemas import (
     NutritionProfileRequest, NutritionPlanResponse, DailyNutritionTip, 
-    NutrientInfo, NutritionAlert, SymptomData, LifestyleData
+    NutrientInfo, NutritionAlert, SymptomData, LifestyleData,
+    CyclePhase, DietType, FoodItem, MealPlanRequest, MealPlanResponse,
+    PhaseCalendarRequest, PhaseCalendarResponse
 )
-from app.services.nutrition import NutritionService
+from app.services.nutrition import NutritionService, NUTRITION_TIPS, MIN_CYCLE_LENGTH, MAX_CYCLE_LENGTH
+from app.services.predictor import make_prediction
+from app.services import nutrition_batch
+from app.services.food_database import food_db
+from app.services.meal_planner import generate_meal_plan
+from app.utils.http_cache import cached_response
 
 router = APIRouter(
     prefix="/nutrition",
     tags=["Nutrition"]
 )
 
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Batch output format -> (encoder, media type)
+BATCH_FORMATS = {
+    "records": (nutrition_batch.encode_records, "application/json"),
+    "columns": (nutrition_batch.encode_columns, "application/json"),
+    "csv": (nutrition_batch.encode_csv, "text/csv"),
+}
+
 @router.post("/calculate", response_model=NutritionPlanResponse)
 async def calculate_nutrition_needs(profile: NutritionProfileRequest):
     """
@@ -22,26 +41,113 @@ async def calculate_nutrition_needs(profile: NutritionProfileRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/calculate/batch", response_model=List[NutritionPlanResponse])
+async def calculate_nutrition_needs_batch(
+    request: Request,
+    format: str = Query("records", pattern="^(records|columns|csv)$", description="records, columns or csv")
+):
+    """
+    Calculate nutrition plans for many profiles at once (e.g. a nightly
+    wellness-program export).
+    
+    Accepts, by Content-Type:
+    - application/json: a list of /nutrition/calculate bodies, or an object
+      with equal-length arrays age, height, weight, activity_level and goal
+    - text/csv: a header row with those columns, one profile per row
+    - application/vnd.apache.arrow.stream: an Arrow IPC stream with those columns
+    
+    Returns the plans in input order, identical to /nutrition/calculate, as a
+    JSON list (records), a JSON object of arrays (columns) or CSV.
+    """
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+    body = await request.body()
+    try:
+        if content_type == "application/json":
+            columns = nutrition_batch.columns_from_json(json.loads(body))
+        elif content_type == "text/csv":
+            columns = nutrition_batch.columns_from_csv(body.decode("utf-8-sig"))
+        elif content_type == ARROW_MEDIA_TYPE:
+            if not nutrition_batch.ARROW_AVAILABLE:
+                raise HTTPException(status_code=415, detail="Arrow uploads require pyarrow on the server")
+            columns = nutrition_batch.columns_from_arrow(body)
+        else:
+            raise HTTPException(status_code=415, detail=f"Unsupported Content-Type: {content_type}")
+    except HTTPException:
+        raise
+    except ValueError as e:
+        # Also malformed JSON and undecodable text
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not read body: {e}")
+
+    if len(columns["age"]) > NUTRITION_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch too large (max {NUTRITION_BATCH_MAX_ITEMS} profiles)")
+    try:
+        plans = nutrition_batch.calculate_plans(columns)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    encode, media_type = BATCH_FORMATS[format]
+    return Response(content=encode(plans), media_type=media_type)
+
 @router.get("/tips/{cycle_day}", response_model=DailyNutritionTip)
 async def get_daily_tips(
     cycle_day: int, 
-    cycle_length: int = Query(28, ge=20, le=45, description="Average cycle length")
+    cycle_length: int = Query(28, ge=20, le=45, description="Average cycle length"),
+    if_none_match: Optional[str] = Header(None)
 ):
     """
     Get nutrition tips based on the current day of the menstrual cycle.
+    
+    Served from a precomputed table with an ETag and Cache-Control, so
+    clients and CDNs can cache it and revalidate with If-None-Match (304).
+    """
+    try:
+        return cached_response(NUTRITION_TIPS.tip(cycle_day, cycle_length), if_none_match, NUTRITION_CACHE_MAX_AGE)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/calendar", response_model=PhaseCalendarResponse)
+async def get_phase_calendar(request: PhaseCalendarRequest):
+    """
+    Get the cycle phase and nutrition tip for every day of a date range in
+    one call (e.g. a 30-90 day app calendar).
+    
+    The cycle length is `cycle_length`, else the predicted next cycle length
+    from `past_cycles` (as /predict computes it), else 28 days. Each day
+    refers to its tip by index into `tips`, which holds every distinct tip
+    once; a day's tip is the same as /nutrition/tips for that cycle day.
     """
+    cycle_length = request.cycle_length
+    predicted = False
+    if cycle_length is None and request.past_cycles:
+        prediction = await run_in_threadpool(
+            make_prediction,
+            past_cycles=request.past_cycles,
+            last_period_date=request.period_start,
+            framework="pytorch"
+        )
+        cycle_length = min(max(prediction["predicted_cycle_length"], MIN_CYCLE_LENGTH), MAX_CYCLE_LENGTH)
+        predicted = True
     try:
-        tips = NutritionService.get_phase_nutrition(cycle_day, cycle_length)
-        return tips
+        body = NUTRITION_TIPS.calendar(
+            period_start=request.period_start,
+            from_date=request.from_date or request.period_start,
+            days=request.days,
+            cycle_length=cycle_length or 28,
+            predicted=predicted
+        )
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/essentials", response_model=List[NutrientInfo])
-async def get_essential_nutrients():
+async def get_essential_nutrients(if_none_match: Optional[str] = Header(None)):
     """
     Get a list of essential nutrients for women's health.
     """
-    return NutritionService.get_essential_nutrients()
+    return cached_response(NUTRITION_TIPS.essential_nutrients(), if_none_match, NUTRITION_CACHE_MAX_AGE)
 
 @router.post("/alerts", response_model=List[NutritionAlert])
 async def generate_nutrition_alerts(
@@ -56,3 +162,33 @@ async def generate_nutrition_alerts(
         return alerts
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/foods", response_model=List[FoodItem])
+async def list_foods(
+    group: Optional[str] = Query(None, description="Food group (e.g., legume, dairy)"),
+    tag: Optional[str] = Query(None, description="Dietary tag (e.g., vegan, iron_rich)"),
+    phase: Optional[CyclePhase] = Query(None, description="Cycle phase the food is recommended for"),
+    diet: DietType = Query(DietType.ANY, description="Dietary pattern")
+):
+    """
+    Browse the local food database used for meal plans, with nutrients per serving.
+    """
+    mask = food_db.select(group=group, tag=tag, phase=phase, diet=diet)
+    return [food_db.describe(i) for i in mask.nonzero()[0]]
+
+@router.post("/meal-plan", response_model=MealPlanResponse)
+async def create_meal_plan(request: MealPlanRequest):
+    """
+    Generate a one-day meal plan that meets the profile's calorie and macro
+    targets (as from /nutrition/calculate) and favors foods for the current
+    cycle phase.
+    
+    Returns breakfast, lunch, dinner and a snack with servings and nutrients,
+    plus daily totals next to the targets.
+    """
+    try:
+        return generate_meal_plan(request)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -2,9 +2,11 @@
 Router for PCOS risk assessment endpoints.
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
+from typing import List
+from app.config import RISK_BATCH_MAX_ITEMS
 from app.models.schemas import PCOSRiskRequest, PCOSRiskResponse
-from app.services.pcos_service import calculate_pcos_risk
+from app.services.pcos_service import PCOS_RESPONSES, pcos_answer_code, pcos_answer_codes
 
 router = APIRouter(
     prefix="/pcos",
@@ -20,6 +22,22 @@ async def assess_pcos_risk(request: PCOSRiskRequest):
     Note: This is a heuristic assessment and NOT a medical diagnosis.
     """
     try:
-        return calculate_pcos_risk(request)
+        # Served from the precomputed table: same body as calculate_pcos_risk
+        return Response(content=PCOS_RESPONSES.get(pcos_answer_code(request)), media_type="application/json")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/risk-assessment/batch", response_model=List[PCOSRiskResponse])
+async def assess_pcos_risk_batch(requests: List[PCOSRiskRequest]):
+    """
+    Assess PCOS risk for many questionnaires at once (e.g. a clinic upload).
+    
+    Takes a list of the /pcos/risk-assessment request bodies and returns the
+    same results as that endpoint would, in order.
+    """
+    if len(requests) > RISK_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch too large (max {RISK_BATCH_MAX_ITEMS} items)")
+    try:
+        return Response(content=PCOS_RESPONSES.join(pcos_answer_codes(requests)), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
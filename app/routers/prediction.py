@@ -3,6 +3,7 @@ Cycle prediction API endpoints.
 """
 
 from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
 import time
 
 from app.models.schemas import (
@@ -13,9 +14,14 @@ from app.services.predictor import make_prediction
 from app.services.enhanced_predictor import make_enhanced_prediction
 from app.ml.model_factory import get_framework_availability, get_default_framework
 from app.utils.logging import log_request, log_response, log_error
+from app.utils.singleflight import SingleFlight
 
 router = APIRouter(prefix="/predict", tags=["Cycle Prediction"])
 
+# Identical requests arriving while one is being computed share its result
+prediction_flight = SingleFlight("predict")
+enhanced_prediction_flight = SingleFlight("predict_enhanced")
+
 
 @router.post("", response_model=PredictionResponse)
 async def predict_cycle(request: PredictionRequest):
@@ -33,7 +39,10 @@ async def predict_cycle(request: PredictionRequest):
     try:
         log_request("/predict", "POST", f"Cycles: {len(request.past_cycles)}, Framework: {request.framework}")
         
-        result = make_prediction(
+        result = await prediction_flight.do(
+            request.model_dump_json(),
+            run_in_threadpool,
+            make_prediction,
             past_cycles=request.past_cycles,
             last_period_date=request.last_period_date,
             framework=request.framework
@@ -62,6 +71,15 @@ async def list_frameworks():
     }
 
 
+@router.get("/coalescing")
+async def coalescing_stats():
+    """Report how many prediction requests were served by a shared computation."""
+    return {
+        "predict": prediction_flight.stats(),
+        "predict_enhanced": enhanced_prediction_flight.stats()
+    }
+
+
 @router.post("/enhanced", response_model=EnhancedPredictionResponse)
 async def predict_cycle_enhanced(request: EnhancedPredictionRequest):
     """
@@ -106,7 +124,10 @@ async def predict_cycle_enhanced(request: EnhancedPredictionRequest):
         # Convert Pydantic models to dictionaries
         cycle_records_dict = [record.model_dump() for record in request.cycle_records]
         
-        result = make_enhanced_prediction(
+        result = await enhanced_prediction_flight.do(
+            request.model_dump_json(),
+            run_in_threadpool,
+            make_enhanced_prediction,
             cycle_records=cycle_records_dict,
             last_period_date=request.last_period_date,
             framework=request.framework
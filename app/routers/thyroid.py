@@ -2,10 +2,25 @@
 Router for Thyroid Tracker endpoints.
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Path, Request, Response
 from typing import List, Dict
+from app.config import RISK_BATCH_MAX_ITEMS
 from app.models.schemas import ThyroidRiskRequest, ThyroidRiskResponse, ThyroidSymptomLog
-from app.services.thyroid_service import calculate_thyroid_risk, analyze_thyroid_symptoms
+from app.services.thyroid_service import (
+    THYROID_RESPONSES,
+    thyroid_answer_code,
+    thyroid_answer_codes,
+    analyze_thyroid_symptoms,
+    analyze_thyroid_log_stream,
+)
+from app.services.thyroid_timeseries import thyroid_store
+from app.utils.ndjson import LineTooLongError, iter_lines
+
+# One symptom log is a few hundred bytes
+MAX_LOG_LINE_BYTES = 64 * 1024
+
+# User ids double as file names in THYROID_STORE_DIR
+USER_ID_PATTERN = r"^[A-Za-z0-9_-]{1,64}$"
 
 router = APIRouter(
     prefix="/thyroid",
@@ -21,7 +36,23 @@ async def assess_thyroid_risk(request: ThyroidRiskRequest):
     Note: This is a heuristic assessment and NOT a medical diagnosis.
     """
     try:
-        return calculate_thyroid_risk(request)
+        # Served from the precomputed table: same body as calculate_thyroid_risk
+        return Response(content=THYROID_RESPONSES.get(thyroid_answer_code(request)), media_type="application/json")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/risk-assessment/batch", response_model=List[ThyroidRiskResponse])
+async def assess_thyroid_risk_batch(requests: List[ThyroidRiskRequest]):
+    """
+    Assess Thyroid risk for many questionnaires at once (e.g. a clinic upload).
+    
+    Takes a list of the /thyroid/risk-assessment request bodies and returns
+    the same results as that endpoint would, in order.
+    """
+    if len(requests) > RISK_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch too large (max {RISK_BATCH_MAX_ITEMS} items)")
+    try:
+        return Response(content=THYROID_RESPONSES.join(thyroid_answer_codes(requests)), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -38,3 +69,64 @@ async def analyze_thyroid_logs(logs: List[ThyroidSymptomLog]):
         return analyze_thyroid_symptoms(logs)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/analyze/stream", response_model=Dict)
+async def analyze_thyroid_logs_stream(request: Request):
+    """
+    Analyze daily symptom logs uploaded as NDJSON (one log object per line,
+    e.g. `Content-Type: application/x-ndjson`, optionally chunked).
+    
+    The body is processed as it arrives in a single pass, so years of logs
+    don't have to fit in memory. Returns the same result as /thyroid/analyze
+    for the same logs.
+    """
+    try:
+        return await analyze_thyroid_log_stream(iter_lines(request.stream(), MAX_LOG_LINE_BYTES))
+    except LineTooLongError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/users/{user_id}/logs", response_model=Dict)
+async def add_user_thyroid_logs(logs: List[ThyroidSymptomLog], user_id: str = Path(..., pattern=USER_ID_PATTERN)):
+    """
+    Add daily symptom logs to a user's stored history.
+    
+    Logs may arrive in any order; a log for an already stored date replaces
+    it. Rolling averages and anomaly flags are updated as logs are added, so
+    the dashboard never rescans the full history.
+    """
+    try:
+        return thyroid_store.add_logs(user_id, logs)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid log: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/users/{user_id}/dashboard", response_model=Dict)
+async def get_user_thyroid_dashboard(user_id: str = Path(..., pattern=USER_ID_PATTERN)):
+    """
+    Trend dashboard for a user's stored logs.
+    
+    Returns:
+    - 7, 30 and 90-day mean / std / count of BBT, resting heart rate,
+      energy and fatigue, ending at the latest logged day
+    - Values that deviate sharply from the user's own recent baseline
+      (EWMA z-score) within the last 90 days
+    """
+    series = thyroid_store.get(user_id)
+    if series is None:
+        raise HTTPException(status_code=404, detail="No logs stored for this user")
+    try:
+        return series.summary()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/users/{user_id}", response_model=Dict)
+async def delete_user_thyroid_logs(user_id: str = Path(..., pattern=USER_ID_PATTERN)):
+    """Delete a user's stored thyroid log history."""
+    if not thyroid_store.delete(user_id):
+        raise HTTPException(status_code=404, detail="No logs stored for this user")
+    return {"deleted": True}
@@ -0,0 +1,207 @@
+"""
+Production server launcher.
+
+Runs the API under gunicorn with uvicorn workers:
+- Worker count from WEB_CONCURRENCY, or one per CPU allowed by the cgroup
+- uvloop event loop and httptools parser when installed
+- App, torch and shared model weights preloaded before forking, so workers
+  share those pages copy-on-write
+- Workers recycled gracefully after MAX_REQUESTS (+ jitter) requests to bound
+  memory growth from torch allocations
+
+Usage:
+    python -m app.server
+"""
+
+import gc
+import importlib.util
+import os
+
+from app.config import (
+    PORT,
+    WEB_CONCURRENCY,
+    MAX_REQUESTS,
+    MAX_REQUESTS_JITTER,
+    GRACEFUL_TIMEOUT,
+    WORKER_TIMEOUT,
+)
+from app.utils.logging import log_info
+
+try:
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+    GUNICORN_AVAILABLE = True
+except ImportError:
+    # gunicorn is POSIX-only; fall back to uvicorn's own process manager
+    GUNICORN_AVAILABLE = False
+
+LOOP = "uvloop" if importlib.util.find_spec("uvloop") else "auto"
+HTTP = "httptools" if importlib.util.find_spec("httptools") else "auto"
+
+
+def detect_cpu_count():
+    """
+    Get the number of CPUs this process may use.
+
+    Honors cgroup v2 (cpu.max) and v1 (cfs quota) limits so containers with
+    a fractional CPU quota don't start one worker per host core.
+
+    Returns:
+        Number of usable CPUs (at least 1)
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    quota = None
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            limit, period = f.read().split()
+            if limit != "max":
+                quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                limit = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if limit > 0 and period > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+
+    if quota:
+        cpus = min(cpus, max(1, int(quota)))
+    return max(1, cpus)
+
+
+def get_worker_count():
+    """Number of workers: WEB_CONCURRENCY if set, else one per usable CPU."""
+    return WEB_CONCURRENCY if WEB_CONCURRENCY > 0 else detect_cpu_count()
+
+
+def preload():
+    """
+    Warm up heavy state in the master process before workers are forked.
+
+    Builds the local topic classifier and the pre-encoded PCOS, thyroid and
+    nutrition tip response tables, prunes expired shared topic decisions and
+    chat sessions, imports torch, runs one tiny training pass so lazy kernel
+    initialization happens once, and attaches the shared model store. Torch
+    is kept to one thread here so no OpenMP pool exists at fork time.
+    """
+    from app.ml.topic_classifier import get_topic_classifier
+    from app.utils.safety import topic_memo
+    from app.services.chat_sessions import chat_sessions
+    from app.services.pcos_service import PCOS_RESPONSES
+    from app.services.thyroid_service import THYROID_RESPONSES
+    from app.services.nutrition import NUTRITION_TIPS
+    get_topic_classifier()
+    PCOS_RESPONSES.build()
+    THYROID_RESPONSES.build()
+    NUTRITION_TIPS.build()
+    topic_memo.prune_shared()
+    chat_sessions.prune_shared()
+
+    try:
+        import torch
+    except ImportError:
+        return
+
+    torch.set_num_threads(1)
+
+    from app.ml import model_store
+    from app.ml.model_factory import forecast_cycle_length
+
+    forecast_cycle_length("pytorch", [28, 29, 28, 30, 28], use_cache=False)
+    attached = model_store.preload()
+    log_info(f"Preloaded torch {torch.__version__} and {attached} shared models")
+
+
+if GUNICORN_AVAILABLE:
+    class ProductionUvicornWorker(UvicornWorker):
+        """Uvicorn worker using uvloop/httptools when available."""
+        CONFIG_KWARGS = {"loop": LOOP, "http": HTTP}
+
+
+    def _when_ready(server):
+        """Runs in the master after the app is loaded, before the first fork."""
+        preload()
+        # Move preloaded objects out of GC tracking so collections in workers
+        # don't touch (and un-share) their pages
+        gc.freeze()
+
+
+    def _post_fork(server, worker):
+        """Give each worker its share of CPU threads for torch."""
+        try:
+            import torch
+        except ImportError:
+            return
+        threads = max(1, detect_cpu_count() // server.cfg.workers)
+        torch.set_num_threads(threads)
+
+
+    class ProductionServer(BaseApplication):
+        """Embedded gunicorn application serving app.main:app."""
+
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+            return app
+
+
+def get_server_options():
+    """
+    Build gunicorn settings from the environment.
+
+    Returns:
+        Dictionary of gunicorn configuration options
+    """
+    return {
+        "bind": f"0.0.0.0:{PORT}",
+        "workers": get_worker_count(),
+        "worker_class": "app.server.ProductionUvicornWorker",
+        "preload_app": True,
+        "max_requests": MAX_REQUESTS,
+        "max_requests_jitter": MAX_REQUESTS_JITTER,
+        "graceful_timeout": GRACEFUL_TIMEOUT,
+        "timeout": WORKER_TIMEOUT,
+        "keepalive": 5,
+        "worker_tmp_dir": "/dev/shm" if os.path.isdir("/dev/shm") else None,
+        "when_ready": _when_ready,
+        "post_fork": _post_fork,
+    }
+
+
+def main():
+    """Start the production server."""
+    workers = get_worker_count()
+    log_info(f"Starting production server: {workers} workers, loop={LOOP}, http={HTTP}")
+
+    if GUNICORN_AVAILABLE:
+        ProductionServer(get_server_options()).run()
+    else:
+        import uvicorn
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=PORT,
+            workers=workers,
+            loop=LOOP,
+            http=HTTP,
+            limit_max_requests=MAX_REQUESTS,
+            timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+        )
+
+
+if __name__ == "__main__":
+    main()
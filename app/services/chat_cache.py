@@ -0,0 +1,261 @@
+"""
+Response cache for chatbot answers.
+
+Answers are keyed on normalized message text ("What is ovulation?" and
+"what is ovulation" share an entry). Messages that differ slightly are matched
+through a MinHash/LSH index over character shingles, but a near-duplicate
+only reuses an answer when both messages have the same content words: they
+may differ in filler words, punctuation and word order, never in a drug name,
+number, negation or "before" vs "after", since for medical questions that is
+a different question. Entries expire after a TTL and the cache is capped with
+LRU eviction.
+"""
+
+import sys
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Optional, Set, Tuple
+
+import numpy as np
+
+from app.config import (
+    CHAT_CACHE_MAX_ENTRIES,
+    CHAT_CACHE_TTL_SECONDS,
+    CHAT_CACHE_SIMILARITY,
+)
+from app.utils.text import normalize_message
+
+SHINGLE_SIZE = 4
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+_ROWS_PER_BAND = NUM_PERMUTATIONS // LSH_BANDS
+_MERSENNE_PRIME = (1 << 31) - 1
+
+_rng = np.random.default_rng(20240611)
+_HASH_A = _rng.integers(1, _MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.int64)
+_HASH_B = _rng.integers(0, _MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.int64)
+
+
+def minhash_signature(normalized: str) -> np.ndarray:
+    """
+    Compute a MinHash signature over character shingles.
+
+    Args:
+        normalized: Normalized message text
+
+    Returns:
+        Array of NUM_PERMUTATIONS minimum hash values
+    """
+    padded = f" {normalized} "
+    shingles = {padded[i:i + SHINGLE_SIZE] for i in range(max(1, len(padded) - SHINGLE_SIZE + 1))}
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode()) % _MERSENNE_PRIME for s in shingles),
+        dtype=np.int64,
+        count=len(shingles),
+    )
+    return ((np.outer(hashes, _HASH_A) + _HASH_B) % _MERSENNE_PRIME).min(axis=0)
+
+
+# Words that may differ between near-duplicates. Question words, modals,
+# prepositions, pronouns and negations change what is asked, so they are kept
+FILLER_WORDS = frozenset("""
+a an the is are am was were be been being do does did and so just really
+also please hi hello hey thanks thank um uh ok okay
+""".split())
+
+
+def content_words(normalized: str) -> FrozenSet[str]:
+    """
+    Words of a normalized message that must all match for a near-duplicate
+    to share an answer.
+
+    "n't" normalizes to "<word>n t" and counts as "not", as does "cannot".
+    """
+    words = set()
+    previous = ""
+    for word in normalized.split():
+        if word == "t" and previous.endswith("n"):
+            words.add("not")
+        elif word == "cannot":
+            words.update(("can", "not"))
+        elif word not in FILLER_WORDS:
+            words.add(word)
+        previous = word
+    return frozenset(words)
+
+
+def _band_keys(signature: np.ndarray):
+    for band in range(LSH_BANDS):
+        rows = signature[band * _ROWS_PER_BAND:(band + 1) * _ROWS_PER_BAND]
+        yield band, rows.tobytes()
+
+
+class ChatResponseCache:
+    """TTL/LRU cache of chatbot answers with near-duplicate lookup."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        # normalized text -> (response, signature, expires_at)
+        self._entries: "OrderedDict[str, Tuple[str, np.ndarray, float]]" = OrderedDict()
+        self._bands: Dict[Tuple[int, bytes], Set[str]] = {}
+        self._stats = {"exact_hits": 0, "near_hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, message: str) -> Optional[Tuple[str, str]]:
+        """
+        Look up a cached answer for a message.
+
+        Args:
+            message: User's message
+
+        Returns:
+            Tuple of (response, "exact" or "near"), or None on a miss
+        """
+        key = normalize_message(message)
+        if not key:
+            # Nothing left to match on (e.g. only emoji or punctuation)
+            self._stats["misses"] += 1
+            return None
+        now = time.monotonic()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[2] > now:
+                self._entries.move_to_end(key)
+                self._stats["exact_hits"] += 1
+                return entry[0], "exact"
+            self._remove(key)
+
+        signature = minhash_signature(key)
+        scores = {}
+        for band_key in _band_keys(signature):
+            for candidate in self._bands.get(band_key, ()):
+                if candidate not in scores:
+                    scores[candidate] = float(np.mean(self._entries[candidate][1] == signature))
+
+        words = content_words(key)
+        # Best candidate first; expired ones are dropped and the next tried
+        for candidate in sorted(scores, key=scores.get, reverse=True):
+            if scores[candidate] < self.similarity:
+                break
+            response, _, expires_at = self._entries[candidate]
+            if expires_at <= now:
+                self._remove(candidate)
+                continue
+            if content_words(candidate) != words:
+                continue
+            self._entries.move_to_end(candidate)
+            self._stats["near_hits"] += 1
+            return response, "near"
+
+        self._stats["misses"] += 1
+        return None
+
+    def put(self, message: str, response: str):
+        """
+        Cache an answer for a message, evicting the least recently used entry.
+
+        Args:
+            message: User's message
+            response: Answer to reuse for equal or near-duplicate messages
+        """
+        key = normalize_message(message)
+        if not key:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        signature = minhash_signature(key)
+        self._entries[key] = (response, signature, time.monotonic() + self.ttl_seconds)
+        for band_key in _band_keys(signature):
+            self._bands.setdefault(band_key, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self._stats["evictions"] += 1
+
+    def _remove(self, key: str):
+        _, signature, _ = self._entries.pop(key)
+        for band_key in _band_keys(signature):
+            members = self._bands.get(band_key)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._bands[band_key]
+
+    def clear(self):
+        """Drop every cached answer."""
+        self._entries.clear()
+        self._bands.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        lookups = self._stats["exact_hits"] + self._stats["near_hits"] + self._stats["misses"]
+        hits = self._stats["exact_hits"] + self._stats["near_hits"]
+        return {
+            **self._stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+
+chat_response_cache = ChatResponseCache(
+    max_entries=CHAT_CACHE_MAX_ENTRIES,
+    ttl_seconds=CHAT_CACHE_TTL_SECONDS,
+    similarity=CHAT_CACHE_SIMILARITY,
+)
+
+
+# Pairs of (cached question, new question, whether the new one may reuse the
+# answer). Run `python -m app.services.chat_cache` after changing the matching.
+NEAR_DUPLICATE_PROBES = [
+    ("Is it normal to have cramps before my period?", "is it normal to have cramps before my period", True),
+    ("Is it normal to have cramps before my period?", "Hi, is it normal to have cramps before my period, please?", True),
+    # Long questions differing in one key word share over 85% of their shingles
+    (
+        "I have been prescribed amoxicillin for a sinus infection and I am worried because I take the "
+        "combined birth control pill every day, so will amoxicillin make my birth control less effective "
+        "and do I need to use condoms as a backup method?",
+        "I have been prescribed rifampin for a sinus infection and I am worried because I take the "
+        "combined birth control pill every day, so will rifampin make my birth control less effective "
+        "and do I need to use condoms as a backup method?",
+        False,
+    ),
+    (
+        "I keep getting really bad headaches, nausea and lower back pain right before my period starts "
+        "every single month, is this normal and what can I do to feel better?",
+        "I keep getting really bad headaches, nausea and lower back pain right after my period starts "
+        "every single month, is this normal and what can I do to feel better?",
+        False,
+    ),
+    ("Is it safe to exercise at 12 weeks pregnant?", "Is it safe to exercise at 32 weeks pregnant?", False),
+    ("Is it safe to take ibuprofen on my period?", "Isn't it safe to take ibuprofen on my period?", False),
+]
+
+
+def check_probes() -> list:
+    """
+    Run NEAR_DUPLICATE_PROBES through a fresh cache.
+
+    Returns:
+        A description of each pair whose lookup differs from the expected one
+    """
+    failures = []
+    for cached, message, should_hit in NEAR_DUPLICATE_PROBES:
+        cache = ChatResponseCache(max_entries=10, ttl_seconds=60, similarity=CHAT_CACHE_SIMILARITY)
+        cache.put(cached, "answer")
+        hit = cache.get(message) is not None
+        if hit != should_hit:
+            failures.append(f"{message!r} after {cached!r}: expected {'hit' if should_hit else 'miss'}")
+    return failures
+
+
+if __name__ == "__main__":
+    failures = check_probes()
+    for failure in failures:
+        print(failure)
+    print(f"{len(NEAR_DUPLICATE_PROBES) - len(failures)}/{len(NEAR_DUPLICATE_PROBES)} near-duplicate probes passed")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,582 @@
+"""
+Server-side multi-turn chat sessions.
+
+Each session keeps its recent turns verbatim and everything older as a rolling
+summary. The summary plus the turns sent to the LLM never exceed
+SESSION_CONTEXT_TOKENS, so the prompt size per turn stays flat however long
+the conversation runs. Sessions live in an LRU store capped by count, total
+bytes and idle time.
+
+With a shared directory (SESSION_SHARED_DIR, on /dev/shm by default) every
+session is also written there as one JSON file, so a follow-up turn can be
+served by any worker. Each worker keeps its in-memory copy only as a cache and
+re-reads a session whenever another worker has written a newer version. Writes
+to the directory are serialized with a file lock, so concurrent turns of one
+session are never lost, and the count and byte caps apply to the directory as
+a whole: the least recently written sessions are deleted first.
+"""
+
+import hashlib
+import json
+import os
+import secrets
+import tempfile
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from app.config import (
+    MODEL_NAME,
+    SESSION_CONTEXT_TOKENS,
+    SESSION_SUMMARY_TOKENS,
+    SESSION_MAX_COUNT,
+    SESSION_STORE_MAX_BYTES,
+    SESSION_TTL_SECONDS,
+    SESSION_SHARED_DIR,
+)
+from app.models.constants import SESSION_SUMMARY_PROMPT
+from app.llm import client as llm_client, resilience
+from app.utils.logging import log_warning
+
+try:
+    import fcntl
+except ImportError:
+    # No POSIX file locks (e.g. Windows): writes are not serialized across processes
+    fcntl = None
+
+# Rough token estimate; good enough for budgeting without a tokenizer
+CHARS_PER_TOKEN = 4
+# Bookkeeping cost of an empty session (ids, object headers, list slots)
+SESSION_OVERHEAD_BYTES = 256
+# Expired shared session files are swept after this many creations per worker
+PRUNE_EVERY_CREATES = 256
+# When the shared directory exceeds a cap, it is shrunk to this share of it so
+# the directory scan is not repeated on every write
+SHARED_SHRINK_TARGET = 0.9
+# Bookkeeping files in the shared directory (session files end in .json)
+LOCK_FILE = "_lock"
+USAGE_FILE = "_usage"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep the end of a text (the most recent content) within a token budget."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text[-max_chars:]
+    space = cut.find(" ")
+    return cut[space + 1:] if 0 <= space < 40 else cut
+
+
+class ChatSession:
+    """Summary and recent turns of one conversation."""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.summary = ""
+        # (role, content) pairs, oldest first
+        self.turns: List[Tuple[str, str]] = []
+        self.turn_count = 0
+        self.compacting = False
+        # Wall-clock time so it means the same in every worker
+        self.last_used = time.time()
+
+    def to_record(self) -> dict:
+        """JSON-serializable state of the session."""
+        return {
+            "session_id": self.session_id,
+            "summary": self.summary,
+            "turns": self.turns,
+            "turn_count": self.turn_count,
+            "last_used": self.last_used,
+        }
+
+    @classmethod
+    def from_record(cls, record: dict) -> "ChatSession":
+        session = cls(record["session_id"])
+        session.summary = record["summary"]
+        session.turns = [(role, content) for role, content in record["turns"]]
+        session.turn_count = record["turn_count"]
+        session.last_used = record["last_used"]
+        return session
+
+    @property
+    def size_bytes(self) -> int:
+        """Approximate memory held by the session's text."""
+        text_bytes = len(self.summary.encode()) + sum(len(content.encode()) for _, content in self.turns)
+        return SESSION_OVERHEAD_BYTES + text_bytes
+
+    @property
+    def turn_tokens(self) -> int:
+        """Estimated tokens of the verbatim turns."""
+        return sum(estimate_tokens(content) for _, content in self.turns)
+
+    def context_messages(self) -> List[Dict[str, str]]:
+        """
+        Build the prior-conversation messages for the next LLM call.
+
+        The summary comes first, then as many of the most recent turns as fit
+        in the remaining budget. Turns that don't fit are only dropped from
+        the prompt here; compaction folds them into the summary.
+
+        Returns:
+            Chat messages to place between the system prompt and the new
+            user message
+        """
+        messages = []
+        budget = SESSION_CONTEXT_TOKENS
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the conversation so far: {self.summary}"})
+            budget -= estimate_tokens(self.summary)
+
+        recent = []
+        for role, content in reversed(self.turns):
+            cost = estimate_tokens(content)
+            if cost > budget:
+                break
+            recent.append({"role": role, "content": content})
+            budget -= cost
+        return messages + recent[::-1]
+
+
+class SessionStore:
+    """LRU store of chat sessions bounded by count, bytes and idle time."""
+
+    def __init__(self, max_sessions: int, max_bytes: int, ttl_seconds: float, shared_dir: Optional[str] = None):
+        """
+        Args:
+            max_sessions: Sessions kept, in process memory and in the shared directory
+            max_bytes: Text bytes kept in process memory, and session file
+                bytes kept in the shared directory
+            ttl_seconds: Idle time before a session expires
+            shared_dir: Directory shared by all workers, or None for local only
+        """
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.shared_dir = shared_dir
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        # session id -> (inode, mtime_ns) of the shared file the local copy
+        # matches; every write renames a new file into place, so the inode changes
+        self._versions: Dict[str, Tuple[int, int]] = {}
+        self._total_bytes = 0
+        self._stats = {
+            "created": 0, "expired": 0, "evicted": 0, "compactions": 0, "summary_fallbacks": 0,
+            "shared_loads": 0, "shared_evicted": 0, "shared_write_errors": 0,
+        }
+
+        if self.shared_dir:
+            try:
+                # Conversations are private: only this user may read them
+                os.makedirs(self.shared_dir, mode=0o700, exist_ok=True)
+            except OSError as e:
+                log_warning(f"Session store: shared directory unavailable, using worker memory only: {e}")
+                self.shared_dir = None
+
+    def create(self) -> ChatSession:
+        """Start a new session with a random id."""
+        session = ChatSession(secrets.token_urlsafe(16))
+        self._sessions[session.session_id] = session
+        self._resize(session)
+        with self._locked():
+            self._save(session)
+        self._stats["created"] += 1
+        if self.shared_dir and self._stats["created"] % PRUNE_EVERY_CREATES == 0:
+            self.prune_shared()
+        self._evict()
+        return session
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        """
+        Look up a live session and mark it as recently used.
+
+        Returns:
+            The session, or None if it never existed, expired or was evicted
+        """
+        session = self._current(session_id)
+        if session is None:
+            return None
+        now = time.time()
+        if now - session.last_used > self.ttl_seconds:
+            self._remove(session_id)
+            with self._locked():
+                self._unlink(session_id)
+            self._stats["expired"] += 1
+            return None
+        session.last_used = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        """End a session. Returns False if it didn't exist."""
+        existed = session_id in self._sessions
+        if existed:
+            self._remove(session_id)
+        with self._locked():
+            return self._unlink(session_id) or existed
+
+    # ------------------------------------------------------------------
+    # Shared tier
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock on the shared directory across processes (no-op without one)."""
+        if not self.shared_dir or fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.shared_dir, LOCK_FILE), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _shared_path(self, session_id: str) -> str:
+        # Hashed so client-supplied ids never form paths
+        return os.path.join(self.shared_dir, hashlib.sha1(session_id.encode()).hexdigest() + ".json")
+
+    @staticmethod
+    def _file_version(path: str) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _current(self, session_id: str) -> Optional[ChatSession]:
+        """
+        The latest version of a session: the local copy, re-read from the
+        shared directory if another worker wrote a newer one.
+        """
+        session = self._sessions.get(session_id)
+        if not self.shared_dir:
+            return session
+
+        path = self._shared_path(session_id)
+        try:
+            version = self._file_version(path)
+            if session is not None and self._versions.get(session_id) == version:
+                return session
+            with open(path) as f:
+                record = json.load(f)
+            if record["session_id"] != session_id:
+                return None
+            loaded = ChatSession.from_record(record)
+        except FileNotFoundError:
+            # Deleted, expired or evicted by another worker
+            if session is not None:
+                self._remove(session_id)
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            return session
+
+        if session is not None:
+            loaded.compacting = session.compacting
+        self._sessions[session_id] = loaded
+        self._versions[session_id] = version
+        self._resize(loaded)
+        self._stats["shared_loads"] += 1
+        self._evict()
+        return loaded
+
+    def _read_usage(self) -> Optional[Tuple[int, int]]:
+        """(session count, file bytes) of the shared directory, if recorded."""
+        try:
+            with open(os.path.join(self.shared_dir, USAGE_FILE)) as f:
+                count, size = json.load(f)
+            return int(count), int(size)
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _write_usage(self, count: int, size: int):
+        with open(os.path.join(self.shared_dir, USAGE_FILE), "w") as f:
+            json.dump([count, size], f)
+
+    def _save(self, session: ChatSession):
+        """
+        Write a session to the shared directory (no-op without one).
+
+        Must be called while holding _locked().
+        """
+        if not self.shared_dir:
+            return
+        path = self._shared_path(session.session_id)
+        try:
+            try:
+                old_size = os.stat(path).st_size
+            except FileNotFoundError:
+                old_size = None
+            # Write then rename so readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=self.shared_dir, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(session.to_record(), f)
+            os.replace(tmp_path, path)
+            self._versions[session.session_id] = self._file_version(path)
+
+            usage = self._read_usage()
+            if usage is None:
+                self._shrink_shared(keep=path)
+                return
+            count = usage[0] + (old_size is None)
+            size = usage[1] + os.stat(path).st_size - (old_size or 0)
+            if count > self.max_sessions or size > self.max_bytes:
+                self._shrink_shared(keep=path)
+            else:
+                self._write_usage(count, size)
+        except OSError as e:
+            self._stats["shared_write_errors"] += 1
+            log_warning(f"Session store: failed to write session: {e}")
+
+    def _unlink(self, session_id: str) -> bool:
+        """
+        Delete a session's shared file. Must be called while holding _locked().
+        """
+        if not self.shared_dir:
+            return False
+        path = self._shared_path(session_id)
+        try:
+            size = os.stat(path).st_size
+            os.unlink(path)
+        except OSError:
+            return False
+        usage = self._read_usage()
+        try:
+            if usage is not None:
+                self._write_usage(max(usage[0] - 1, 0), max(usage[1] - size, 0))
+        except OSError:
+            pass
+        return True
+
+    def _shrink_shared(self, keep: Optional[str] = None, expired_only: bool = False) -> int:
+        """
+        Delete expired sessions, then the least recently written ones while
+        the directory exceeds a cap, and record the resulting usage.
+
+        Must be called while holding _locked().
+
+        Args:
+            keep: Path of a session file that is never evicted (the one just written)
+            expired_only: Only delete expired sessions and stale temporary files
+
+        Returns:
+            Number of files removed
+        """
+        now = time.time()
+        removed = 0
+        files = []
+        for entry in os.scandir(self.shared_dir):
+            try:
+                stat = entry.stat()
+                if entry.name.endswith(".tmp"):
+                    # Leftover from a writer that died mid-write
+                    if stat.st_mtime < now - 60:
+                        os.unlink(entry.path)
+                        removed += 1
+                elif entry.name.endswith(".json"):
+                    # Every turn rewrites the file, so mtime is the last use
+                    if now - stat.st_mtime > self.ttl_seconds and entry.path != keep:
+                        os.unlink(entry.path)
+                        removed += 1
+                        self._stats["expired"] += 1
+                    else:
+                        files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            except OSError:
+                continue
+
+        count = len(files)
+        size = sum(file_size for _, file_size, _ in files)
+        if not expired_only and (count > self.max_sessions or size > self.max_bytes):
+            max_count = int(self.max_sessions * SHARED_SHRINK_TARGET)
+            max_size = int(self.max_bytes * SHARED_SHRINK_TARGET)
+            for _, file_size, path in sorted(files):
+                if count <= max_count and size <= max_size:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                count -= 1
+                size -= file_size
+                removed += 1
+                self._stats["shared_evicted"] += 1
+        self._write_usage(count, size)
+        return removed
+
+    def prune_shared(self) -> int:
+        """
+        Delete expired sessions from the shared directory and recount its usage.
+
+        Returns:
+            Number of files removed
+        """
+        if not self.shared_dir:
+            return 0
+        with self._locked():
+            try:
+                return self._shrink_shared(expired_only=True)
+            except OSError as e:
+                log_warning(f"Session store: failed to prune shared sessions: {e}")
+                return 0
+
+    # ------------------------------------------------------------------
+    # Turns and compaction
+    # ------------------------------------------------------------------
+
+    def add_turn(self, session: ChatSession, message: str, response: str):
+        """
+        Append a user message and the assistant's answer to a session.
+
+        Args:
+            session: Session the exchange belongs to
+            message: User's message
+            response: Assistant's answer
+        """
+        with self._locked():
+            # Append to the latest version so turns another worker added
+            # meanwhile are kept
+            latest = self._current(session.session_id) if self.shared_dir else session
+            if latest is None:
+                # Deleted or evicted while the answer was generated
+                return
+            latest.turns.append(("user", message))
+            latest.turns.append(("assistant", response))
+            latest.turn_count += 1
+            latest.last_used = time.time()
+            self._resize(latest)
+            self._save(latest)
+        self._evict()
+
+    def needs_compaction(self, session: ChatSession) -> bool:
+        """Whether the verbatim turns outgrew their share of the context budget."""
+        return session.turn_tokens > SESSION_CONTEXT_TOKENS - SESSION_SUMMARY_TOKENS
+
+    async def compact(self, session: ChatSession):
+        """
+        Fold the oldest turns of a session into its rolling summary.
+
+        Keeps the most recent turns that fit in half of the turn budget, so
+        compaction runs every few turns rather than on every one. The LLM
+        writes the new summary; if it is unavailable the old turns are
+        condensed extractively instead.
+
+        Args:
+            session: Session to compact
+        """
+        if self.shared_dir:
+            # The caller's copy may predate turns another worker added
+            session = self._current(session.session_id)
+            if session is None:
+                return
+        if session.compacting or not self.needs_compaction(session):
+            return
+
+        keep_budget = (SESSION_CONTEXT_TOKENS - SESSION_SUMMARY_TOKENS) // 2
+        keep = 0
+        kept_tokens = 0
+        for _, content in reversed(session.turns):
+            kept_tokens += estimate_tokens(content)
+            if kept_tokens > keep_budget:
+                break
+            keep += 1
+        # Fold whole exchanges so a kept turn never lacks its question
+        fold = len(session.turns) - keep
+        fold += fold % 2
+        old_turns = session.turns[:fold]
+        if not old_turns:
+            return
+
+        session.compacting = True
+        try:
+            summary = await self._summarize(session.summary, old_turns)
+        finally:
+            session.compacting = False
+
+        with self._locked():
+            # Another worker may have added turns meanwhile; fold into the latest
+            # version, and only if it still starts with the summarized turns
+            latest = self._current(session.session_id) if self.shared_dir else session
+            if latest is None or latest.turns[:fold] != old_turns:
+                return
+            # Only appends happen while compacting, so the folded turns are still first
+            del latest.turns[:fold]
+            latest.summary = _truncate_to_tokens(summary, SESSION_SUMMARY_TOKENS)
+            self._stats["compactions"] += 1
+            if latest.session_id not in self._sessions:
+                return
+            self._resize(latest)
+            self._save(latest)
+        self._evict()
+
+    async def _summarize(self, summary: str, turns: List[Tuple[str, str]]) -> str:
+        """Merge turns into a summary with the LLM, falling back to extraction."""
+        transcript = "\n".join(f"{role.title()}: {content}" for role, content in turns)
+        client = llm_client.get_llm_client()
+        if client:
+            try:
+                completion = await resilience.create_completion(
+                    client,
+                    "summary",
+                    messages=[{
+                        "role": "user",
+                        "content": SESSION_SUMMARY_PROMPT.format(
+                            max_words=int(SESSION_SUMMARY_TOKENS * 0.75),
+                            summary=summary or "(none)",
+                            turns=transcript,
+                        ),
+                    }],
+                    model=MODEL_NAME,
+                    temperature=0.2,
+                    max_tokens=SESSION_SUMMARY_TOKENS,
+                )
+                return completion.content.strip()
+            except Exception as e:
+                log_warning(f"Session summary failed, using extractive summary: {e}")
+
+        self._stats["summary_fallbacks"] += 1
+        questions = " ".join(f"User asked: {content[:200]}" for role, content in turns if role == "user")
+        return f"{summary} {questions}".strip()
+
+    def _resize(self, session: ChatSession):
+        size = session.size_bytes
+        self._total_bytes += size - self._sizes.get(session.session_id, 0)
+        self._sizes[session.session_id] = size
+
+    def _remove(self, session_id: str):
+        del self._sessions[session_id]
+        self._versions.pop(session_id, None)
+        self._total_bytes -= self._sizes.pop(session_id, 0)
+
+    def _evict(self):
+        # Drop least recently used sessions; the newest one is always kept.
+        # With a shared directory this only drops the in-memory copy.
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > self.max_sessions or self._total_bytes > self.max_bytes
+        ):
+            self._remove(next(iter(self._sessions)))
+            self._stats["evicted"] += 1
+
+    def stats(self) -> dict:
+        """Return session counts, memory use and compaction counters."""
+        return {
+            **self._stats,
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "shared": self.shared_dir is not None,
+        }
+
+
+chat_sessions = SessionStore(
+    max_sessions=SESSION_MAX_COUNT,
+    max_bytes=SESSION_STORE_MAX_BYTES,
+    ttl_seconds=SESSION_TTL_SECONDS,
+    shared_dir=SESSION_SHARED_DIR,
+)
@@ -2,12 +2,19 @@
 Chatbot service for reproductive health education.
 """
 
-from typing import Optional
+from typing import AsyncIterator, Dict, List, Optional
 from fastapi import HTTPException
 
-from app.config import client, MODEL_NAME
-from app.models.constants import SYSTEM_PROMPT
+from app.config import MODEL_NAME
+from app.models.constants import SYSTEM_PROMPT, DIAGNOSIS_PHRASES, KB_REFERENCE_PROMPT
 from app.utils.safety import check_emergency, check_unsafe
+from app.llm import client as llm_client, resilience
+from app.utils.keyword_matcher import KeywordMatcher
+
+# Post-filter for responses that read like a diagnosis or prescription
+RESPONSE_MATCHER = KeywordMatcher({"diagnosis": DIAGNOSIS_PHRASES})
+
+DIAGNOSIS_DISCLAIMER = "\n\n⚠️ Remember: This is educational information only, not a diagnosis or prescription. Always consult a healthcare provider for personalized medical advice."
 
 
 def get_safety_response(message: str) -> Optional[str]:
@@ -47,19 +54,43 @@ Your wellbeing matters, and there are professionals ready to help you safely."""
     return None
 
 
-def get_ai_response(message: str) -> str:
+def _build_messages(
+    message: str,
+    history: Optional[List[Dict[str, str]]],
+    reference: Optional[str] = None
+) -> List[Dict[str, str]]:
+    """Assemble the system prompt, reference notes, prior conversation and the new message."""
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if reference:
+        messages.append({"role": "system", "content": KB_REFERENCE_PROMPT.format(reference=reference)})
+    return [
+        *messages,
+        *(history or []),
+        {"role": "user", "content": message}
+    ]
+
+
+async def get_ai_response(
+    message: str,
+    history: Optional[List[Dict[str, str]]] = None,
+    reference: Optional[str] = None
+) -> str:
     """
     Get AI-generated response for reproductive health questions.
     
     Args:
         message: User's question
+        history: Prior conversation messages from a chat session
+        reference: Knowledge-base snippet to ground the answer in
         
     Returns:
         AI-generated educational response
         
     Raises:
         HTTPException: If AI service fails
+        LLMUnavailableError: If the provider is down or too slow
     """
+    client = llm_client.get_llm_client()
     if not client:
         raise HTTPException(
             status_code=500,
@@ -67,23 +98,78 @@ def get_ai_response(message: str) -> str:
         )
     
     try:
-        chat_completion = client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": message}
-            ],
+        chat_completion = await resilience.create_completion(
+            client,
+            "answer",
+            messages=_build_messages(message, history, reference),
             model=MODEL_NAME,
             temperature=0.7,
             max_tokens=500
         )
         
-        ai_response = chat_completion.choices[0].message.content
+        ai_response = chat_completion.content
         
         # Additional safety check
-        if any(word in ai_response.lower() for word in ["i diagnose", "you have", "you need to take"]):
-            ai_response += "\n\n⚠️ Remember: This is educational information only, not a diagnosis or prescription. Always consult a healthcare provider for personalized medical advice."
+        if RESPONSE_MATCHER.contains(ai_response, "diagnosis"):
+            ai_response += DIAGNOSIS_DISCLAIMER
         
         return ai_response
         
+    except resilience.LLMUnavailableError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
+
+
+async def stream_ai_response(
+    message: str,
+    history: Optional[List[Dict[str, str]]] = None,
+    reference: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Stream an AI-generated response token by token.
+    
+    The diagnosis post-filter runs incrementally over the stream and the
+    disclaimer is emitted as the final chunk if it was triggered.
+    
+    Args:
+        message: User's question
+        history: Prior conversation messages from a chat session
+        reference: Knowledge-base snippet to ground the answer in
+        
+    Yields:
+        Response text chunks as they arrive from the LLM
+        
+    Raises:
+        HTTPException: If AI service is not configured or fails to start
+        LLMUnavailableError: If the provider is down or too slow
+    """
+    client = llm_client.get_llm_client()
+    if not client:
+        raise HTTPException(
+            status_code=500,
+            detail="Chatbot service is not configured. Please set GROQ_API_KEY environment variable."
+        )
+    
+    try:
+        stream = await resilience.stream_completion(
+            client,
+            "answer",
+            messages=_build_messages(message, history, reference),
+            model=MODEL_NAME,
+            temperature=0.7,
+            max_tokens=500
+        )
+    except resilience.LLMUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
+    
+    scanner = RESPONSE_MATCHER.stream()
+    async for chunk in stream:
+        if chunk.content:
+            scanner.feed(chunk.content)
+            yield chunk.content
+    
+    if "diagnosis" in scanner.categories:
+        yield DIAGNOSIS_DISCLAIMER
@@ -0,0 +1,93 @@
+"""
+Indexed, vectorized view of the local food composition data.
+
+Nutrient values are held as one dense matrix (foods x FOOD_NUTRIENTS) and
+food groups, dietary tags, meal slots and phase suitability as boolean
+masks over the food rows, so filters are array operations and planners can
+work on whole matrices.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.models.food_database import FOOD_NUTRIENTS, FOODS, MEAL_SLOTS
+from app.models.schemas import CyclePhase, DietType
+
+# Foods allowed by each diet: those carrying any of the listed tags
+DIET_TAGS = {
+    DietType.VEGAN: ["vegan"],
+    DietType.VEGETARIAN: ["vegetarian"],
+    DietType.EGGETARIAN: ["vegetarian", "eggs"],
+    DietType.PESCATARIAN: ["vegetarian", "eggs", "fish"],
+}
+
+
+class FoodDatabase:
+    """Foods with a nutrient matrix and group, tag, meal and phase indexes."""
+
+    def __init__(self, foods: List[dict]):
+        self.foods = foods
+        self.ids = [food["id"] for food in foods]
+        self.position = {food_id: i for i, food_id in enumerate(self.ids)}
+        self.nutrients = np.array([food["nutrients"] for food in foods], dtype=np.float64)
+        self.groups = self._masks("group")
+        self.tags = self._masks("tags")
+        self.phases = {CyclePhase(phase): mask for phase, mask in self._masks("phases").items()}
+        self.meal_masks = np.array([
+            [slot in food["meals"] for food in foods] for slot in MEAL_SLOTS
+        ])
+
+    def _masks(self, key: str) -> Dict[str, np.ndarray]:
+        """Boolean row mask per distinct value of a food attribute."""
+        values = {}
+        for i, food in enumerate(self.foods):
+            for value in food[key] if isinstance(food[key], list) else [food[key]]:
+                values.setdefault(value, np.zeros(len(self.foods), dtype=bool))[i] = True
+        return values
+
+    def _lookup(self, index: Dict, key) -> np.ndarray:
+        return index.get(key, np.zeros(len(self.foods), dtype=bool))
+
+    def select(
+        self,
+        group: Optional[str] = None,
+        tag: Optional[str] = None,
+        phase: Optional[CyclePhase] = None,
+        diet: DietType = DietType.ANY,
+        gluten_free: bool = False,
+        exclude: Sequence[str] = (),
+    ) -> np.ndarray:
+        """
+        Mask of the foods matching every given filter.
+
+        Raises:
+            ValueError: If an excluded id is not a known food
+        """
+        mask = np.ones(len(self.foods), dtype=bool)
+        if group is not None:
+            mask &= self._lookup(self.groups, group)
+        if tag is not None:
+            mask &= self._lookup(self.tags, tag)
+        if phase is not None:
+            mask &= self._lookup(self.phases, phase)
+        if diet in DIET_TAGS:
+            mask &= np.any([self._lookup(self.tags, tag) for tag in DIET_TAGS[diet]], axis=0)
+        if gluten_free:
+            mask &= self._lookup(self.tags, "gluten_free")
+        unknown = [food_id for food_id in exclude if food_id not in self.position]
+        if unknown:
+            raise ValueError(f"Unknown food id: {unknown[0]}")
+        mask[[self.position[food_id] for food_id in exclude]] = False
+        return mask
+
+    def describe(self, i: int) -> dict:
+        """A food's entry with its nutrients keyed by name."""
+        food = self.foods[i]
+        return {
+            **{key: value for key, value in food.items() if key != "nutrients"},
+            "nutrients": dict(zip(FOOD_NUTRIENTS, food["nutrients"])),
+        }
+
+
+food_db = FoodDatabase(FOODS)
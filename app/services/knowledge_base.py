@@ -0,0 +1,233 @@
+"""
+Local knowledge-base retrieval for frequently asked questions.
+
+The curated entries in app.models.knowledge_base are indexed twice with
+BM25: once by their question phrasings, once by answer paragraphs. A message
+is matched against both:
+- a close paraphrase of a known question is answered directly, with no LLM call
+- a partial match contributes the best answer paragraph as a reference
+  snippet for the LLM (and implies the message is on topic)
+
+Confidence is the IDF-weighted overlap between the message's terms and the
+matched question's terms in both directions, so long or personal questions
+that merely mention a known topic don't get a canned answer. A direct answer
+also requires every term of the message to appear in the entry's questions:
+a message that adds its own content ("...during menopause?") asks something
+the vetted answer doesn't cover, however high the overlap.
+"""
+
+import math
+import sys
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from app.config import KB_DIRECT_THRESHOLD, KB_SNIPPET_THRESHOLD
+from app.models.knowledge_base import KNOWLEDGE_BASE, KB_DISCLAIMER, KB_PROBES
+from app.utils.text import normalize_message
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_SNIPPET_CHARS = 700
+# Share of the message a snippet's entry questions must cover
+MIN_ENTRY_SHARE = 0.25
+
+STOPWORDS = frozenset("""
+a about am an and are at be been before between can could did do does during each
+explain for from get gets getting had has have how i if im in is it its me my of on
+or should tell that the there this to vs was what whats when which why will with
+would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Normalize, drop stopwords and strip plural endings."""
+    terms = []
+    for word in normalize_message(text).split():
+        if word in STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+class BM25Index:
+    """Inverted index over short documents with BM25 scoring."""
+
+    def __init__(self, documents: List[List[str]]):
+        """
+        Args:
+            documents: Tokenized documents; ids are list positions
+        """
+        self.num_docs = len(documents)
+        self.doc_lengths = [len(doc) for doc in documents]
+        self.avg_length = sum(self.doc_lengths) / max(1, self.num_docs)
+        self.doc_terms = [set(doc) for doc in documents]
+        # term -> [(doc id, term frequency)]
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        for doc_id, doc in enumerate(documents):
+            for term, freq in Counter(doc).items():
+                self.postings.setdefault(term, []).append((doc_id, freq))
+
+    def idf(self, term: str) -> float:
+        """Inverse document frequency; unseen terms get the maximum."""
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+
+    def search(self, terms: List[str], limit: int = 5) -> List[Tuple[int, float]]:
+        """
+        Rank documents for a tokenized query.
+
+        Returns:
+            Up to `limit` (doc id, score) pairs, best first
+        """
+        scores: Dict[int, float] = {}
+        for term in set(terms):
+            idf = self.idf(term)
+            for doc_id, freq in self.postings.get(term, ()):
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (BM25_K1 + 1) / (freq + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def overlap(self, terms: List[str], doc_id: int) -> Tuple[float, float]:
+        """
+        IDF-weighted term overlap between a query and a document.
+
+        Returns:
+            Tuple of (share of the query covered, share of the document covered)
+        """
+        query = set(terms)
+        doc = self.doc_terms[doc_id]
+        shared = sum(self.idf(t) for t in query & doc)
+        query_weight = sum(self.idf(t) for t in query)
+        doc_weight = sum(self.idf(t) for t in doc)
+        return (
+            shared / query_weight if query_weight else 0.0,
+            shared / doc_weight if doc_weight else 0.0,
+        )
+
+
+class KnowledgeBase:
+    """Question and answer-paragraph indexes over the curated entries."""
+
+    def __init__(self, entries: List[dict]):
+        self.entries = entries
+        self._question_entry: List[int] = []
+        # Terms of all questions of each entry, for the direct-answer coverage check
+        self._entry_terms: List[set] = []
+        questions = []
+        self._paragraphs: List[Tuple[int, str]] = []
+        for entry_id, entry in enumerate(entries):
+            self._entry_terms.append(set())
+            for question in entry["questions"]:
+                questions.append(tokenize(question))
+                self._question_entry.append(entry_id)
+                self._entry_terms[entry_id].update(questions[-1])
+            for paragraph in entry["answer"].split("\n\n"):
+                self._paragraphs.append((entry_id, paragraph.strip()))
+
+        self.question_index = BM25Index(questions)
+        # Paragraphs are indexed together with their entry's questions so a
+        # list of bullets still matches the topic it belongs to
+        self.paragraph_index = BM25Index([
+            tokenize(paragraph) + tokenize(" ".join(entries[entry_id]["questions"]))
+            for entry_id, paragraph in self._paragraphs
+        ])
+
+    def _entry_question_shares(self, terms: List[str]) -> Dict[int, float]:
+        """Best share of the query covered by any question of each entry."""
+        shares: Dict[int, float] = {}
+        for doc_id, _ in self.question_index.search(terms, limit=len(self._question_entry)):
+            entry_id = self._question_entry[doc_id]
+            query_share, _ = self.question_index.overlap(terms, doc_id)
+            shares[entry_id] = max(shares.get(entry_id, 0.0), query_share)
+        return shares
+
+    def search(self, message: str) -> Optional[dict]:
+        """
+        Match a message against the knowledge base.
+
+        Args:
+            message: User's message
+
+        Returns:
+            None without a usable match, otherwise a dict with "kind"
+            ("direct" or "snippet"), "entry_id", "confidence" and either the
+            full "answer" or a reference "snippet"
+        """
+        terms = tokenize(message)
+        if not terms:
+            return None
+
+        best_entry, confidence = None, 0.0
+        for doc_id, _ in self.question_index.search(terms):
+            query_share, question_share = self.question_index.overlap(terms, doc_id)
+            if query_share + question_share == 0:
+                continue
+            score = 2 * query_share * question_share / (query_share + question_share)
+            if score > confidence:
+                best_entry, confidence = self._question_entry[doc_id], score
+
+        if (
+            best_entry is not None
+            and confidence >= KB_DIRECT_THRESHOLD
+            and self._entry_terms[best_entry].issuperset(terms)
+        ):
+            entry = self.entries[best_entry]
+            return {
+                "kind": "direct",
+                "entry_id": entry["id"],
+                "confidence": round(confidence, 3),
+                "answer": f"{entry['answer']}\n\n{KB_DISCLAIMER}",
+            }
+
+        # A snippet must cover the message and come from an entry whose
+        # questions share a meaningful part of it, so common words like
+        # "period" alone don't pull in an unrelated topic
+        question_shares = self._entry_question_shares(terms)
+        for paragraph_id, _ in self.paragraph_index.search(terms):
+            entry_id, paragraph = self._paragraphs[paragraph_id]
+            query_share, _ = self.paragraph_index.overlap(terms, paragraph_id)
+            if query_share >= KB_SNIPPET_THRESHOLD and question_shares.get(entry_id, 0.0) >= MIN_ENTRY_SHARE:
+                confidence = query_share
+                break
+        else:
+            return None
+
+        if len(paragraph) > MAX_SNIPPET_CHARS:
+            paragraph = paragraph[:MAX_SNIPPET_CHARS].rsplit(" ", 1)[0] + "…"
+        return {
+            "kind": "snippet",
+            "entry_id": self.entries[entry_id]["id"],
+            "confidence": round(confidence, 3),
+            "snippet": paragraph,
+        }
+
+
+knowledge_base = KnowledgeBase(KNOWLEDGE_BASE)
+
+
+def check_probes(kb: KnowledgeBase = knowledge_base) -> List[str]:
+    """
+    Run the KB_PROBES messages through a knowledge base.
+
+    Returns:
+        A description of each probe whose match differs from the expected one
+    """
+    failures = []
+    for message, kind, entry_id in KB_PROBES:
+        match = kb.search(message)
+        got = (match["kind"], match["entry_id"]) if match else (None, None)
+        if got != (kind, entry_id if kind else None):
+            failures.append(f"{message!r}: expected {kind} {entry_id}, got {got[0]} {got[1]} {match and match['confidence']}")
+    return failures
+
+
+if __name__ == "__main__":
+    failures = check_probes()
+    for failure in failures:
+        print(failure)
+    print(f"{len(KB_PROBES) - len(failures)}/{len(KB_PROBES)} knowledge base probes passed")
+    sys.exit(1 if failures else 0)
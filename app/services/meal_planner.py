@@ -0,0 +1,177 @@
+"""
+Daily meal plan generator.
+
+Chooses servings (in half-serving steps) of database foods for breakfast,
+lunch, dinner and a snack so the day lands close to the calorie and macro
+targets of calculate_daily_needs, with each meal near its share of the
+calories, micronutrient goals met where possible, and foods recommended for
+the cycle phase preferred.
+
+This is a small bounded integer program (a multi-constraint knapsack). It is
+solved by steepest-descent local search: every step scores all possible
+"add half a serving" and "remove half a serving" moves at once with array
+arithmetic over the precomputed nutrient matrix and applies the best one,
+until no move improves the plan. The result is deterministic for a given
+request and takes a few milliseconds.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from app.models.food_database import FOOD_NUTRIENTS, MEAL_SLOTS, MICRONUTRIENT_TARGETS
+from app.models.schemas import CyclePhase, MealPlanRequest, MealPlanResponse
+from app.services.food_database import FoodDatabase, food_db
+from app.services.nutrition import NutritionService, get_cycle_phase
+
+# Calorie share of each meal slot, in MEAL_SLOTS order
+MEAL_CALORIE_SHARES = np.array([0.25, 0.35, 0.30, 0.10])
+MAX_ITEMS_PER_MEAL = 4
+SERVING_STEP = 0.5
+MAX_STEPS_PER_FOOD = 4  # Up to two servings of a food
+
+# Cost weights on squared relative deviations from the targets
+MACRO_WEIGHTS = {"calories": 4.0, "protein": 2.0, "carbs": 1.0, "fats": 1.0}
+MICRONUTRIENT_WEIGHT = 0.5  # Only shortfalls count
+MEAL_CALORIE_WEIGHT = 1.0
+PHASE_FOOD_BONUS = 0.002  # Per half serving of a food recommended for the phase
+
+MAX_MOVES = 200
+
+MACRO_COLUMNS = [FOOD_NUTRIENTS.index(name) for name in MACRO_WEIGHTS]
+MICRO_COLUMNS = [FOOD_NUTRIENTS.index(name) for name in MICRONUTRIENT_TARGETS]
+CALORIE_COLUMN = FOOD_NUTRIENTS.index("calories")
+
+
+def _nutrient_cost(relative: np.ndarray, macro_weights: np.ndarray) -> np.ndarray:
+    """Cost of relative daily totals (last axis: nutrients)."""
+    macro = relative[..., MACRO_COLUMNS] - 1
+    shortfall = np.minimum(relative[..., MICRO_COLUMNS] - 1, 0)
+    return (macro * macro) @ macro_weights + MICRONUTRIENT_WEIGHT * (shortfall * shortfall).sum(axis=-1)
+
+
+def _meal_cost(relative: np.ndarray) -> np.ndarray:
+    """Cost of relative meal calories."""
+    return MEAL_CALORIE_WEIGHT * (relative - 1) ** 2
+
+
+def optimize_servings(
+    db: FoodDatabase,
+    targets: np.ndarray,
+    allowed: np.ndarray,
+    phase_mask: np.ndarray,
+) -> np.ndarray:
+    """
+    Search half-serving counts per meal slot and food.
+
+    Args:
+        db: Food database
+        targets: Daily target per FOOD_NUTRIENTS entry
+        allowed: Boolean (slots x foods) mask of usable foods per slot
+        phase_mask: Foods recommended for the phase
+
+    Returns:
+        Integer (slots x foods) array of half servings
+    """
+    slots, foods = allowed.shape
+    macro_weights = np.array(list(MACRO_WEIGHTS.values()))
+    # Change of the relative daily totals and meal calories per half serving
+    step = db.nutrients * SERVING_STEP / targets
+    meal_targets = targets[CALORIE_COLUMN] * MEAL_CALORIE_SHARES
+    meal_step = (db.nutrients[:, CALORIE_COLUMN] * SERVING_STEP)[None, :] / meal_targets[:, None]
+    bonus = PHASE_FOOD_BONUS * phase_mask
+
+    units = np.zeros((slots, foods), dtype=np.int64)
+    relative = np.zeros(len(targets))
+    meal_relative = np.zeros(slots)
+    cost = _nutrient_cost(relative, macro_weights) + _meal_cost(meal_relative).sum()
+
+    for _ in range(MAX_MOVES):
+        used = units > 0
+        items = used.sum(axis=1)
+        # Each food appears in at most one meal, each meal has a few foods
+        used_elsewhere = used.sum(axis=0)[None, :] - used > 0
+        can_add = allowed & (units < MAX_STEPS_PER_FOOD) & ~used_elsewhere & (used | (items < MAX_ITEMS_PER_MEAL)[:, None])
+
+        meal_base = _meal_cost(meal_relative)
+        meal_other = meal_base.sum() - meal_base[:, None]
+        candidates = []
+        for sign in (1, -1):
+            daily = _nutrient_cost(relative + sign * step, macro_weights)[None, :]
+            meals = meal_other + _meal_cost(meal_relative[:, None] + sign * meal_step)
+            total = daily + meals - sign * bonus[None, :]
+            candidates.append(np.where(can_add if sign > 0 else used, total, np.inf))
+
+        # Phase bonus of what is already chosen is common to every move
+        moves = np.stack(candidates) - (bonus * units).sum()
+        best = np.unravel_index(np.argmin(moves), moves.shape)
+        if not moves[best] < cost - 1e-12:
+            break
+        sign = 1 if best[0] == 0 else -1
+        slot, food = best[1], best[2]
+        units[slot, food] += sign
+        relative += sign * step[food]
+        meal_relative[slot] += sign * meal_step[slot, food]
+        cost = moves[best]
+    return units
+
+
+def generate_meal_plan(request: MealPlanRequest, db: FoodDatabase = food_db) -> MealPlanResponse:
+    """
+    Generate a one-day meal plan for a profile and cycle day.
+
+    Args:
+        request: Profile, cycle day and dietary filters
+        db: Food database to plan from
+
+    Returns:
+        Meals with servings and nutrients, plus day totals and targets
+
+    Raises:
+        ValueError: If an excluded food id is unknown
+    """
+    plan = NutritionService.calculate_daily_needs(request.profile)
+    targets = {
+        "calories": plan.calories, "protein": plan.protein, "carbs": plan.carbs, "fats": plan.fats,
+        **MICRONUTRIENT_TARGETS,
+    }
+    target_vector = np.array([targets[name] for name in FOOD_NUTRIENTS], dtype=np.float64)
+
+    phase: Optional[CyclePhase] = None
+    phase_mask = np.zeros(len(db.foods), dtype=bool)
+    if request.cycle_day is not None:
+        current_day = ((request.cycle_day - 1) % request.cycle_length) + 1
+        phase = get_cycle_phase(current_day, request.cycle_length)
+        phase_mask = db.select(phase=phase)
+
+    usable = db.select(diet=request.diet, gluten_free=request.gluten_free, exclude=request.exclude_foods)
+    units = optimize_servings(db, target_vector, db.meal_masks & usable[None, :], phase_mask)
+
+    meals = []
+    for slot, name in enumerate(MEAL_SLOTS):
+        items = []
+        for food in np.flatnonzero(units[slot]):
+            servings = units[slot, food] * SERVING_STEP
+            entry = db.foods[food]
+            items.append({
+                "food_id": entry["id"],
+                "name": entry["name"],
+                "servings": servings,
+                "serving_size": entry["serving"],
+                "nutrients": {
+                    nutrient: round(float(value) * servings, 1)
+                    for nutrient, value in zip(FOOD_NUTRIENTS, db.nutrients[food])
+                },
+            })
+        calories = float(units[slot] @ db.nutrients[:, CALORIE_COLUMN]) * SERVING_STEP
+        meals.append({"name": name, "items": items, "calories": round(calories, 1)})
+
+    totals = (units.sum(axis=0) * SERVING_STEP) @ db.nutrients
+    chosen = units.sum(axis=0) > 0
+    return MealPlanResponse(
+        phase=phase,
+        targets=targets,
+        totals={name: round(float(value), 1) for name, value in zip(FOOD_NUTRIENTS, totals)},
+        meals=meals,
+        phase_foods=[db.foods[i]["name"] for i in np.flatnonzero(chosen & phase_mask)],
+    )
@@ -1,8 +1,221 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
 from app.models.schemas import (
     NutritionProfileRequest, NutritionPlanResponse, NutritionGoal, ActivityLevel,
     DailyNutritionTip, CyclePhase, NutrientInfo, NutritionAlert, SymptomData, LifestyleData
 )
+from app.services.risk_scoring import encode_json
+from app.utils.http_cache import CachedBody
+
+ACTIVITY_MULTIPLIERS: Dict[ActivityLevel, float] = {
+    ActivityLevel.SEDENTARY: 1.2,
+    ActivityLevel.LIGHT: 1.375,
+    ActivityLevel.MODERATE: 1.55,
+    ActivityLevel.ACTIVE: 1.725,
+    ActivityLevel.VERY_ACTIVE: 1.9
+}
+GOAL_ADJUSTMENTS: Dict[NutritionGoal, int] = {
+    NutritionGoal.WEIGHT_LOSS: -500,
+    NutritionGoal.WEIGHT_GAIN: 500,
+    NutritionGoal.MAINTAIN: 0,
+}
+MIN_DAILY_CALORIES = 1200
+
+# BMI category upper bounds (exclusive); above the last is "Obese"
+BMI_BOUNDS = [18.5, 25, 30]
+BMI_CATEGORIES = ["Underweight", "Normal", "Overweight", "Obese"]
+
+# Code order of the enum columns in batch calculations
+ACTIVITY_LEVELS = list(ActivityLevel)
+NUTRITION_GOALS = list(NutritionGoal)
+
+# Cycle lengths accepted by the tips endpoints
+MIN_CYCLE_LENGTH = 20
+MAX_CYCLE_LENGTH = 45
+
+PHASE_TIPS: Dict[CyclePhase, dict] = {
+    CyclePhase.MENSTRUAL: {
+        "focus": "Iron Replenishment & Hydration",
+        "foods_to_eat": ["Spinach", "Beetroot", "Jaggery", "Dates", "Red Meat/Eggs", "Warm Soups"],
+        "foods_to_avoid": ["Caffeine (inhibits iron absorption)", "Salty foods (bloating)", "Cold foods"],
+        "tip_of_the_day": "Your iron levels drop during periods. Pair iron-rich foods with Vitamin C (like lemon/oranges) for better absorption.",
+    },
+    CyclePhase.FOLLICULAR: {
+        "focus": "Energy Boosting & Balanced Carbs",
+        "foods_to_eat": ["Oats", "Quinoa", "Berries", "Nuts & Seeds", "Fermented foods (Yogurt)"],
+        "foods_to_avoid": ["Heavy, greasy foods", "Excess sugar"],
+        "tip_of_the_day": "Estrogen is rising! You have more energy now. Focus on complex carbs and healthy fats to sustain this energy.",
+    },
+    CyclePhase.OVULATION: {
+        "focus": "High Protein & Fiber",
+        "foods_to_eat": ["Paneer/Tofu", "Chicken/Fish", "Lentils", "Leafy Greens", "Berries"],
+        "foods_to_avoid": ["Processed carbs", "Excess salt"],
+        "tip_of_the_day": "Your body temperature rises slightly. Stay hydrated and eat fiber-rich foods to help eliminate excess estrogen.",
+    },
+    CyclePhase.LUTEAL: {
+        "focus": "Bloating Control & Mood Support",
+        "foods_to_eat": ["Bananas (Potassium)", "Dark Chocolate (Magnesium)", "Green Tea", "Sweet Potato", "Ginger"],
+        "foods_to_avoid": ["Caffeine", "Alcohol", "Salty snacks", "Sugary treats"],
+        "tip_of_the_day": "PMS cravings might kick in. Choose dark chocolate over milk chocolate and drink herbal teas to reduce bloating.",
+    },
+}
+PHASES = list(PHASE_TIPS)
+
+ESSENTIAL_NUTRIENTS = [
+    {
+        "name": "Iron",
+        "importance": "Crucial for replacing blood loss during periods and preventing anemia/fatigue.",
+        "food_sources": ["Spinach", "Beetroot", "Dates", "Jaggery", "Lentils", "Red meat"],
+    },
+    {
+        "name": "Calcium",
+        "importance": "Essential for bone health and reducing PMS symptoms like cramps.",
+        "food_sources": ["Milk", "Curd/Yogurt", "Paneer", "Ragi", "Almonds", "Sesame seeds"],
+    },
+    {
+        "name": "Vitamin D",
+        "importance": "Regulates mood, supports bone health, and boosts immunity.",
+        "food_sources": ["Sunlight (Morning)", "Mushrooms", "Fortified Milk", "Egg yolks", "Fatty fish"],
+    },
+    {
+        "name": "Folic Acid (Vitamin B9)",
+        "importance": "Vital for reproductive health and cell growth.",
+        "food_sources": ["Dark leafy greens", "Citrus fruits", "Beans", "Peas", "Avocado"],
+    },
+    {
+        "name": "Omega-3 Fatty Acids",
+        "importance": "Reduces inflammation, balances hormones, and lowers stress.",
+        "food_sources": ["Flax seeds", "Chia seeds", "Walnuts", "Fatty fish (Salmon/Mackerel)"],
+    },
+    {
+        "name": "Magnesium",
+        "importance": "Nature's relaxant - helps with sleep, cramps, and mood swings.",
+        "food_sources": ["Dark Chocolate", "Pumpkin seeds", "Almonds", "Bananas", "Leafy greens"],
+    },
+]
+
+
+def round_like_python(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    Round an array exactly as the built-in round() rounds each float.
+
+    np.round scales by 10**ndigits first, which can tip values lying
+    within float error of a half the other way; those few are redone with
+    round() so batch results match the single-item calculation exactly.
+    """
+    rounded = np.round(values, ndigits)
+    scaled = values * 10 ** ndigits
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_half):
+        rounded[i] = round(float(values[i]), ndigits)
+    return rounded
+
+
+def get_cycle_phase(current_day: int, cycle_length: int) -> CyclePhase:
+    """
+    Phase of a day within the cycle.
+
+    Approximate phases: menstrual 1-5, follicular 6-13, ovulation on day 14
+    or within a day of mid-cycle, luteal for the rest.
+
+    Args:
+        current_day: Day of the cycle, 1..cycle_length
+        cycle_length: Average cycle length in days
+    """
+    if 1 <= current_day <= 5:
+        return CyclePhase.MENSTRUAL
+    if 6 <= current_day <= 13:
+        return CyclePhase.FOLLICULAR
+    if current_day == 14 or (cycle_length/2 - 1 <= current_day <= cycle_length/2 + 1):
+        return CyclePhase.OVULATION
+    return CyclePhase.LUTEAL
+
+
+class NutritionTipTable:
+    """
+    Pre-encoded bodies of the nutrition tip and essentials endpoints.
+
+    A tip depends only on the phase, and the phase only on (cycle length,
+    normalized day), so the table holds one encoded body per phase plus a
+    cycle length x day array of phase indices. Bodies carry strong ETags
+    for conditional requests.
+    """
+
+    def __init__(self):
+        self.phase_index: Optional[np.ndarray] = None
+        self.tips: List[CachedBody] = []
+        self.essentials: Optional[CachedBody] = None
+
+    def build(self):
+        """Compute and encode every response; a no-op once built."""
+        if self.phase_index is not None:
+            return
+        lengths = range(MIN_CYCLE_LENGTH, MAX_CYCLE_LENGTH + 1)
+        phase_index = np.zeros((len(lengths), MAX_CYCLE_LENGTH), dtype=np.int8)
+        for row, cycle_length in enumerate(lengths):
+            for current_day in range(1, cycle_length + 1):
+                phase_index[row, current_day - 1] = PHASES.index(get_cycle_phase(current_day, cycle_length))
+        self.tips = [
+            CachedBody(encode_json(jsonable_encoder(DailyNutritionTip(phase=phase, **PHASE_TIPS[phase]))))
+            for phase in PHASES
+        ]
+        self.essentials = CachedBody(encode_json(jsonable_encoder(NutritionService.get_essential_nutrients())))
+        self.phase_index = phase_index
+
+    def phases(self, cycle_days: np.ndarray, cycle_length: int) -> np.ndarray:
+        """Phase index (into PHASES) for each of many cycle days."""
+        if self.phase_index is None:
+            self.build()
+        current_days = np.mod(np.asarray(cycle_days) - 1, cycle_length)
+        return self.phase_index[cycle_length - MIN_CYCLE_LENGTH, current_days]
+
+    def tip(self, cycle_day: int, cycle_length: int) -> CachedBody:
+        """Encoded /nutrition/tips body for a cycle day."""
+        if self.phase_index is None:
+            self.build()
+        current_day = (cycle_day - 1) % cycle_length
+        return self.tips[self.phase_index[cycle_length - MIN_CYCLE_LENGTH, current_day]]
+
+    def calendar(self, period_start: str, from_date: str, days: int, cycle_length: int, predicted: bool = False) -> bytes:
+        """
+        Encoded phase calendar for a date range.
+
+        Cycle days, phases and tip references for every date are computed
+        with array operations; each distinct tip is included once.
+
+        Args:
+            period_start: Cycle day 1 (YYYY-MM-DD)
+            from_date: First calendar date (YYYY-MM-DD)
+            days: Number of calendar days
+            cycle_length: Average cycle length
+            predicted: Whether cycle_length was predicted
+
+        Returns:
+            PhaseCalendarResponse JSON
+        """
+        dates = np.datetime64(from_date, "D") + np.arange(days)
+        offsets = (dates - np.datetime64(period_start, "D")).astype(np.int64)
+        cycle_days = np.mod(offsets, cycle_length) + 1
+        phases = self.phases(cycle_days, cycle_length)
+        used, tip_refs = np.unique(phases, return_inverse=True)
+        calendar_days = [
+            {"date": day, "cycle_day": cycle_day, "phase": PHASES[phase].value, "tip": tip}
+            for day, cycle_day, phase, tip in zip(
+                np.datetime_as_string(dates).tolist(), cycle_days.tolist(), phases.tolist(), tip_refs.tolist()
+            )
+        ]
+        head = encode_json({"cycle_length": cycle_length, "predicted": predicted, "days": calendar_days})
+        # Splice in the pre-encoded tips
+        return head[:-1] + b',"tips":[' + b",".join(self.tips[phase].body for phase in used.tolist()) + b"]}"
+
+    def essential_nutrients(self) -> CachedBody:
+        """Encoded /nutrition/essentials body."""
+        if self.phase_index is None:
+            self.build()
+        return self.essentials
 
 class NutritionService:
     @staticmethod
@@ -16,27 +229,16 @@ class NutritionService:
         bmr = (10 * profile.weight) + (6.25 * profile.height) - (5 * profile.age) - 161
 
         # 2. Calculate TDEE (Total Daily Energy Expenditure)
-        activity_multipliers = {
-            ActivityLevel.SEDENTARY: 1.2,
-            ActivityLevel.LIGHT: 1.375,
-            ActivityLevel.MODERATE: 1.55,
-            ActivityLevel.ACTIVE: 1.725,
-            ActivityLevel.VERY_ACTIVE: 1.9
-        }
-        tdee = bmr * activity_multipliers[profile.activity_level]
+        tdee = bmr * ACTIVITY_MULTIPLIERS[profile.activity_level]
 
         # 3. Adjust for Goal
-        goal_adjustment = 0
-        if profile.goal == NutritionGoal.WEIGHT_LOSS:
-            goal_adjustment = -500
-        elif profile.goal == NutritionGoal.WEIGHT_GAIN:
-            goal_adjustment = 500
+        goal_adjustment = GOAL_ADJUSTMENTS[profile.goal]
         
         daily_calories = int(tdee + goal_adjustment)
         
         # Ensure calories don't drop too low
-        if daily_calories < 1200:
-            daily_calories = 1200
+        if daily_calories < MIN_DAILY_CALORIES:
+            daily_calories = MIN_DAILY_CALORIES
 
         # 4. Calculate Macros (Approximate split: 30% P, 35% C, 35% F)
         # Protein: 4 cal/g, Carbs: 4 cal/g, Fats: 9 cal/g
@@ -69,97 +271,66 @@ class NutritionService:
             bmi_category=bmi_category
         )
 
+    @staticmethod
+    def calculate_daily_needs_batch(
+        age: np.ndarray,
+        height: np.ndarray,
+        weight: np.ndarray,
+        activity_codes: np.ndarray,
+        goal_codes: np.ndarray,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Calculate daily needs for many profiles at once.
+
+        Evaluates the same formulas as calculate_daily_needs over whole
+        columns, with identical results.
+
+        Args:
+            age, height, weight: Profile values, one entry per profile
+            activity_codes: Index into ACTIVITY_LEVELS per profile
+            goal_codes: Index into NUTRITION_GOALS per profile
+
+        Returns:
+            NutritionPlanResponse fields as columns; bmi_category holds
+            indices into BMI_CATEGORIES
+        """
+        multipliers = np.array([ACTIVITY_MULTIPLIERS[level] for level in ACTIVITY_LEVELS])
+        adjustments = np.array([GOAL_ADJUSTMENTS[goal] for goal in NUTRITION_GOALS], dtype=np.float64)
+
+        bmr = (10 * weight) + (6.25 * height) - (5 * age) - 161
+        tdee = bmr * multipliers[activity_codes]
+        # int() truncates toward zero
+        daily_calories = np.trunc(tdee + adjustments[goal_codes]).astype(np.int64)
+        daily_calories = np.maximum(daily_calories, MIN_DAILY_CALORIES)
+
+        height_m = height / 100
+        bmi = round_like_python(weight / (height_m * height_m), 1)
+        return {
+            "calories": daily_calories,
+            "protein": np.trunc((daily_calories * 0.30) / 4).astype(np.int64),
+            "carbs": np.trunc((daily_calories * 0.35) / 4).astype(np.int64),
+            "fats": np.trunc((daily_calories * 0.35) / 9).astype(np.int64),
+            "water_intake": round_like_python(weight * 0.035, 1),
+            "bmi": bmi,
+            "bmi_category": np.searchsorted(BMI_BOUNDS, bmi, side="right"),
+        }
+
     @staticmethod
     def get_phase_nutrition(cycle_day: int, cycle_length: int = 28) -> DailyNutritionTip:
         """
         Get nutrition tips based on the menstrual cycle phase.
         """
-        # Determine Phase
-        # Assuming standard 28 day cycle for simplicity if not provided, 
-        # but logic scales roughly.
-        
         # Normalize day if > cycle_length
         current_day = ((cycle_day - 1) % cycle_length) + 1
-        
-        # Approximate phases
-        # Menstrual: 1-5
-        # Follicular: 6-13
-        # Ovulation: 14
-        # Luteal: 15-28
-        
-        if 1 <= current_day <= 5:
-            phase = CyclePhase.MENSTRUAL
-            focus = "Iron Replenishment & Hydration"
-            eat = ["Spinach", "Beetroot", "Jaggery", "Dates", "Red Meat/Eggs", "Warm Soups"]
-            avoid = ["Caffeine (inhibits iron absorption)", "Salty foods (bloating)", "Cold foods"]
-            tip = "Your iron levels drop during periods. Pair iron-rich foods with Vitamin C (like lemon/oranges) for better absorption."
-            
-        elif 6 <= current_day <= 13:
-            phase = CyclePhase.FOLLICULAR
-            focus = "Energy Boosting & Balanced Carbs"
-            eat = ["Oats", "Quinoa", "Berries", "Nuts & Seeds", "Fermented foods (Yogurt)"]
-            avoid = ["Heavy, greasy foods", "Excess sugar"]
-            tip = "Estrogen is rising! You have more energy now. Focus on complex carbs and healthy fats to sustain this energy."
-            
-        elif current_day == 14 or (cycle_length/2 - 1 <= current_day <= cycle_length/2 + 1):
-            phase = CyclePhase.OVULATION
-            focus = "High Protein & Fiber"
-            eat = ["Paneer/Tofu", "Chicken/Fish", "Lentils", "Leafy Greens", "Berries"]
-            avoid = ["Processed carbs", "Excess salt"]
-            tip = "Your body temperature rises slightly. Stay hydrated and eat fiber-rich foods to help eliminate excess estrogen."
-            
-        else:
-            phase = CyclePhase.LUTEAL
-            focus = "Bloating Control & Mood Support"
-            eat = ["Bananas (Potassium)", "Dark Chocolate (Magnesium)", "Green Tea", "Sweet Potato", "Ginger"]
-            avoid = ["Caffeine", "Alcohol", "Salty snacks", "Sugary treats"]
-            tip = "PMS cravings might kick in. Choose dark chocolate over milk chocolate and drink herbal teas to reduce bloating."
-
-        return DailyNutritionTip(
-            phase=phase,
-            focus=focus,
-            foods_to_eat=eat,
-            foods_to_avoid=avoid,
-            tip_of_the_day=tip
-        )
+        phase = get_cycle_phase(current_day, cycle_length)
+        return DailyNutritionTip(phase=phase, **PHASE_TIPS[phase])
 
     @staticmethod
     def get_essential_nutrients() -> List[NutrientInfo]:
         """
         Return list of essential nutrients for women.
         """
-        return [
-            NutrientInfo(
-                name="Iron",
-                importance="Crucial for replacing blood loss during periods and preventing anemia/fatigue.",
-                food_sources=["Spinach", "Beetroot", "Dates", "Jaggery", "Lentils", "Red meat"]
-            ),
-            NutrientInfo(
-                name="Calcium",
-                importance="Essential for bone health and reducing PMS symptoms like cramps.",
-                food_sources=["Milk", "Curd/Yogurt", "Paneer", "Ragi", "Almonds", "Sesame seeds"]
-            ),
-            NutrientInfo(
-                name="Vitamin D",
-                importance="Regulates mood, supports bone health, and boosts immunity.",
-                food_sources=["Sunlight (Morning)", "Mushrooms", "Fortified Milk", "Egg yolks", "Fatty fish"]
-            ),
-            NutrientInfo(
-                name="Folic Acid (Vitamin B9)",
-                importance="Vital for reproductive health and cell growth.",
-                food_sources=["Dark leafy greens", "Citrus fruits", "Beans", "Peas", "Avocado"]
-            ),
-            NutrientInfo(
-                name="Omega-3 Fatty Acids",
-                importance="Reduces inflammation, balances hormones, and lowers stress.",
-                food_sources=["Flax seeds", "Chia seeds", "Walnuts", "Fatty fish (Salmon/Mackerel)"]
-            ),
-            NutrientInfo(
-                name="Magnesium",
-                importance="Nature's relaxant - helps with sleep, cramps, and mood swings.",
-                food_sources=["Dark Chocolate", "Pumpkin seeds", "Almonds", "Bananas", "Leafy greens"]
-            )
-        ]
+        return [NutrientInfo(**nutrient) for nutrient in ESSENTIAL_NUTRIENTS]
 
     @staticmethod
     def generate_alerts(symptoms: SymptomData, lifestyle: LifestyleData) -> List[NutritionAlert]:
@@ -205,3 +376,6 @@ class NutritionService:
             ))
 
         return alerts
+
+
+NUTRITION_TIPS = NutritionTipTable()
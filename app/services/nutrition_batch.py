@@ -0,0 +1,184 @@
+"""
+Columnar input and output for bulk nutrition planning.
+
+Profiles arrive as JSON (a list of /nutrition/calculate bodies or an object
+of equal-length arrays), CSV with a header row, or an Arrow IPC stream. All
+are turned into columns, checked against the NutritionProfileRequest
+constraints with array comparisons, and passed to
+NutritionService.calculate_daily_needs_batch.
+"""
+
+import csv
+import io
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from annotated_types import Ge, Le
+
+from app.models.schemas import NutritionProfileRequest
+from app.services.nutrition import ACTIVITY_LEVELS, BMI_CATEGORIES, NUTRITION_GOALS, NutritionService
+from app.services.risk_scoring import encode_json
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+ARROW_AVAILABLE = pa is not None
+
+PROFILE_FIELDS = list(NutritionProfileRequest.model_fields)
+NUMERIC_FIELDS = ["age", "height", "weight"]
+PLAN_FIELDS = ["calories", "protein", "carbs", "fats", "water_intake", "bmi", "bmi_category"]
+
+
+def _bounds(field: str) -> Tuple[float, float]:
+    """Inclusive (ge, le) limits of a profile field, read from the schema."""
+    low, high = -np.inf, np.inf
+    for constraint in NutritionProfileRequest.model_fields[field].metadata:
+        if isinstance(constraint, Ge):
+            low = constraint.ge
+        elif isinstance(constraint, Le):
+            high = constraint.le
+    return low, high
+
+
+FIELD_BOUNDS = {field: _bounds(field) for field in NUMERIC_FIELDS}
+
+
+def columns_from_json(data) -> Dict[str, Sequence]:
+    """
+    Columns from a parsed JSON body.
+
+    Raises:
+        ValueError: If the body is neither a list of profiles nor an object of arrays
+    """
+    if isinstance(data, list):
+        if not all(isinstance(item, dict) for item in data):
+            raise ValueError("Expected a list of profile objects")
+        missing = [field for field in PROFILE_FIELDS if any(field not in item for item in data)]
+        if missing:
+            raise ValueError(f"Missing field '{missing[0]}' in some profiles")
+        return {field: [item[field] for item in data] for field in PROFILE_FIELDS}
+    if isinstance(data, dict):
+        if not all(isinstance(data.get(field), list) for field in PROFILE_FIELDS):
+            raise ValueError(f"Expected arrays for all of: {', '.join(PROFILE_FIELDS)}")
+        return {field: data[field] for field in PROFILE_FIELDS}
+    raise ValueError("Expected a list of profiles or an object of arrays")
+
+
+def columns_from_csv(text: str) -> Dict[str, Sequence]:
+    """
+    Columns from CSV text with a header row naming the profile fields.
+
+    Raises:
+        ValueError: If a field column is missing
+    """
+    rows = csv.reader(io.StringIO(text))
+    header = [name.strip() for name in next(rows, [])]
+    missing = [field for field in PROFILE_FIELDS if field not in header]
+    if missing:
+        raise ValueError(f"CSV header is missing column '{missing[0]}'")
+    positions = [header.index(field) for field in PROFILE_FIELDS]
+    records = [row for row in rows if row]
+    if any(len(row) < len(header) for row in records):
+        raise ValueError("CSV row has fewer values than the header")
+    return {field: [row[position].strip() for row in records] for field, position in zip(PROFILE_FIELDS, positions)}
+
+
+def columns_from_arrow(body: bytes) -> Dict[str, Sequence]:
+    """
+    Columns from an Arrow IPC stream.
+
+    Raises:
+        ValueError: If pyarrow is not installed or a field column is missing
+    """
+    if pa is None:
+        raise ValueError("Reading Arrow requires pyarrow. Please install: pip install pyarrow")
+
+    table = pa.ipc.open_stream(body).read_all()
+    missing = [field for field in PROFILE_FIELDS if field not in table.column_names]
+    if missing:
+        raise ValueError(f"Arrow table is missing column '{missing[0]}'")
+    return {field: table.column(field).to_pylist() for field in PROFILE_FIELDS}
+
+
+def _codes(values: Sequence, choices: List, field: str) -> np.ndarray:
+    """Index of each enum value in choices."""
+    index = {choice.value: code for code, choice in enumerate(choices)}
+    # Lists or objects in a JSON body are unhashable; they are invalid like any unknown value
+    codes = np.array([index.get(value, -1) if isinstance(value, str) else -1 for value in values], dtype=np.int64)
+    bad = np.flatnonzero(codes < 0)
+    if len(bad):
+        allowed = ", ".join(choice.value for choice in choices)
+        raise ValueError(f"Row {bad[0]}: {field} must be one of: {allowed}")
+    return codes
+
+
+def validate_profiles(columns: Dict[str, Sequence]) -> Dict[str, np.ndarray]:
+    """
+    Check columns against the NutritionProfileRequest constraints.
+
+    Returns:
+        Keyword arguments for NutritionService.calculate_daily_needs_batch
+
+    Raises:
+        ValueError: Naming the first invalid row (0-based) and field
+    """
+    lengths = {len(columns[field]) for field in PROFILE_FIELDS}
+    if len(lengths) > 1:
+        raise ValueError("All columns must have the same length")
+
+    values = {}
+    for field in NUMERIC_FIELDS:
+        column = columns[field]
+        try:
+            if any(isinstance(value, bool) for value in column):
+                raise ValueError
+            array = np.array(column, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError(f"{field} must contain only numbers")
+        low, high = FIELD_BOUNDS[field]
+        bad = np.flatnonzero(~((array >= low) & (array <= high)))
+        if len(bad):
+            raise ValueError(f"Row {bad[0]}: {field} must be between {low} and {high}")
+        values[field] = array
+
+    bad = np.flatnonzero(values["age"] != np.floor(values["age"]))
+    if len(bad):
+        raise ValueError(f"Row {bad[0]}: age must be a whole number")
+
+    values["activity_codes"] = _codes(columns["activity_level"], ACTIVITY_LEVELS, "activity_level")
+    values["goal_codes"] = _codes(columns["goal"], NUTRITION_GOALS, "goal")
+    return values
+
+
+def calculate_plans(columns: Dict[str, Sequence]) -> Dict[str, list]:
+    """
+    Validate profile columns and calculate every plan.
+
+    Returns:
+        Plan fields as columns of JSON-ready Python values
+    """
+    plans = NutritionService.calculate_daily_needs_batch(**validate_profiles(columns))
+    result = {field: plans[field].tolist() for field in PLAN_FIELDS}
+    result["bmi_category"] = [BMI_CATEGORIES[code] for code in result["bmi_category"]]
+    return result
+
+
+def encode_records(plans: Dict[str, list]) -> bytes:
+    """JSON array of plans, each as /nutrition/calculate returns it."""
+    return encode_json([dict(zip(PLAN_FIELDS, row)) for row in zip(*(plans[field] for field in PLAN_FIELDS))])
+
+
+def encode_columns(plans: Dict[str, list]) -> bytes:
+    """JSON object of equal-length arrays, one per plan field."""
+    return encode_json(plans)
+
+
+def encode_csv(plans: Dict[str, list]) -> bytes:
+    """CSV with a header row, one plan per row."""
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(PLAN_FIELDS)
+    writer.writerows(zip(*(plans[field] for field in PLAN_FIELDS)))
+    return output.getvalue().encode("utf-8")
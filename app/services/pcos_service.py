@@ -2,7 +2,37 @@
 Service for PCOS risk assessment logic.
 """
 
+from typing import Dict, List
+
+import numpy as np
+
 from app.models.schemas import PCOSRiskRequest, PCOSRiskResponse
+from app.services.risk_scoring import ResponseTable, RuleTable
+
+PCOS_RECOMMENDATIONS = {
+    "Low": "Your symptoms do not strongly suggest PCOS. Maintain a healthy lifestyle and track your cycles.",
+    "Moderate": "You have some symptoms associated with PCOS. Consider monitoring your symptoms and consulting a doctor if they persist.",
+    "High": "Your reported symptoms are strongly associated with PCOS. It is highly recommended to consult a healthcare provider for a proper evaluation.",
+}
+
+# The rules of calculate_pcos_risk, compiled for scoring every answer code at
+# once. PCOS_RESPONSES.build() checks them against calculate_pcos_risk.
+PCOS_RULES = RuleTable(
+    weights={
+        "irregular_periods": [30],
+        "excess_hair_growth": [20],
+        "weight_gain": [15],
+        "family_history": [15],
+        "acne": [10],
+        "dark_skin_patches": [10],
+    },
+    level_bounds=[30, 60],
+    levels=["Low", "Moderate", "High"],
+)
+# Points for an average cycle outside the normal range, unless irregular
+# periods were already reported
+ABNORMAL_CYCLE_POINTS = 20
+
 
 def calculate_pcos_risk(data: PCOSRiskRequest) -> PCOSRiskResponse:
     """
@@ -48,16 +78,91 @@ def calculate_pcos_risk(data: PCOSRiskRequest) -> PCOSRiskResponse:
     # Determine risk level
     if score <= 30:
         risk_level = "Low"
-        recommendation = "Your symptoms do not strongly suggest PCOS. Maintain a healthy lifestyle and track your cycles."
     elif score <= 60:
         risk_level = "Moderate"
-        recommendation = "You have some symptoms associated with PCOS. Consider monitoring your symptoms and consulting a doctor if they persist."
     else:
         risk_level = "High"
-        recommendation = "Your reported symptoms are strongly associated with PCOS. It is highly recommended to consult a healthcare provider for a proper evaluation."
+    recommendation = PCOS_RECOMMENDATIONS[risk_level]
         
     return PCOSRiskResponse(
         risk_score=score,
         risk_level=risk_level,
         recommendation=recommendation
     )
+
+
+def _is_abnormal_cycle(cycle_length_avg) -> bool:
+    """Cycle-length band: whether an average cycle length is outside 21-35 days."""
+    # A missing (or zero) cycle length counts as normal, like the falsy check above
+    return bool(cycle_length_avg) and (cycle_length_avg > 35 or cycle_length_avg < 21)
+
+
+def _abnormal_cycles(items: List[PCOSRiskRequest]) -> np.ndarray:
+    # Checked per item: cycle_length_avg is an unbounded int and may not fit in int64
+    return np.array([_is_abnormal_cycle(item.cycle_length_avg) for item in items], dtype=bool)
+
+
+# Answer code: bit i for PCOS_RULES.fields[i], then one bit for the cycle band
+ABNORMAL_CYCLE_BIT = 1 << len(PCOS_RULES.fields)
+
+
+def pcos_answer_code(data: PCOSRiskRequest) -> int:
+    """Bitmask of the answers that determine a PCOS assessment."""
+    code = ABNORMAL_CYCLE_BIT if _is_abnormal_cycle(data.cycle_length_avg) else 0
+    for bit, field in enumerate(PCOS_RULES.fields):
+        if getattr(data, field):
+            code |= 1 << bit
+    return code
+
+
+def pcos_answer_codes(items: List[PCOSRiskRequest]) -> List[int]:
+    """Answer codes of many questionnaires, computed column-wise."""
+    codes = PCOS_RULES.answer_codes(PCOS_RULES.answer_matrix(items))
+    return (codes + _abnormal_cycles(items) * ABNORMAL_CYCLE_BIT).tolist()
+
+
+def score_pcos_codes(codes: np.ndarray) -> List[Dict]:
+    """
+    Score many PCOS answer codes at once.
+    
+    Applies the rules of calculate_pcos_risk, compiled into PCOS_RULES: the
+    yes/no answers form a boolean matrix that is scored with one matrix
+    product, and risk levels come from the threshold table.
+    
+    Args:
+        codes: Answer codes (see pcos_answer_code)
+        
+    Returns:
+        One result per code, in order, with the fields of PCOSRiskResponse
+    """
+    answers = PCOS_RULES.code_answers(codes & (ABNORMAL_CYCLE_BIT - 1))
+    scores = PCOS_RULES.scores(answers)[:, 0]
+    
+    irregular = answers[:, PCOS_RULES.fields.index("irregular_periods")]
+    abnormal_cycle = ((codes & ABNORMAL_CYCLE_BIT) != 0) & ~irregular
+    scores = scores + abnormal_cycle * ABNORMAL_CYCLE_POINTS
+    
+    levels = PCOS_RULES.level_index(scores)
+    level_names = PCOS_RULES.levels
+    return [
+        {
+            "risk_score": score,
+            "risk_level": level_names[level],
+            "recommendation": PCOS_RECOMMENDATIONS[level_names[level]],
+        }
+        for score, level in zip(scores.tolist(), levels.tolist())
+    ]
+
+
+def _pcos_request_for_code(code: int) -> PCOSRiskRequest:
+    """A questionnaire with the given answer code."""
+    answers = {field: bool(code & (1 << bit)) for bit, field in enumerate(PCOS_RULES.fields)}
+    return PCOSRiskRequest(**answers, cycle_length_avg=40 if code & ABNORMAL_CYCLE_BIT else None)
+
+
+# Every PCOS assessment response, pre-encoded (built at startup)
+PCOS_RESPONSES = ResponseTable(
+    size=ABNORMAL_CYCLE_BIT * 2,
+    score_codes=score_pcos_codes,
+    build_response=lambda code: calculate_pcos_risk(_pcos_request_for_code(code)),
+)
@@ -7,8 +7,8 @@ from datetime import datetime, timedelta
 import numpy as np
 from fastapi import HTTPException
 
-from app.ml.preprocessing import preprocess_data, denormalize, calculate_uncertainty
-from app.ml.model_factory import train_model, predict, get_framework_availability
+from app.ml.preprocessing import calculate_uncertainty
+from app.ml.model_factory import forecast_cycle_length, get_framework_availability
 
 
 def make_prediction(past_cycles: List[int], last_period_date: str, framework: str) -> dict:
@@ -41,27 +41,8 @@ def make_prediction(past_cycles: List[int], last_period_date: str, framework: st
             detail="PyTorch is not installed. Please install: pip install torch"
         )
     
-    # Preprocess data
-    SEQUENCE_LENGTH = 6
-    X, y, min_val, max_val, seq_len = preprocess_data(past_cycles, SEQUENCE_LENGTH)
-    
-    # Train model
-    model = train_model(framework, X, y)
-    
-    # Prepare last sequence for prediction
-    last_sequence = np.array(past_cycles[-seq_len:], dtype=np.float32)
-    last_sequence_normalized = (
-        (last_sequence - min_val) / (max_val - min_val)
-        if max_val != min_val
-        else np.ones_like(last_sequence) * 0.5
-    )
-    
-    # Make prediction
-    predicted_normalized = predict(framework, model, last_sequence_normalized)
-    
-    # Denormalize prediction
-    predicted_cycle_length = denormalize(predicted_normalized, min_val, max_val)
-    predicted_cycle_length = int(round(predicted_cycle_length))
+    # Train model and forecast next cycle length
+    predicted_cycle_length = forecast_cycle_length(framework, past_cycles)
     
     # Calculate next period date
     last_date = datetime.strptime(last_period_date, "%Y-%m-%d")
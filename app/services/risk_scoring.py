@@ -0,0 +1,134 @@
+"""
+Vectorized scoring for rule-based symptom questionnaires.
+
+The single-item services score one answer set with a chain of if-statements.
+The same rules are also compiled into:
+- a weight matrix with one row per yes/no answer and one column per score
+  (e.g. total risk, hypothyroid leaning, hyperthyroid leaning)
+- a threshold table mapping a score to a risk level
+so many answer sets are scored with one boolean-matrix product.
+
+Where the answers fit in a small bitmask, ResponseTable scores every possible
+answer set this way once, checks each result against the single-item scorer,
+and serves the pre-encoded JSON.
+"""
+
+import json
+import operator
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+
+class RuleTable:
+    """Compiled weights and risk-level thresholds of a questionnaire."""
+
+    def __init__(self, weights: Dict[str, Sequence[int]], level_bounds: Sequence[int], levels: Sequence[str]):
+        """
+        Args:
+            weights: Answer field -> points it adds to each score, in the
+                order the single-item function checks them
+            level_bounds: Inclusive upper score of every level but the last
+            levels: Risk level names, lowest first
+        """
+        self.fields: List[str] = list(weights)
+        self.weights = np.array([weights[field] for field in self.fields], dtype=np.int64)
+        self.level_bounds = np.asarray(level_bounds, dtype=np.int64)
+        self.levels = list(levels)
+        self._get_answers = operator.attrgetter(*self.fields)
+
+    def answer_matrix(self, items: Sequence) -> np.ndarray:
+        """Boolean matrix of the items' answers, one row per item."""
+        answers = np.array([self._get_answers(item) for item in items], dtype=bool)
+        return answers.reshape(len(items), len(self.fields))
+
+    def answer_codes(self, answers: np.ndarray) -> np.ndarray:
+        """Each row of answers packed into an integer, bit i set for field i."""
+        return answers.astype(np.int64) @ (1 << np.arange(len(self.fields), dtype=np.int64))
+
+    def code_answers(self, codes: np.ndarray) -> np.ndarray:
+        """Boolean answer matrix of answer codes (inverse of answer_codes)."""
+        return (codes[:, None] >> np.arange(len(self.fields), dtype=np.int64)) & 1 == 1
+
+    def scores(self, answers: np.ndarray) -> np.ndarray:
+        """Scores per item (rows) and score column (columns)."""
+        return answers.astype(np.int64) @ self.weights
+
+    def level_index(self, scores: np.ndarray) -> np.ndarray:
+        """Index into `levels` for each score."""
+        return np.searchsorted(self.level_bounds, scores, side="left")
+
+
+def encode_json(content) -> bytes:
+    """Encode JSON exactly like FastAPI's JSONResponse."""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+class ResponseTable:
+    """
+    Pre-encoded JSON responses for every answer code of a questionnaire.
+
+    When a response is a pure function of a small bitmask, all responses are
+    computed once (at startup) and requests are answered by indexing the
+    table, with no scoring or response model on the request path.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        score_codes: Callable[[np.ndarray], List[dict]],
+        build_response: Callable[[int], BaseModel],
+    ):
+        """
+        Args:
+            size: Number of answer codes (2 ** bits)
+            score_codes: Scores an array of answer codes with the compiled
+                RuleTable, returning the response fields of each
+            build_response: Computes the response model for one answer code
+                with the single-item scorer
+        """
+        self.size = size
+        self._score_codes = score_codes
+        self._build_response = build_response
+        self._entries: Optional[List[bytes]] = None
+
+    def build(self):
+        """
+        Compute and encode every response; a no-op once built.
+
+        Raises:
+            RuntimeError: If the compiled rules and the single-item scorer
+                disagree on any answer code
+        """
+        if self._entries is not None:
+            return
+        scored = self._score_codes(np.arange(self.size, dtype=np.int64))
+        entries = []
+        for code, fields in enumerate(scored):
+            response = jsonable_encoder(self._build_response(code))
+            if fields != response:
+                raise RuntimeError(
+                    f"Rule table disagrees with the single-item scorer for answer code {code}: "
+                    f"{fields} != {response}"
+                )
+            entries.append(encode_json(response))
+        self._entries = entries
+
+    def get(self, code: int) -> bytes:
+        """Encoded response for an answer code."""
+        if self._entries is None:
+            self.build()
+        return self._entries[code]
+
+    def join(self, codes: Sequence[int]) -> bytes:
+        """Encoded JSON array of the responses for many answer codes."""
+        if self._entries is None:
+            self.build()
+        entries = self._entries
+        return b"[" + b",".join([entries[code] for code in codes]) + b"]"
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(len(entry) for entry in self._entries) if self._entries else 0
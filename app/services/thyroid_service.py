@@ -2,8 +2,62 @@
 Service for Thyroid Tracker logic.
 """
 
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict
+
+import numpy as np
+from fastapi import HTTPException
+from pydantic import ValidationError
+
 from app.models.schemas import ThyroidRiskRequest, ThyroidRiskResponse, ThyroidSymptomLog
+from app.services.risk_scoring import ResponseTable, RuleTable
+
+THYROID_RECOMMENDATIONS = {
+    "Low": "Your symptoms do not strongly suggest a thyroid imbalance. Continue to monitor your health.",
+    "Moderate": "You have some symptoms that could be related to {leaning} issues. Consider tracking your symptoms for a few weeks.",
+    "High": "Your symptoms strongly align with {leaning} patterns. It is recommended to consult a doctor for a TSH/T3/T4 test.",
+}
+
+# The rules of calculate_thyroid_risk, compiled for scoring every answer code
+# at once. THYROID_RESPONSES.build() checks them against calculate_thyroid_risk.
+# Columns: total score, hypothyroid leaning, hyperthyroid leaning
+THYROID_RULES = RuleTable(
+    weights={
+        "unexplained_weight_gain": [10, 10, 0],
+        "constant_fatigue": [10, 5, 0],
+        "cold_intolerance": [10, 10, 0],
+        "dry_skin": [10, 10, 0],
+        "hair_loss": [10, 5, 5],
+        "unexplained_weight_loss": [10, 0, 10],
+        "heat_intolerance": [10, 0, 10],
+        "palpitations": [10, 0, 10],
+        "tremors": [10, 0, 10],
+        "irregular_periods": [15, 0, 0],
+        "family_history": [15, 0, 0],
+        "neck_swelling": [20, 0, 0],
+        "mood_changes": [10, 0, 0],
+    },
+    level_bounds=[20, 50],
+    levels=["Low", "Moderate", "High"],
+)
+# matched_symptoms labels, in THYROID_RULES.fields order
+THYROID_SYMPTOM_LABELS = [
+    "Unexplained weight gain",
+    "Constant fatigue",
+    "Cold intolerance",
+    "Dry skin",
+    "Hair loss",
+    "Unexplained weight loss",
+    "Heat intolerance",
+    "Heart palpitations",
+    "Tremors",
+    "Irregular periods",
+    "Family history",
+    "Neck swelling (Goiter)",
+    "Mood changes",
+]
+# Indexed by sign(hypo - hyper) + 1
+CONDITION_LEANINGS = ["Hyperthyroid", "Unclear", "Hypothyroid"]
+
 
 def calculate_thyroid_risk(data: ThyroidRiskRequest) -> ThyroidRiskResponse:
     """
@@ -93,13 +147,11 @@ def calculate_thyroid_risk(data: ThyroidRiskRequest) -> ThyroidRiskResponse:
     # Determine Risk Level
     if score <= 20:
         risk_level = "Low"
-        recommendation = "Your symptoms do not strongly suggest a thyroid imbalance. Continue to monitor your health."
     elif score <= 50:
         risk_level = "Moderate"
-        recommendation = f"You have some symptoms that could be related to {condition_leaning} issues. Consider tracking your symptoms for a few weeks."
     else:
         risk_level = "High"
-        recommendation = f"Your symptoms strongly align with {condition_leaning} patterns. It is recommended to consult a doctor for a TSH/T3/T4 test."
+    recommendation = THYROID_RECOMMENDATIONS[risk_level].format(leaning=condition_leaning)
 
     return ThyroidRiskResponse(
         risk_score=score,
@@ -109,38 +161,171 @@ def calculate_thyroid_risk(data: ThyroidRiskRequest) -> ThyroidRiskResponse:
         matched_symptoms=matched_symptoms
     )
 
-def analyze_thyroid_symptoms(logs: List[ThyroidSymptomLog]) -> Dict:
-    """
-    Analyze a list of daily symptom logs to detect patterns.
+def score_thyroid_codes(codes: np.ndarray) -> List[Dict]:
     """
-    if not logs:
-        return {"status": "No data", "insights": []}
+    Score many thyroid answer codes at once.
+    
+    Applies the rules of calculate_thyroid_risk, compiled into THYROID_RULES:
+    one matrix product yields the total, hypothyroid and hyperthyroid scores
+    of every code, and recommendations come from a table precomputed per
+    (risk level, leaning).
+    
+    Args:
+        codes: Answer codes (see thyroid_answer_code)
         
-    insights = []
-    alert_triggered = False
+    Returns:
+        One result per code, in order, with the fields of ThyroidRiskResponse
+    """
+    answers = THYROID_RULES.code_answers(codes)
+    scores = THYROID_RULES.scores(answers)
+    totals = scores[:, 0]
+    leanings = np.sign(scores[:, 1] - scores[:, 2]) + 1
+    levels = THYROID_RULES.level_index(totals)
+    
+    recommendations = [
+        [THYROID_RECOMMENDATIONS[level].format(leaning=leaning) for leaning in CONDITION_LEANINGS]
+        for level in THYROID_RULES.levels
+    ]
+    labels = np.array(THYROID_SYMPTOM_LABELS, dtype=object)
+    return [
+        {
+            "risk_score": total,
+            "risk_level": THYROID_RULES.levels[level],
+            "condition_leaning": CONDITION_LEANINGS[leaning],
+            "recommendation": recommendations[level][leaning],
+            "matched_symptoms": labels[row].tolist(),
+        }
+        for total, level, leaning, row in zip(totals.tolist(), levels.tolist(), leanings.tolist(), answers)
+    ]
+
+
+def thyroid_answer_code(data: ThyroidRiskRequest) -> int:
+    """Bitmask of a thyroid questionnaire's answers, bit i for THYROID_RULES.fields[i]."""
+    code = 0
+    for bit, field in enumerate(THYROID_RULES.fields):
+        if getattr(data, field):
+            code |= 1 << bit
+    return code
+
+
+def thyroid_answer_codes(items: List[ThyroidRiskRequest]) -> List[int]:
+    """Answer codes of many questionnaires, computed column-wise."""
+    return THYROID_RULES.answer_codes(THYROID_RULES.answer_matrix(items)).tolist()
+
+
+# Every thyroid assessment response, pre-encoded (built at startup)
+THYROID_RESPONSES = ResponseTable(
+    size=1 << len(THYROID_RULES.fields),
+    score_codes=score_thyroid_codes,
+    build_response=lambda code: calculate_thyroid_risk(ThyroidRiskRequest(**{
+        field: bool(code & (1 << bit)) for bit, field in enumerate(THYROID_RULES.fields)
+    })),
+)
+
+
+class ThyroidLogStats:
+    """
+    Running aggregates over daily symptom logs.
+    
+    Updated in one pass with constant state, so the same logs in the same
+    order give the same result whether they arrive as one list or as a
+    stream split at arbitrary points.
+    """
+    
+    def __init__(self):
+        self.days = 0
+        self.energy_total = 0
+        self.energy_reported = False
+        self.high_fatigue_days = 0
+        self.temperature_total = 0.0
+        self.temperature_readings = 0
+        self.neck_swelling = False
     
-    # Calculate averages/counts
-    avg_energy = sum(log.energy_level for log in logs if log.energy_level) / len(logs) if any(l.energy_level for l in logs) else 0
-    high_fatigue_days = sum(1 for log in logs if log.fatigue_intensity and log.fatigue_intensity >= 4)
-    temp_readings = [log.body_temperature for log in logs if log.body_temperature]
-    avg_temp = sum(temp_readings) / len(temp_readings) if temp_readings else 0
+    def add(self, log: ThyroidSymptomLog):
+        """Fold one day's log into the aggregates."""
+        self.days += 1
+        if log.energy_level:
+            self.energy_total += log.energy_level
+            self.energy_reported = True
+        if log.fatigue_intensity and log.fatigue_intensity >= 4:
+            self.high_fatigue_days += 1
+        if log.body_temperature:
+            self.temperature_total += log.body_temperature
+            self.temperature_readings += 1
+        if log.neck_swelling:
+            self.neck_swelling = True
     
-    # Insight Logic
-    if avg_energy < 4 and high_fatigue_days > len(logs) / 2:
-        insights.append("You've reported consistently low energy and high fatigue. This is a common sign of Hypothyroidism.")
-        alert_triggered = True
+    def result(self) -> Dict:
+        """Status and insights for the logs added so far."""
+        if not self.days:
+            return {"status": "No data", "insights": []}
         
-    if avg_temp and avg_temp < 36.1: # Celsius
-        insights.append("Your average body temperature is lower than normal, which can be linked to low thyroid function.")
+        insights = []
+        alert_triggered = False
         
-    if any(log.neck_swelling for log in logs):
-        insights.append("You reported neck swelling. Please see a doctor immediately as this could be a goiter.")
-        alert_triggered = True
+        # Days without an energy rating count toward the average as zero
+        avg_energy = self.energy_total / self.days if self.energy_reported else 0
+        avg_temp = self.temperature_total / self.temperature_readings if self.temperature_readings else 0
         
-    status = "Possible Thyroid Alert" if alert_triggered else "Normal"
+        # Insight Logic
+        if avg_energy < 4 and self.high_fatigue_days > self.days / 2:
+            insights.append("You've reported consistently low energy and high fatigue. This is a common sign of Hypothyroidism.")
+            alert_triggered = True
+            
+        if avg_temp and avg_temp < 36.1: # Celsius
+            insights.append("Your average body temperature is lower than normal, which can be linked to low thyroid function.")
+            
+        if self.neck_swelling:
+            insights.append("You reported neck swelling. Please see a doctor immediately as this could be a goiter.")
+            alert_triggered = True
+            
+        status = "Possible Thyroid Alert" if alert_triggered else "Normal"
+        
+        return {
+            "status": status,
+            "insights": insights,
+            "analyzed_days": self.days
+        }
+
+
+def analyze_thyroid_symptoms(logs: List[ThyroidSymptomLog]) -> Dict:
+    """
+    Analyze a list of daily symptom logs to detect patterns.
+    """
+    stats = ThyroidLogStats()
+    for log in logs:
+        stats.add(log)
+    return stats.result()
+
+
+async def analyze_thyroid_log_stream(lines: AsyncIterator[bytes]) -> Dict:
+    """
+    Analyze daily symptom logs arriving as NDJSON, one log object per line.
     
-    return {
-        "status": status,
-        "insights": insights,
-        "analyzed_days": len(logs)
-    }
+    Each line is validated, folded into ThyroidLogStats and dropped, so memory
+    stays flat however many days are uploaded. Blank lines are skipped.
+    
+    Args:
+        lines: Raw NDJSON lines
+        
+    Returns:
+        The same result as analyze_thyroid_symptoms for the same logs
+        
+    Raises:
+        HTTPException: If a line is not a valid symptom log
+    """
+    stats = ThyroidLogStats()
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            log = ThyroidSymptomLog.model_validate_json(line)
+        except ValidationError as e:
+            error = e.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            detail = f"{location}: {error['msg']}" if location else error["msg"]
+            raise HTTPException(status_code=422, detail=f"Line {line_number}: {detail}")
+        stats.add(log)
+    return stats.result()
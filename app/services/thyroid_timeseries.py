@@ -0,0 +1,531 @@
+"""
+Per-user thyroid symptom history in a columnar store.
+
+Each user's logs are kept as one NumPy array per ThyroidSymptomLog field
+(appended with amortized doubling), sorted by day:
+- numbers as float64 with NaN for "not reported"
+- yes/no answers as int8 (1 yes, 0 no, -1 not reported)
+- free-text answers as int16 codes into a per-user vocabulary (-1 missing),
+  capped at MAX_CATEGORY_VALUES distinct values per field
+
+Analytics for BBT, resting heart rate, energy and fatigue are maintained as
+logs arrive instead of being recomputed from the whole history:
+- rolling 7/30/90-day count, sum and sum of squares ending at the latest
+  logged day, updated with a sliding window start per span
+- an exponentially weighted mean and variance per metric; every day's value
+  gets a z-score against the EWMA of the days before it, and values beyond
+  ANOMALY_Z are flagged
+
+Appends in date order take the incremental path; backfilled or corrected
+days are written in place and the analytics rebuilt for that user.
+
+Histories live in an LRU cache per process. With THYROID_STORE_DIR set they
+are also persisted there (one .npz per user, written atomically under a
+per-user file lock) and shared by all workers; otherwise they are lost when
+evicted or on restart.
+"""
+
+import json
+import math
+import os
+import tempfile
+import typing
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.config import THYROID_STORE_DIR, THYROID_STORE_MAX_USERS
+from app.models.schemas import ThyroidSymptomLog
+from app.utils.logging import log_warning
+
+try:
+    import fcntl
+except ImportError:
+    # No POSIX file locks (e.g. Windows): writes are not serialized across processes
+    fcntl = None
+
+# Metrics with rolling windows and anomaly flags
+METRICS = ["body_temperature", "resting_heart_rate", "energy_level", "fatigue_intensity"]
+WINDOW_DAYS = [7, 30, 90]
+
+# EWMA smoothing over roughly two weeks; z-scores need a week of history
+EWMA_SPAN = 14
+EWMA_ALPHA = 2 / (EWMA_SPAN + 1)
+ANOMALY_Z = 3.0
+ANOMALY_MIN_OBSERVATIONS = 7
+
+INITIAL_CAPACITY = 64
+# Distinct free-text values stored per user and field (e.g. "gain", "loss", "stable")
+MAX_CATEGORY_VALUES = 32
+
+
+def _column_kinds() -> Dict[str, str]:
+    """Storage kind ("number", "flag" or "category") of each log field but the date."""
+    kinds = {}
+    for name, field in ThyroidSymptomLog.model_fields.items():
+        if name == "date":
+            continue
+        base = [arg for arg in typing.get_args(field.annotation) if arg is not type(None)]
+        annotation = base[0] if base else field.annotation
+        if annotation is bool:
+            kinds[name] = "flag"
+        elif annotation in (int, float):
+            kinds[name] = "number"
+        else:
+            kinds[name] = "category"
+    return kinds
+
+
+COLUMN_KINDS = _column_kinds()
+COLUMN_DTYPES = {"number": np.float64, "flag": np.int8, "category": np.int16}
+MISSING = {"number": np.nan, "flag": -1, "category": -1}
+
+
+def _day_number(value: str) -> int:
+    return date.fromisoformat(value).toordinal()
+
+
+def _day_string(day: int) -> str:
+    return date.fromordinal(int(day)).isoformat()
+
+
+class ThyroidSeries:
+    """Columnar log history of one user and its incremental analytics."""
+
+    def __init__(self):
+        self.length = 0
+        self.days = np.empty(INITIAL_CAPACITY, dtype=np.int32)
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.empty(INITIAL_CAPACITY, dtype=COLUMN_DTYPES[kind])
+            for name, kind in COLUMN_KINDS.items()
+        }
+        self.vocab: Dict[str, List[str]] = {name: [] for name, kind in COLUMN_KINDS.items() if kind == "category"}
+        # z-score of each day's metrics against the EWMA of earlier days
+        self.zscores = np.empty((INITIAL_CAPACITY, len(METRICS)))
+        self._reset_analytics()
+
+    def _reset_analytics(self):
+        shape = (len(WINDOW_DAYS), len(METRICS))
+        self.window_start = np.zeros(len(WINDOW_DAYS), dtype=np.int64)
+        self.window_count = np.zeros(shape, dtype=np.int64)
+        self.window_sum = np.zeros(shape)
+        self.window_sumsq = np.zeros(shape)
+        self.ewma_mean = np.zeros(len(METRICS))
+        self.ewma_var = np.zeros(len(METRICS))
+        self.ewma_count = np.zeros(len(METRICS), dtype=np.int64)
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _reserve(self, extra: int):
+        """Grow every column so `extra` more rows fit, doubling capacity."""
+        needed = self.length + extra
+        capacity = len(self.days)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        self.days = np.resize(self.days, capacity)
+        self.columns = {name: np.resize(column, capacity) for name, column in self.columns.items()}
+        self.zscores = np.resize(self.zscores, (capacity, len(METRICS)))
+
+    @staticmethod
+    def _encode(name: str, value, vocab: Dict[str, List[str]]):
+        """
+        Storage value of a log field.
+
+        Raises:
+            ValueError: If a number doesn't fit in float64 or a free-text
+                field already has MAX_CATEGORY_VALUES distinct values
+        """
+        kind = COLUMN_KINDS[name]
+        if value is None:
+            return MISSING[kind]
+        if kind == "category":
+            values = vocab[name]
+            if value not in values:
+                if len(values) >= MAX_CATEGORY_VALUES:
+                    raise ValueError(
+                        f"{name}: at most {MAX_CATEGORY_VALUES} distinct values can be stored per user"
+                    )
+                values.append(value)
+            return values.index(value)
+        if kind == "number":
+            try:
+                number = float(value)
+            except OverflowError:
+                number = math.inf
+            if not math.isfinite(number):
+                raise ValueError(f"{name}: value is out of range")
+            return number
+        return value
+
+    def _encode_logs(self, logs: List[ThyroidSymptomLog]) -> List[Dict[str, object]]:
+        """
+        Storage values of every field of every log, computed before any
+        array is changed so an invalid log leaves the series untouched.
+
+        Raises:
+            ValueError: If a value can't be stored
+        """
+        vocab = {name: list(values) for name, values in self.vocab.items()}
+        rows = []
+        for index, log in enumerate(logs):
+            try:
+                rows.append({name: self._encode(name, getattr(log, name), vocab) for name in self.columns})
+            except ValueError as e:
+                raise ValueError(f"Log {index}: {e}")
+        self.vocab = vocab
+        return rows
+
+    def _write_row(self, row: int, day: int, values: Dict[str, object]):
+        self.days[row] = day
+        for name, value in values.items():
+            self.columns[name][row] = value
+
+    def _metric_rows(self, start: int, stop: int) -> np.ndarray:
+        """Metric values of rows [start, stop) as a (rows, metrics) matrix."""
+        return np.column_stack([self.columns[name][start:stop] for name in METRICS])
+
+    def add(self, logs: List[ThyroidSymptomLog]) -> Dict[str, int]:
+        """
+        Add daily logs; a log for an already stored day replaces it.
+
+        Args:
+            logs: Logs in any order
+
+        Returns:
+            Counts of appended, inserted (backfilled) and replaced days
+
+        Raises:
+            ValueError: If a date is not YYYY-MM-DD or a value can't be stored
+        """
+        # Parse and encode everything before touching the arrays, so a bad
+        # log changes nothing
+        days = []
+        for index, log in enumerate(logs):
+            try:
+                days.append(_day_number(log.date))
+            except ValueError as e:
+                raise ValueError(f"Log {index}: date: {e}")
+        rows = self._encode_logs(logs)
+        counts = {"appended": 0, "inserted": 0, "replaced": 0}
+        # Stable sort: for repeated dates within a batch the last log wins
+        order = sorted(range(len(logs)), key=days.__getitem__)
+        self._reserve(len(logs))
+        rebuild = False
+        for index in order:
+            values, day = rows[index], days[index]
+            if self.length == 0 or day > self.days[self.length - 1]:
+                row = self.length
+                self._write_row(row, day, values)
+                self.length += 1
+                counts["appended"] += 1
+                if not rebuild:
+                    self._update_analytics(row)
+                continue
+
+            position = int(np.searchsorted(self.days[:self.length], day))
+            inserted = self.days[position] != day
+            if inserted:
+                # Shift later rows down one to make room
+                stop = self.length
+                self.days[position + 1:stop + 1] = self.days[position:stop]
+                for column in self.columns.values():
+                    column[position + 1:stop + 1] = column[position:stop]
+            self._write_row(position, day, values)
+            if inserted:
+                self.length += 1
+                counts["inserted"] += 1
+            else:
+                counts["replaced"] += 1
+            rebuild = True
+
+        if rebuild:
+            self.rebuild_analytics()
+        return counts
+
+    # ------------------------------------------------------------------
+    # Analytics
+    # ------------------------------------------------------------------
+
+    def _update_ewma(self, row: int):
+        """Score a day's metrics against the EWMA so far, then fold them in."""
+        values = self._metric_rows(row, row + 1)[0]
+        observed = ~np.isnan(values)
+        ready = observed & (self.ewma_count >= ANOMALY_MIN_OBSERVATIONS) & (self.ewma_var > 0)
+        z = np.full(len(METRICS), np.nan)
+        z[ready] = (values[ready] - self.ewma_mean[ready]) / np.sqrt(self.ewma_var[ready])
+        self.zscores[row] = z
+
+        values = np.where(observed, values, 0.0)
+        first = observed & (self.ewma_count == 0)
+        update = observed & ~first
+        diff = values - self.ewma_mean
+        increment = EWMA_ALPHA * diff
+        self.ewma_mean = np.where(first, values, np.where(update, self.ewma_mean + increment, self.ewma_mean))
+        self.ewma_var = np.where(update, (1 - EWMA_ALPHA) * (self.ewma_var + diff * increment), self.ewma_var)
+        self.ewma_count += observed
+
+    def _update_analytics(self, row: int):
+        """Incremental update for a row appended after every other day."""
+        self._update_ewma(row)
+
+        values = self._metric_rows(row, row + 1)[0]
+        observed = ~np.isnan(values)
+        values = np.where(observed, values, 0.0)
+        # Add the new day to every window at once
+        self.window_count += observed
+        self.window_sum += values
+        self.window_sumsq += values * values
+
+        # Slide each window's start past days that fell out of it
+        day = self.days[row]
+        for w, span in enumerate(WINDOW_DAYS):
+            start = int(self.window_start[w])
+            stop = int(np.searchsorted(self.days[start:row + 1], day - span, side="right")) + start
+            if stop > start:
+                dropped = self._metric_rows(start, stop)
+                dropped_observed = ~np.isnan(dropped)
+                dropped = np.where(dropped_observed, dropped, 0.0)
+                self.window_count[w] -= dropped_observed.sum(axis=0)
+                self.window_sum[w] -= dropped.sum(axis=0)
+                self.window_sumsq[w] -= (dropped * dropped).sum(axis=0)
+                self.window_start[w] = stop
+
+    def rebuild_analytics(self):
+        """Recompute windows and z-scores from the stored history."""
+        self._reset_analytics()
+        for row in range(self.length):
+            self._update_ewma(row)
+        if not self.length:
+            return
+
+        latest = self.days[self.length - 1]
+        for w, span in enumerate(WINDOW_DAYS):
+            start = int(np.searchsorted(self.days[:self.length], latest - span, side="right"))
+            block = self._metric_rows(start, self.length)
+            observed = ~np.isnan(block)
+            block = np.where(observed, block, 0.0)
+            self.window_start[w] = start
+            self.window_count[w] = observed.sum(axis=0)
+            self.window_sum[w] = block.sum(axis=0)
+            self.window_sumsq[w] = (block * block).sum(axis=0)
+
+    def windows(self) -> Dict[str, Dict[str, dict]]:
+        """Mean, standard deviation and count per metric for each rolling window."""
+        result = {}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = self.window_sum / self.window_count
+            variances = np.maximum(self.window_sumsq / self.window_count - means * means, 0.0)
+        for w, span in enumerate(WINDOW_DAYS):
+            result[f"{span}d"] = {
+                metric: {
+                    "count": int(self.window_count[w, m]),
+                    "mean": round(float(means[w, m]), 3) if self.window_count[w, m] else None,
+                    "std": round(float(np.sqrt(variances[w, m])), 3) if self.window_count[w, m] else None,
+                }
+                for m, metric in enumerate(METRICS)
+            }
+        return result
+
+    def anomalies(self, days: int = WINDOW_DAYS[-1]) -> List[dict]:
+        """
+        Flagged metric values in the last `days` logged days.
+
+        Returns:
+            One entry per flagged value, oldest first
+        """
+        if not self.length:
+            return []
+        latest = self.days[self.length - 1]
+        start = int(np.searchsorted(self.days[:self.length], latest - days, side="right"))
+        z = self.zscores[start:self.length]
+        with np.errstate(invalid="ignore"):
+            rows, metrics = np.nonzero(np.abs(z) > ANOMALY_Z)
+        return [
+            {
+                "date": _day_string(self.days[start + row]),
+                "metric": METRICS[m],
+                "value": float(self.columns[METRICS[m]][start + row]),
+                "z_score": round(float(z[row, m]), 2),
+            }
+            for row, m in zip(rows.tolist(), metrics.tolist())
+        ]
+
+    def summary(self) -> dict:
+        """Dashboard view: history span, rolling windows and recent anomalies."""
+        return {
+            "days_logged": self.length,
+            "first_date": _day_string(self.days[0]) if self.length else None,
+            "latest_date": _day_string(self.days[self.length - 1]) if self.length else None,
+            "windows": self.windows(),
+            "anomalies": self.anomalies(),
+        }
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {
+            "days": self.days[:self.length],
+            "zscores": self.zscores[:self.length],
+            "vocab": np.array(json.dumps(self.vocab)),
+            "window_start": self.window_start,
+            "window_count": self.window_count,
+            "window_sum": self.window_sum,
+            "window_sumsq": self.window_sumsq,
+            "ewma_mean": self.ewma_mean,
+            "ewma_var": self.ewma_var,
+            "ewma_count": self.ewma_count,
+        }
+        for name, column in self.columns.items():
+            arrays[f"column:{name}"] = column[:self.length]
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "ThyroidSeries":
+        series = cls()
+        length = len(arrays["days"])
+        series._reserve(length)
+        series.length = length
+        series.days[:length] = arrays["days"]
+        series.zscores[:length] = arrays["zscores"]
+        series.vocab = json.loads(str(arrays["vocab"]))
+        for name in series.columns:
+            key = f"column:{name}"
+            if key in arrays:
+                series.columns[name][:length] = arrays[key]
+            else:
+                # Field added to the log schema after this file was written
+                series.columns[name][:length] = MISSING[COLUMN_KINDS[name]]
+        for name in ("window_start", "window_count", "window_sum", "window_sumsq", "ewma_mean", "ewma_var", "ewma_count"):
+            setattr(series, name, np.array(arrays[name]))
+        return series
+
+
+class ThyroidSeriesStore:
+    """LRU cache of user histories, optionally persisted to a shared directory."""
+
+    def __init__(self, max_users: int, store_dir: Optional[str] = None):
+        self.max_users = max_users
+        self.store_dir = store_dir
+        # user id -> (series, mtime_ns of the file it was loaded from or written to)
+        self._series: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stats = {"appends": 0, "rebuilds": 0, "loads": 0, "writes": 0, "evictions": 0}
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+
+    def _path(self, user_id: str, suffix: str = ".npz") -> str:
+        return os.path.join(self.store_dir, f"{user_id}{suffix}")
+
+    def _load(self, user_id: str) -> Optional[ThyroidSeries]:
+        """Cached history, reloaded if another worker wrote a newer file."""
+        cached = self._series.get(user_id)
+        if not self.store_dir:
+            if cached:
+                self._series.move_to_end(user_id)
+            return cached[0] if cached else None
+
+        try:
+            mtime = os.stat(self._path(user_id)).st_mtime_ns
+        except FileNotFoundError:
+            self._series.pop(user_id, None)
+            return None
+        if cached and cached[1] == mtime:
+            self._series.move_to_end(user_id)
+            return cached[0]
+
+        with np.load(self._path(user_id), allow_pickle=False) as arrays:
+            series = ThyroidSeries.from_arrays(arrays)
+        self._stats["loads"] += 1
+        self._remember(user_id, series, mtime)
+        return series
+
+    def _save(self, user_id: str, series: ThyroidSeries):
+        if not self.store_dir:
+            self._remember(user_id, series, None)
+            return
+        # Write then rename so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.store_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **series.to_arrays())
+        os.replace(tmp_path, self._path(user_id))
+        self._stats["writes"] += 1
+        self._remember(user_id, series, os.stat(self._path(user_id)).st_mtime_ns)
+
+    def _remember(self, user_id: str, series: ThyroidSeries, mtime: Optional[int]):
+        self._series[user_id] = (series, mtime)
+        self._series.move_to_end(user_id)
+        while len(self._series) > self.max_users:
+            self._series.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    @contextmanager
+    def _locked(self, user_id: str):
+        """Exclusive per-user lock across processes (no-op without a store dir)."""
+        if not self.store_dir or fcntl is None:
+            yield
+            return
+        with open(self._path(user_id, ".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def add_logs(self, user_id: str, logs: List[ThyroidSymptomLog]) -> dict:
+        """
+        Store a user's daily logs and update their analytics.
+
+        Returns:
+            Counts of appended, inserted and replaced days plus the total
+        """
+        with self._locked(user_id):
+            series = self._load(user_id) or ThyroidSeries()
+            counts = series.add(logs)
+            self._stats["appends"] += counts["appended"]
+            self._stats["rebuilds"] += int(bool(counts["inserted"] or counts["replaced"]))
+            try:
+                self._save(user_id, series)
+            except OSError as e:
+                log_warning(f"Thyroid store: failed to write history for {user_id}: {e}")
+                self._remember(user_id, series, None)
+        return {**counts, "days_logged": series.length}
+
+    def get(self, user_id: str) -> Optional[ThyroidSeries]:
+        """A user's history, or None if nothing was logged."""
+        return self._load(user_id)
+
+    def delete(self, user_id: str) -> bool:
+        """Remove a user's history. Returns False if there was none."""
+        existed = self._series.pop(user_id, None) is not None
+        if self.store_dir:
+            with self._locked(user_id):
+                try:
+                    os.unlink(self._path(user_id))
+                    existed = True
+                except FileNotFoundError:
+                    pass
+            try:
+                os.unlink(self._path(user_id, ".lock"))
+            except FileNotFoundError:
+                pass
+        return existed
+
+    def stats(self) -> dict:
+        """Cache size and write counters."""
+        return {
+            **self._stats,
+            "cached_users": len(self._series),
+            "max_users": self.max_users,
+            "persistent": bool(self.store_dir),
+        }
+
+
+thyroid_store = ThyroidSeriesStore(max_users=THYROID_STORE_MAX_USERS, store_dir=THYROID_STORE_DIR)
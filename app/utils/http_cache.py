@@ -0,0 +1,56 @@
+"""
+Conditional GET support for pre-encoded, rarely changing responses.
+"""
+
+import hashlib
+from typing import Optional
+
+from fastapi import Response
+
+
+class CachedBody:
+    """An encoded response body with its strong ETag."""
+
+    def __init__(self, body: bytes, media_type: str = "application/json"):
+        self.body = body
+        self.media_type = media_type
+        # Content hash: identical bytes get identical tags on every worker and deploy
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches an ETag.
+
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match, so
+    `W/"x"` matches `"x"` (CDNs weaken tags of responses they compress).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def cached_response(cached: CachedBody, if_none_match: Optional[str], max_age: int) -> Response:
+    """
+    Serve a pre-encoded body, or 304 Not Modified when the client has it.
+
+    Args:
+        cached: Body and ETag to serve
+        if_none_match: The request's If-None-Match header, if any
+        max_age: Seconds clients and shared caches may reuse the body
+
+    Returns:
+        200 with the body, or an empty 304, both with ETag and Cache-Control
+    """
+    headers = {"ETag": cached.etag, "Cache-Control": f"public, max-age={max_age}"}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type=cached.media_type, headers=headers)
@@ -0,0 +1,170 @@
+"""
+Multi-pattern keyword matching with an Aho-Corasick automaton.
+
+All keywords of all categories are compiled into one automaton, so a text is
+classified against every category in a single linear pass whose cost doesn't
+depend on how many keywords there are.
+"""
+
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Set, Tuple
+
+
+class KeywordMatcher:
+    """Case-insensitive matcher for categorized keyword lists."""
+
+    def __init__(self, categories: Dict[str, Iterable[str]], word_boundary: bool = False):
+        """
+        Compile keyword lists into an automaton.
+
+        Args:
+            categories: Mapping of category name -> keywords
+            word_boundary: Only match keywords that start and end on word
+                boundaries ("pad" won't match "update"); otherwise plain
+                substring semantics
+        """
+        self.word_boundary = word_boundary
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per state: (keyword length, keyword, category) for every keyword ending here
+        self._outputs: List[List[Tuple[int, str, str]]] = [[]]
+
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                self._add(keyword.lower(), category)
+        self._build_failure_links()
+
+    def _add(self, keyword: str, category: str):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append((len(keyword), keyword, category))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                # Inherit matches of the longest proper suffix
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+        self._categories = [frozenset(output[2] for output in outputs) for outputs in self._outputs]
+        self._all_categories = frozenset().union(*self._categories)
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, str, str]]:
+        """
+        Find every keyword occurrence in a text.
+
+        Args:
+            text: Text to scan
+
+        Yields:
+            Tuples of (start, end, keyword, category)
+        """
+        text = text.lower()
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            for length, keyword, category in outputs[state]:
+                start, end = index - length + 1, index + 1
+                if self.word_boundary and not self._on_boundaries(text, start, end):
+                    continue
+                yield start, end, keyword, category
+
+    @staticmethod
+    def _on_boundaries(text: str, start: int, end: int) -> bool:
+        before = text[start - 1] if start > 0 else " "
+        after = text[end] if end < len(text) else " "
+        return not before.isalnum() and not after.isalnum()
+
+    def classify(self, text: str) -> FrozenSet[str]:
+        """
+        Get the categories with at least one keyword in the text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Set of matched category names
+        """
+        if self.word_boundary:
+            return frozenset(category for _, _, _, category in self.finditer(text))
+
+        # Substring mode only needs the categories per state, and can stop
+        # as soon as every category has been seen
+        goto, fail, categories = self._goto, self._fail, self._categories
+        found = set()
+        state = 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if categories[state]:
+                found.update(categories[state])
+                if len(found) == len(self._all_categories):
+                    break
+        return frozenset(found)
+
+    def contains(self, text: str, category: str) -> bool:
+        """Check whether the text contains a keyword from one category."""
+        return any(match[3] == category for match in self.finditer(text))
+
+    def stream(self) -> "KeywordStream":
+        """
+        Start an incremental scan for text that arrives in chunks.
+
+        Keywords split across chunk boundaries are still matched.
+
+        Raises:
+            ValueError: If the matcher uses word-boundary semantics
+        """
+        if self.word_boundary:
+            raise ValueError("Incremental scanning only supports substring matching")
+        return KeywordStream(self)
+
+
+class KeywordStream:
+    """Automaton state carried across the chunks of a streamed text."""
+
+    def __init__(self, matcher: KeywordMatcher):
+        self._matcher = matcher
+        self._state = 0
+        self.categories: Set[str] = set()
+
+    def feed(self, chunk: str) -> FrozenSet[str]:
+        """
+        Scan the next chunk of text.
+
+        Args:
+            chunk: Text continuing the stream
+
+        Returns:
+            Categories matched anywhere in the stream so far
+        """
+        goto, fail, categories = self._matcher._goto, self._matcher._fail, self._matcher._categories
+        state = self._state
+        for char in chunk.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if categories[state]:
+                self.categories.update(categories[state])
+        self._state = state
+        return frozenset(self.categories)
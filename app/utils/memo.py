@@ -0,0 +1,153 @@
+"""
+Bounded memo for expensive decisions.
+
+Values live in a per-process LRU with a TTL. When a shared directory is
+configured, entries are also written there as one small file per key, so
+every worker on the box (and workers started after a recycle) reuse each
+other's results.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+
+class DecisionMemo:
+    """TTL/LRU memo with an optional file-backed shared tier."""
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float, shared_dir: Optional[str] = None):
+        """
+        Args:
+            name: Memo name, used as a subdirectory of shared_dir
+            max_entries: Entries kept in process memory
+            ttl_seconds: Lifetime of an entry
+            shared_dir: Directory shared by all workers, or None for local only
+        """
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.shared_dir = os.path.join(shared_dir, name) if shared_dir else None
+        # key -> (value, expires_at as wall-clock time so it means the same in every worker)
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._stats = {"local_hits": 0, "shared_hits": 0, "misses": 0, "evictions": 0}
+
+        if self.shared_dir:
+            try:
+                os.makedirs(self.shared_dir, exist_ok=True)
+            except OSError:
+                self.shared_dir = None
+
+    def _shared_path(self, key: str) -> str:
+        return os.path.join(self.shared_dir, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+    def get(self, key: str) -> Tuple[Optional[Any], str]:
+        """
+        Look up a memoized value.
+
+        Args:
+            key: Lookup key
+
+        Returns:
+            Tuple of (value, source) with source "local", "shared" or "miss";
+            value is None on a miss
+        """
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] > now:
+                self._entries.move_to_end(key)
+                self._stats["local_hits"] += 1
+                return entry[0], "local"
+            del self._entries[key]
+
+        if self.shared_dir:
+            try:
+                with open(self._shared_path(key)) as f:
+                    record = json.load(f)
+                if record["expires_at"] > now and record["key"] == key:
+                    self._store_local(key, record["value"], record["expires_at"])
+                    self._stats["shared_hits"] += 1
+                    return record["value"], "shared"
+            except (OSError, ValueError, KeyError):
+                pass
+
+        self._stats["misses"] += 1
+        return None, "miss"
+
+    def put(self, key: str, value: Any):
+        """
+        Memoize a JSON-serializable value.
+
+        Args:
+            key: Lookup key
+            value: Value to store
+        """
+        expires_at = time.time() + self.ttl_seconds
+        self._store_local(key, value, expires_at)
+
+        if self.shared_dir:
+            try:
+                # Write then rename so readers never see a partial file
+                fd, tmp_path = tempfile.mkstemp(dir=self.shared_dir, suffix=".tmp")
+                with os.fdopen(fd, "w") as f:
+                    json.dump({"key": key, "value": value, "expires_at": expires_at}, f)
+                os.replace(tmp_path, self._shared_path(key))
+            except OSError:
+                pass
+
+    def _store_local(self, key: str, value: Any, expires_at: float):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def prune_shared(self) -> int:
+        """
+        Delete expired entries from the shared directory.
+
+        Returns:
+            Number of files removed
+        """
+        if not self.shared_dir:
+            return 0
+        removed = 0
+        now = time.time()
+        for entry in os.scandir(self.shared_dir):
+            try:
+                if entry.name.endswith(".tmp"):
+                    # Leftover from a writer that died mid-write
+                    expired = entry.stat().st_mtime < now - 60
+                else:
+                    with open(entry.path) as f:
+                        expired = json.load(f)["expires_at"] <= now
+                if expired:
+                    os.unlink(entry.path)
+                    removed += 1
+            except (OSError, ValueError, KeyError):
+                continue
+        return removed
+
+    def clear(self):
+        """Drop every entry held in this process."""
+        self._entries.clear()
+
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the memo."""
+        hits = self._stats["local_hits"] + self._stats["shared_hits"]
+        lookups = hits + self._stats["misses"]
+        return hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        return {
+            **self._stats,
+            "hit_rate": round(self.hit_rate(), 4),
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "shared": self.shared_dir is not None,
+        }
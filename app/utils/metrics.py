@@ -0,0 +1,113 @@
+"""
+In-process metrics registry.
+
+Counters, gauges and histograms keyed by name and labels, rendered in the Prometheus text
+exposition format at GET /metrics. Values are per worker process; scrape each
+worker (or aggregate by pid label) when running several.
+"""
+
+import os
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+_LabelKey = Tuple[Tuple[str, str], ...]
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_counters: Dict[str, Dict[_LabelKey, float]] = {}
+_gauges: Dict[str, Dict[_LabelKey, float]] = {}
+# name -> (bucket upper bounds, label key -> [per-bucket counts..., +Inf count, sum])
+_histograms: Dict[str, Tuple[Tuple[float, ...], Dict[_LabelKey, List[float]]]] = {}
+_help: Dict[str, str] = {}
+_lock = threading.Lock()
+
+
+def _label_key(labels: Dict[str, str]) -> _LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def describe(name: str, help_text: str):
+    """Register the HELP text shown for a metric."""
+    _help[name] = help_text
+
+
+def inc_counter(name: str, value: float = 1.0, **labels):
+    """Increase a counter."""
+    key = _label_key(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0.0) + value
+
+
+def set_gauge(name: str, value: float, **labels):
+    """Set a gauge to a value."""
+    with _lock:
+        _gauges.setdefault(name, {})[_label_key(labels)] = value
+
+
+def observe(name: str, value: float, buckets: Sequence[float] = DEFAULT_BUCKETS, **labels):
+    """
+    Record one observation in a histogram.
+
+    Args:
+        name: Metric name
+        value: Observed value
+        buckets: Bucket upper bounds, fixed by the first observation of a name
+        **labels: Label values
+    """
+    with _lock:
+        bounds, series = _histograms.setdefault(name, (tuple(buckets), {}))
+        counts = series.setdefault(_label_key(labels), [0.0] * (len(bounds) + 2))
+        counts[bisect_left(bounds, value)] += 1
+        counts[-1] += value
+
+
+def get_counter(name: str, **labels) -> float:
+    """Current value of a counter (0 if never incremented)."""
+    with _lock:
+        return _counters.get(name, {}).get(_label_key(labels), 0.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: _LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+def render_metrics() -> str:
+    """
+    Render all metrics in Prometheus text format.
+
+    Returns:
+        Exposition text
+    """
+    lines = []
+    with _lock:
+        for kind, registry in (("counter", _counters), ("gauge", _gauges)):
+            for name in sorted(registry):
+                if name in _help:
+                    lines.append(f"# HELP {name} {_help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in registry[name].items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+        for name in sorted(_histograms):
+            bounds, series = _histograms[name]
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, counts in series.items():
+                cumulative = 0.0
+                for bound, count in zip(bounds + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {counts[-1]}")
+                lines.append(f"{name}_count{_format_labels(key)} {cumulative}")
+    lines.append(f'process_info{{pid="{os.getpid()}"}} 1')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,43 @@
+"""
+Line splitting for NDJSON request bodies.
+"""
+
+from typing import AsyncIterator
+
+
+class LineTooLongError(ValueError):
+    """A line exceeded the allowed length."""
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[bytes]:
+    """
+    Split a chunked byte stream into lines as it arrives.
+    
+    Only the current chunk and one partial line are held at a time, so memory
+    stays flat however long the stream is. Lines are the same for any
+    chunking of the input.
+    
+    Args:
+        chunks: Body chunks, e.g. Request.stream()
+        max_line_bytes: Longest line accepted
+        
+    Yields:
+        Each line without its newline (a final unterminated line included)
+        
+    Raises:
+        LineTooLongError: If a line is longer than max_line_bytes
+    """
+    partial = b""
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        lines = (partial + chunk).split(b"\n")
+        partial = lines.pop()
+        if len(partial) > max_line_bytes:
+            raise LineTooLongError(f"Line longer than {max_line_bytes} bytes")
+        for line in lines:
+            if len(line) > max_line_bytes:
+                raise LineTooLongError(f"Line longer than {max_line_bytes} bytes")
+            yield line
+    if partial:
+        yield partial
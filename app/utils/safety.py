@@ -2,6 +2,9 @@
 Safety check utilities for chatbot input validation.
 """
 
+from functools import lru_cache
+from typing import FrozenSet, Optional
+
 from app.models.constants import (
     EMERGENCY_KEYWORDS,
     UNSAFE_KEYWORDS,
@@ -9,19 +12,53 @@ from app.models.constants import (
     OFF_TOPIC_KEYWORDS,
     TOPIC_VALIDATION_PROMPT,
 )
-from app.config import client, MODEL_NAME
+from app.config import (
+    MODEL_NAME,
+    TOPIC_CLASSIFIER_ENABLED,
+    TOPIC_CLASSIFIER_RELEVANT_THRESHOLD,
+    TOPIC_CLASSIFIER_IRRELEVANT_THRESHOLD,
+    TOPIC_MEMO_MAX_ENTRIES,
+    TOPIC_MEMO_TTL_SECONDS,
+    TOPIC_MEMO_SHARED_DIR,
+)
+from app.ml.topic_classifier import get_topic_classifier
+from app.llm import client as llm_client, resilience
+from app.utils.keyword_matcher import KeywordMatcher
+from app.utils.memo import DecisionMemo
+from app.utils.metrics import describe, inc_counter, set_gauge
+from app.utils.text import normalize_message
+
+
+# All keyword categories compiled once into a single automaton
+KEYWORD_MATCHER = KeywordMatcher({
+    "emergency": EMERGENCY_KEYWORDS,
+    "unsafe": UNSAFE_KEYWORDS,
+    "health": HEALTH_RELATED_KEYWORDS,
+    "off_topic": OFF_TOPIC_KEYWORDS,
+})
+
+
+@lru_cache(maxsize=1024)
+def classify_message(message: str) -> FrozenSet[str]:
+    """
+    Get every keyword category present in a message in one pass.
+    
+    Cached so the safety and topic checks on the same message share a scan.
+    
+    Returns:
+        Set of matched categories: emergency, unsafe, health, off_topic
+    """
+    return KEYWORD_MATCHER.classify(message)
 
 
 def check_emergency(message: str) -> bool:
     """Check if message contains emergency keywords."""
-    message_lower = message.lower()
-    return any(keyword in message_lower for keyword in EMERGENCY_KEYWORDS)
+    return "emergency" in classify_message(message)
 
 
 def check_unsafe(message: str) -> bool:
     """Check if message contains unsafe content keywords."""
-    message_lower = message.lower()
-    return any(keyword in message_lower for keyword in UNSAFE_KEYWORDS)
+    return "unsafe" in classify_message(message)
 
 
 def is_obviously_off_topic(message: str) -> bool:
@@ -30,33 +67,84 @@ def is_obviously_off_topic(message: str) -> bool:
     
     Returns True if the message is clearly off-topic.
     """
-    message_lower = message.lower()
+    categories = classify_message(message)
     
-    # Check for off-topic keywords
-    has_off_topic = any(keyword in message_lower for keyword in OFF_TOPIC_KEYWORDS)
+    # If it has off-topic keywords and no health keywords, it's likely off-topic
+    return "off_topic" in categories and "health" not in categories
+
+
+# How topic decisions were made (local classifier vs LLM fallback)
+topic_decision_stats = {
+    "local_relevant": 0,
+    "local_irrelevant": 0,
+    "llm_fallback": 0,
+}
+
+# LLM topic decisions keyed on normalized text, so repeated questions skip the call
+topic_memo = DecisionMemo(
+    "topics",
+    max_entries=TOPIC_MEMO_MAX_ENTRIES,
+    ttl_seconds=TOPIC_MEMO_TTL_SECONDS,
+    shared_dir=TOPIC_MEMO_SHARED_DIR,
+)
+
+describe("topic_memo_lookups_total", "Topic memo lookups by result (local, shared, miss)")
+describe("topic_memo_hit_ratio", "Fraction of topic memo lookups served from the memo")
+
+
+def classify_topic_locally(message: str) -> Optional[bool]:
+    """
+    Classify topic relevance with the local n-gram classifier.
     
-    # Check for health-related keywords
-    has_health_keywords = any(keyword in message_lower for keyword in HEALTH_RELATED_KEYWORDS)
+    Returns True/False when the classifier is confident, None when the
+    message should be sent to the LLM classifier.
+    """
+    if not TOPIC_CLASSIFIER_ENABLED:
+        return None
     
-    # If it has off-topic keywords and no health keywords, it's likely off-topic
-    if has_off_topic and not has_health_keywords:
+    probability = get_topic_classifier().predict_proba(message)
+    if probability >= TOPIC_CLASSIFIER_RELEVANT_THRESHOLD:
         return True
-    
-    return False
+    if probability <= TOPIC_CLASSIFIER_IRRELEVANT_THRESHOLD:
+        return False
+    return None
 
 
-def validate_topic_with_ai(message: str) -> bool:
+async def validate_topic_with_ai(message: str) -> bool:
     """
-    Use AI to validate if the question is related to reproductive health.
+    Validate if the question is related to reproductive health.
+    
+    The local classifier answers confident cases; the LLM is only asked
+    when it is unsure, and its decisions are memoized per normalized message
+    (Unicode-aware, so non-Latin messages get their own keys).
     
     Returns True if the topic is relevant to reproductive health.
     """
+    local_decision = classify_topic_locally(message)
+    if local_decision is not None:
+        topic_decision_stats["local_relevant" if local_decision else "local_irrelevant"] += 1
+        return local_decision
+    
+    # Messages that normalize to nothing (only emoji/punctuation) all share
+    # the empty key, so they are never memoized
+    memo_key = normalize_message(message)
+    if memo_key:
+        memoized, source = topic_memo.get(memo_key)
+        inc_counter("topic_memo_lookups_total", result=source)
+        set_gauge("topic_memo_hit_ratio", topic_memo.hit_rate())
+        if memoized is not None:
+            return memoized
+    
+    topic_decision_stats["llm_fallback"] += 1
+    client = llm_client.get_llm_client()
     if not client:
-        # If Groq client is not available, be permissive
+        # If no LLM provider is configured, be permissive
         return True
     
     try:
-        validation_response = client.chat.completions.create(
+        validation_response = await resilience.create_completion(
+            client,
+            "classifier",
             messages=[
                 {"role": "user", "content": TOPIC_VALIDATION_PROMPT.format(message=message)}
             ],
@@ -65,9 +153,14 @@ def validate_topic_with_ai(message: str) -> bool:
             max_tokens=10
         )
         
-        classification = validation_response.choices[0].message.content.strip().upper()
-        return "RELEVANT" in classification
+        classification = validation_response.content.strip().upper()
+        is_relevant = "RELEVANT" in classification and "IRRELEVANT" not in classification
+        # Only real LLM decisions are memoized, never the permissive fallbacks
+        if memo_key:
+            topic_memo.put(memo_key, is_relevant)
+        return is_relevant
         
     except Exception:
-        # If AI validation fails, be permissive and allow the question
+        # If AI validation fails (including deadline or open circuit breaker),
+        # be permissive and allow the question
         return True
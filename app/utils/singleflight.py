@@ -0,0 +1,63 @@
+"""
+Single-flight coalescing of identical in-flight requests.
+
+Concurrent callers that ask for the same key await one shared computation
+instead of each running their own.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Deduplicate concurrent async calls by key."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Run `fn(*args, **kwargs)` once per key among concurrent callers.
+
+        The first caller for a key starts the computation; callers arriving
+        while it is still running await the same result (or exception).
+        The computation is shielded, so one caller disconnecting does not
+        cancel it for the others.
+
+        Args:
+            key: Identity of the request (equal keys share a result)
+            fn: Coroutine function performing the computation
+
+        Returns:
+            Result of the shared computation
+        """
+        self.calls += 1
+        task = self._inflight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.shared += 1
+
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        """Forget a completed computation so later calls start a fresh one."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        """Return call counters for this flight group."""
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "in_flight": len(self._inflight),
+        }
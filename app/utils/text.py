@@ -0,0 +1,30 @@
+"""
+Text normalization helpers shared by chat caches.
+"""
+
+import re
+import unicodedata
+
+_SPACES = re.compile(r"\s+")
+
+
+def _replacement(char: str) -> str:
+    """Space for punctuation, symbols and controls; format characters (e.g. zero-width joiners) are dropped."""
+    category = unicodedata.category(char)
+    if category == "Cf":
+        return ""
+    return " " if category[0] in "PSCZ" else char
+
+
+def normalize_message(message: str) -> str:
+    """
+    Case-fold, drop punctuation and collapse whitespace, in any script.
+
+    NFKC folds compatibility forms (full-width letters, ligatures) and
+    casefold() handles non-ASCII case; letters, digits and combining marks
+    (e.g. Devanagari vowel signs) of every script are kept, so non-Latin
+    messages keep distinct keys. May return "" for a message of only
+    punctuation or emoji.
+    """
+    text = unicodedata.normalize("NFKC", message).casefold()
+    return _SPACES.sub(" ", "".join(_replacement(char) for char in text)).strip()